@@ -1,66 +1,350 @@
-import json
+import atexit
+import heapq
 import os
+import sys
 import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter, mul
 from typing import Dict, List, Optional
+from persistencia import ler_json, gravar_json, iterar_jsonl, gravar_jsonl, dumps_linha, loads
+
+# Quantas movimentações recentes ficam guardadas para o relatório de últimas movimentações
+_MAX_RECENTES = 500
+
+
+def _centavos(valor: float) -> int:
+    """Converte um preço em reais para centavos inteiros"""
+    return round(valor * 100)
+
+
+@lru_cache(maxsize=4096)
+def _fold(texto: str) -> str:
+    """Normaliza um texto para comparações sem diferenciar maiúsculas (casefold)"""
+    return texto.casefold()
+
+
+# Campos de texto que se repetem entre registros (compartilhados via sys.intern)
+_CAMPOS_PRODUTO_REPETIDOS = ("categoria", "usuario_cadastro")
+_CAMPOS_MOVIMENTO_REPETIDOS = ("codigo_produto", "nome_produto", "tipo", "usuario")
+
+
+def _internar(registro: Dict, campos) -> Dict:
+    """
+    Compartilha chaves e valores de texto repetidos de um registro carregado
+    
+    Cada linha JSON gera chaves e valores próprios; com sys.intern todos os
+    registros passam a apontar para as mesmas strings, reduzindo a memória
+    ocupada por históricos grandes.
+    """
+    registro = {sys.intern(chave): valor for chave, valor in registro.items()}
+    for campo in campos:
+        valor = registro.get(campo)
+        if isinstance(valor, str):
+            registro[campo] = sys.intern(valor)
+    return registro
+
 
 class SistemaEstoque:
-    def __init__(self, arquivo_produtos: str = "produtos.json", arquivo_movimentos: str = "movimentos.json"):
+    def __init__(self, arquivo_produtos: str = "produtos.json", arquivo_movimentos: str = "movimentos.jsonl"):
         """
         Inicializa o sistema de estoque
         
         Args:
             arquivo_produtos: Arquivo para armazenar produtos
-            arquivo_movimentos: Arquivo para armazenar movimentações
+            arquivo_movimentos: Arquivo para armazenar movimentações (JSON Lines)
         """
         self.arquivo_produtos = arquivo_produtos
         self.arquivo_movimentos = arquivo_movimentos
+        self._arquivo_mov = None
+        self._movimentos = None
+        self._qtd_movimentos = None
+        self._movimentos_por_codigo = None
+        self._recentes = None
+        self._now_t = None
+        self._now_s = ""
+        
+        # Gravação adiada (ver transaction)
+        self._autosave = True
+        self._dirty_produtos = False
+        self._mov_pendentes: List[bytes] = []
+        
+        # Se True, as gravações forçam fsync (mais seguro contra queda de energia, mais lento)
+        self._durable = False
+        atexit.register(self.fechar)
         self.produtos = self.carregar_produtos()
-        self.movimentos = self.carregar_movimentos()
+        
+        # Índice nome (normalizado) -> código, para checar duplicidade sem varrer os produtos
+        self._nome_index: Dict[str, str] = {_fold(dados["nome"]): codigo for codigo, dados in self.produtos.items()}
+        
+        # Texto de busca pré-normalizado de cada produto (código, nome e categoria)
+        self._busca: Dict[str, str] = {codigo: self._texto_busca(codigo, dados) for codigo, dados in self.produtos.items()}
+        
+        # Códigos dos produtos agrupados por categoria (normalizada)
+        self._por_categoria: Dict[str, List[str]] = {}
+        for codigo, dados in self.produtos.items():
+            self._por_categoria.setdefault(_fold(dados["categoria"]), []).append(codigo)
+        
+        # Próximo número de código, calculado uma vez a partir do maior código existente
+        self._next_prod_num = 1 + max((int(codigo[4:]) for codigo in self.produtos if codigo.startswith("PROD")), default=0)
+        
+        # Agregados do relatório, mantidos incrementalmente a cada alteração
+        self._agg = self._calcular_agregados()
+        
+        # Listagens ordenadas já montadas, válidas enquanto _versao não mudar. Só cadastro
+        # e exclusão mudam quais produtos entram e a ordem; movimentações alteram apenas a
+        # quantidade dos próprios registros, que as listas já referenciam sem cópia
+        self._versao = 0
+        self._produtos_cache: Dict[tuple, List[Dict]] = {}
+        self._cache_version = 0
+    
+    @property
+    def movimentos(self) -> List:
+        """Histórico completo de movimentações, carregado apenas no primeiro acesso"""
+        if self._movimentos is None:
+            movimentos = self.carregar_movimentos()
+            # Dentro de transaction() as últimas movimentações ainda não estão no arquivo
+            movimentos.extend(self._movimentos_pendentes())
+            self._movimentos = movimentos
+            self._qtd_movimentos = max(self._qtd_movimentos or 0, len(movimentos))
+        return self._movimentos
+    
+    @property
+    def movimentos_por_codigo(self) -> Dict[str, List[Dict]]:
+        """Movimentações agrupadas por código do produto (em ordem de registro), montadas no primeiro acesso"""
+        if self._movimentos_por_codigo is None:
+            indice = defaultdict(list)
+            for movimento in self.movimentos:
+                indice[movimento["codigo_produto"]].append(movimento)
+            self._movimentos_por_codigo = indice
+        return self._movimentos_por_codigo
+    
+    def _movimentos_recentes(self) -> deque:
+        """Últimas movimentações em ordem de registro, lidas do histórico só na primeira chamada"""
+        if self._recentes is None:
+            self._recentes = deque(self._movimentos_iter(), maxlen=_MAX_RECENTES)
+        return self._recentes
+    
+    def _movimentos_iter(self):
+        """Percorre as movimentações sem materializar o histórico se ele não estiver carregado"""
+        if self._movimentos is None and os.path.exists(self.arquivo_movimentos):
+            yield from iterar_jsonl(self.arquivo_movimentos)
+            yield from self._movimentos_pendentes()
+        else:
+            yield from self.movimentos
+    
+    def _movimentos_pendentes(self) -> List[Dict]:
+        """Movimentações registradas em transaction() e ainda não gravadas no arquivo"""
+        return [_internar(loads(linha), _CAMPOS_MOVIMENTO_REPETIDOS) for linha in self._mov_pendentes]
+    
+    def _now_str(self) -> str:
+        """Data e hora atuais formatadas, recalculadas no máximo uma vez por segundo"""
+        agora = int(time.time())
+        if agora != self._now_t:
+            self._now_t = agora
+            self._now_s = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(agora))
+        return self._now_s
+    
+    @staticmethod
+    def _texto_busca(codigo: str, dados: Dict) -> str:
+        """Monta o texto normalizado usado pela busca de produtos"""
+        return f"{codigo}\x1f{dados['nome']}\x1f{dados['categoria']}".casefold()
+    
+    def _calcular_agregados(self) -> Dict:
+        """
+        Recalcula do zero os agregados do estoque
+        
+        Os totais são reduzidos coluna a coluna (listas de quantidades e
+        preços somadas com sum/map, que rodam em C) em vez de acumular
+        produto a produto. Os valores ficam em centavos inteiros para que
+        as somas e subtrações de _contabilizar não acumulem erro de float.
+        """
+        ativos = [(codigo, dados) for codigo, dados in self.produtos.items() if dados["ativo"]]
+        quantidades = [dados["quantidade"] for _, dados in ativos]
+        precos = [_centavos(dados["preco"]) for _, dados in ativos]
+        valores = list(map(mul, quantidades, precos))
+        
+        por_categoria = {}
+        for (codigo, dados), quantidade, valor in zip(ativos, quantidades, valores):
+            cat = por_categoria.get(dados["categoria"])
+            if cat is None:
+                cat = por_categoria[dados["categoria"]] = {"produtos": 0, "itens": 0, "valor": 0}
+            cat["produtos"] += 1
+            cat["itens"] += quantidade
+            cat["valor"] += valor
+        
+        self._agg = {
+            "total_produtos": len(ativos),
+            "total_itens": sum(quantidades),
+            "valor_total": sum(valores),  # em centavos
+            "zerados": {codigo for codigo, dados in ativos if dados["quantidade"] == 0},
+            "baixo": {codigo for codigo, dados in ativos if dados["quantidade"] <= dados["estoque_minimo"]},
+            "por_categoria": por_categoria
+        }
+        return self._agg
+    
+    def _contabilizar(self, codigo: str, dados: Dict, sinal: int):
+        """
+        Soma (sinal=1) ou retira (sinal=-1) a contribuição de um produto dos agregados
+        
+        Args:
+            codigo: Código do produto
+            dados: Dados do produto
+            sinal: 1 para somar, -1 para retirar
+        """
+        if not dados["ativo"]:
+            return
+        
+        agg = self._agg
+        quantidade = dados["quantidade"]
+        valor = quantidade * _centavos(dados["preco"])
+        agg["total_produtos"] += sinal
+        agg["total_itens"] += sinal * quantidade
+        agg["valor_total"] += sinal * valor
+        
+        cat = agg["por_categoria"].get(dados["categoria"])
+        if cat is None:
+            cat = agg["por_categoria"][dados["categoria"]] = {"produtos": 0, "itens": 0, "valor": 0}
+        cat["produtos"] += sinal
+        cat["itens"] += sinal * quantidade
+        cat["valor"] += sinal * valor
+        
+        if sinal > 0:
+            if quantidade == 0:
+                agg["zerados"].add(codigo)
+            if quantidade <= dados["estoque_minimo"]:
+                agg["baixo"].add(codigo)
+        else:
+            agg["zerados"].discard(codigo)
+            agg["baixo"].discard(codigo)
+            if cat["produtos"] == 0:
+                del agg["por_categoria"][dados["categoria"]]
     
     def carregar_produtos(self) -> Dict:
         """Carrega produtos do arquivo JSON"""
         if os.path.exists(self.arquivo_produtos):
             try:
-                with open(self.arquivo_produtos, 'r', encoding='utf-8') as arquivo:
-                    return json.load(arquivo)
-            except (json.JSONDecodeError, FileNotFoundError):
+                produtos = ler_json(self.arquivo_produtos)
+            except (ValueError, FileNotFoundError):
                 return {}
+            produtos = {codigo: _internar(dados, _CAMPOS_PRODUTO_REPETIDOS) for codigo, dados in produtos.items()}
+            # O código também fica no próprio registro, para as listagens devolverem os dicts sem copiá-los;
+            # "ativo" é normalizado aqui para que as leituras usem dados["ativo"] diretamente
+            for codigo, dados in produtos.items():
+                dados.setdefault("codigo", codigo)
+                dados.setdefault("ativo", True)
+            return produtos
         return {}
     
     def carregar_movimentos(self) -> List:
-        """Carrega movimentações do arquivo JSON"""
+        """
+        Carrega movimentações do arquivo JSON Lines
+        
+        Se o arquivo ainda não existir mas houver um movimentos.json no
+        formato antigo (lista JSON), ele é convertido automaticamente.
+        """
         if os.path.exists(self.arquivo_movimentos):
             try:
-                with open(self.arquivo_movimentos, 'r', encoding='utf-8') as arquivo:
-                    return json.load(arquivo)
-            except (json.JSONDecodeError, FileNotFoundError):
+                return [_internar(movimento, _CAMPOS_MOVIMENTO_REPETIDOS)
+                        for movimento in iterar_jsonl(self.arquivo_movimentos)]
+            except FileNotFoundError:
+                return []
+        
+        arquivo_legado = os.path.splitext(self.arquivo_movimentos)[0] + ".json"
+        if arquivo_legado != self.arquivo_movimentos and os.path.exists(arquivo_legado):
+            try:
+                movimentos = ler_json(arquivo_legado)
+            except (ValueError, FileNotFoundError):
                 return []
+            gravar_jsonl(self.arquivo_movimentos, movimentos)
+            return [_internar(movimento, _CAMPOS_MOVIMENTO_REPETIDOS) for movimento in movimentos]
         return []
     
     def salvar_produtos(self):
-        """Salva produtos no arquivo JSON"""
-        with open(self.arquivo_produtos, 'w', encoding='utf-8') as arquivo:
-            json.dump(self.produtos, arquivo, indent=4, ensure_ascii=False)
+        """Salva produtos no arquivo JSON (ou marca para salvar ao fim de uma transação)"""
+        if not self._autosave:
+            self._dirty_produtos = True
+            return
+        gravar_json(self.arquivo_produtos, self.produtos, self._durable)
+        self._dirty_produtos = False
     
-    def salvar_movimentos(self):
-        """Salva movimentações no arquivo JSON"""
-        with open(self.arquivo_movimentos, 'w', encoding='utf-8') as arquivo:
-            json.dump(self.movimentos, arquivo, indent=4, ensure_ascii=False)
+    def _anexar_movimento(self, movimento: Dict):
+        """Acrescenta uma movimentação ao final do arquivo, sem reescrevê-lo"""
+        self._mov_pendentes.append(dumps_linha(movimento))
+        if self._autosave:
+            self._gravar_movimentos_pendentes()
     
-    def gerar_codigo_produto(self) -> str:
-        """Gera um código único para o produto"""
-        if not self.produtos:
-            return "PROD001"
+    def _gravar_movimentos_pendentes(self):
+        """Grava de uma vez as linhas de movimentação acumuladas"""
+        if not self._mov_pendentes:
+            return
+        if self._arquivo_mov is None:
+            self._arquivo_mov = open(self.arquivo_movimentos, 'ab')
+        self._arquivo_mov.write(b"".join(self._mov_pendentes))
+        self._arquivo_mov.flush()
+        if self._durable:
+            os.fsync(self._arquivo_mov.fileno())
+        self._mov_pendentes.clear()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Adia a gravação dos arquivos até o fim do bloco
         
-        # Encontra o maior número de produto existente
-        codigos = [int(codigo[4:]) for codigo in self.produtos.keys() if codigo.startswith("PROD")]
-        if codigos:
-            proximo_numero = max(codigos) + 1
-        else:
-            proximo_numero = 1
+        Útil para operações em lote (ex.: vários itens de um pedido): os
+        produtos são salvos uma única vez e as movimentações são gravadas
+        juntas ao sair do bloco, mesmo que ocorra uma exceção.
         
-        return f"PROD{proximo_numero:03d}"
+        Exemplo:
+            with estoque.transaction():
+                estoque.registrar_movimento("PROD001", "saida", 2)
+                estoque.registrar_movimento("PROD002", "saida", 1)
+        """
+        anterior = self._autosave
+        self._autosave = False
+        try:
+            yield self
+        finally:
+            self._autosave = anterior
+            if self._autosave:
+                if self._dirty_produtos:
+                    self.salvar_produtos()
+                self._gravar_movimentos_pendentes()
+    
+    def _fechar_arquivo_mov(self):
+        """Fecha o arquivo de movimentações (reaberto na próxima gravação)"""
+        if self._arquivo_mov is not None:
+            self._arquivo_mov.close()
+            self._arquivo_mov = None
+    
+    def fechar(self):
+        """
+        Grava o que estiver pendente e fecha o arquivo de movimentações
+        
+        Chamado automaticamente ao sair do programa. O sistema continua
+        utilizável depois: o arquivo é reaberto na próxima movimentação.
+        """
+        if self._dirty_produtos:
+            gravar_json(self.arquivo_produtos, self.produtos, self._durable)
+            self._dirty_produtos = False
+        self._gravar_movimentos_pendentes()
+        self._fechar_arquivo_mov()
+    
+    def compactar_movimentos(self):
+        """Reescreve o arquivo de movimentações a partir da lista em memória"""
+        movimentos = self.movimentos  # carregado antes de descartar as linhas pendentes
+        self._mov_pendentes.clear()
+        self._fechar_arquivo_mov()
+        gravar_jsonl(self.arquivo_movimentos, movimentos, self._durable)
+    
+    def gerar_codigo_produto(self) -> str:
+        """Gera um código único para o produto"""
+        codigo = f"PROD{self._next_prod_num:03d}"
+        self._next_prod_num += 1
+        return codigo
     
     def cadastrar_produto(self, nome: str, categoria: str, preco: float, estoque_minimo: int = 5, usuario: str = "sistema") -> str:
         """
@@ -81,24 +365,31 @@ class SistemaEstoque:
             return None
         
         # Verifica se já existe produto com mesmo nome
-        for codigo, dados in self.produtos.items():
-            if dados["nome"].lower() == nome.lower():
-                print("❌ Erro: Já existe um produto com este nome!")
-                return None
+        nome_normalizado = _fold(nome)
+        if nome_normalizado in self._nome_index:
+            print("❌ Erro: Já existe um produto com este nome!")
+            return None
         
         codigo = self.gerar_codigo_produto()
         
         self.produtos[codigo] = {
+            "codigo": codigo,
             "nome": nome,
             "categoria": categoria,
             "preco": preco,
             "quantidade": 0,
             "estoque_minimo": estoque_minimo,
-            "data_cadastro": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "data_cadastro": self._now_str(),
             "usuario_cadastro": usuario,
             "ativo": True
         }
         
+        self._nome_index[nome_normalizado] = codigo
+        self._busca[codigo] = self._texto_busca(codigo, self.produtos[codigo])
+        self._por_categoria.setdefault(_fold(categoria), []).append(codigo)
+        self._contabilizar(codigo, self.produtos[codigo], 1)
+        self._versao += 1
+        
         self.salvar_produtos()
         print(f"✅ Produto {nome} cadastrado com código {codigo}!")
         return codigo
@@ -117,7 +408,8 @@ class SistemaEstoque:
         Returns:
             True se sucesso, False se erro
         """
-        if codigo_produto not in self.produtos:
+        produto = self.produtos.get(codigo_produto)
+        if produto is None:
             print("❌ Erro: Produto não encontrado!")
             return False
         
@@ -130,113 +422,146 @@ class SistemaEstoque:
             return False
         
         # Verifica se há estoque suficiente para saída
-        if tipo == "saida" and self.produtos[codigo_produto]["quantidade"] < quantidade:
+        estoque_anterior = produto["quantidade"]
+        if tipo == "saida" and estoque_anterior < quantidade:
             print("❌ Erro: Estoque insuficiente!")
-            print(f"Estoque atual: {self.produtos[codigo_produto]['quantidade']}")
+            print(f"Estoque atual: {estoque_anterior}")
             return False
         
-        # Atualiza quantidade no produto
+        # Atualiza quantidade no produto (e os agregados do relatório)
+        self._contabilizar(codigo_produto, produto, -1)
         if tipo == "entrada":
-            self.produtos[codigo_produto]["quantidade"] += quantidade
+            estoque_atual = estoque_anterior + quantidade
         else:  # saida
-            self.produtos[codigo_produto]["quantidade"] -= quantidade
+            estoque_atual = estoque_anterior - quantidade
+        produto["quantidade"] = estoque_atual
+        self._contabilizar(codigo_produto, produto, 1)
         
         # Registra o movimento
+        if self._qtd_movimentos is None:
+            self._qtd_movimentos = sum(1 for _ in self._movimentos_iter())
+        self._qtd_movimentos += 1
+        
         movimento = {
-            "id": len(self.movimentos) + 1,
+            "id": self._qtd_movimentos,
             "codigo_produto": codigo_produto,
-            "nome_produto": self.produtos[codigo_produto]["nome"],
+            "nome_produto": produto["nome"],
             "tipo": tipo,
             "quantidade": quantidade,
-            "estoque_anterior": self.produtos[codigo_produto]["quantidade"] - quantidade if tipo == "entrada" else self.produtos[codigo_produto]["quantidade"] + quantidade,
-            "estoque_atual": self.produtos[codigo_produto]["quantidade"],
+            "estoque_anterior": estoque_anterior,
+            "estoque_atual": estoque_atual,
             "observacao": observacao,
             "usuario": usuario,
-            "data_hora": time.strftime("%Y-%m-%d %H:%M:%S")
+            "data_hora": self._now_str()
         }
         
-        self.movimentos.append(movimento)
+        if self._movimentos is not None:
+            self._movimentos.append(movimento)
+        if self._movimentos_por_codigo is not None:
+            self._movimentos_por_codigo[codigo_produto].append(movimento)
+        if self._recentes is not None:
+            self._recentes.append(movimento)
         
         # Salva alterações
         self.salvar_produtos()
-        self.salvar_movimentos()
+        self._anexar_movimento(movimento)
         
         emoji = "📦" if tipo == "entrada" else "📤"
-        print(f"{emoji} {tipo.capitalize()} registrada: {quantidade} unidades de {self.produtos[codigo_produto]['nome']}")
-        print(f"Estoque atual: {self.produtos[codigo_produto]['quantidade']} unidades")
+        print(f"{emoji} {tipo.capitalize()} registrada: {quantidade} unidades de {produto['nome']}")
+        print(f"Estoque atual: {estoque_atual} unidades")
         
         # Alerta de estoque baixo
-        if self.produtos[codigo_produto]["quantidade"] <= self.produtos[codigo_produto]["estoque_minimo"]:
-            print(f"⚠️ ALERTA: Estoque baixo! Mínimo: {self.produtos[codigo_produto]['estoque_minimo']}")
+        if estoque_atual <= produto["estoque_minimo"]:
+            print(f"⚠️ ALERTA: Estoque baixo! Mínimo: {produto['estoque_minimo']}")
         
         return True
     
-    def listar_produtos(self, apenas_ativos: bool = True) -> List[Dict]:
+    def registrar_movimentos_lote(self, itens: List[Dict], tipo: str, observacao: str = "", usuario: str = "sistema") -> int:
+        """
+        Registra várias movimentações do mesmo tipo gravando os arquivos uma única vez
+        
+        Args:
+            itens: Registros com "codigo" e "quantidade" (ex.: itens de um pedido)
+            tipo: "entrada" ou "saida"
+            observacao: Observação aplicada a todas as movimentações
+            usuario: Usuário que fez as movimentações
+            
+        Returns:
+            Quantidade de movimentações registradas com sucesso
+        """
+        with self.transaction():
+            return sum(self.registrar_movimento(item["codigo"], tipo, item["quantidade"], observacao, usuario)
+                       for item in itens)
+    
+    def listar_produtos(self, apenas_ativos: bool = True, categoria: Optional[str] = None) -> List[Dict]:
         """
         Lista produtos cadastrados
         
+        Os dicionários devolvidos são os próprios registros do estoque (sem
+        cópia) e devem ser tratados como somente leitura.
+        
         Args:
             apenas_ativos: Se deve listar apenas produtos ativos
+            categoria: Se informada, lista apenas os produtos dessa categoria
             
         Returns:
             Lista de produtos
         """
-        produtos_lista = []
-        for codigo, dados in self.produtos.items():
-            if apenas_ativos and not dados.get("ativo", True):
-                continue
-            
-            produto = {
-                "codigo": codigo,
-                **dados
-            }
-            produtos_lista.append(produto)
-        
-        return sorted(produtos_lista, key=lambda x: x["nome"])
+        # A ordenação fica em cache até o próximo cadastro ou exclusão
+        if self._cache_version != self._versao:
+            self._produtos_cache.clear()
+            self._cache_version = self._versao
+        chave_cache = (apenas_ativos, None if categoria is None else _fold(categoria))
+        produtos_lista = self._produtos_cache.get(chave_cache)
+        if produtos_lista is None:
+            if categoria is None:
+                registros = self.produtos.values()
+            else:
+                registros = [self.produtos[codigo] for codigo in self._por_categoria.get(chave_cache[1], ())]
+            produtos_lista = [dados for dados in registros if not apenas_ativos or dados["ativo"]]
+            produtos_lista.sort(key=itemgetter("nome"))
+            self._produtos_cache[chave_cache] = produtos_lista
+        
+        return list(produtos_lista)
     
     def buscar_produto(self, termo: str) -> List[Dict]:
         """
         Busca produto por código ou nome
         
+        Os dicionários devolvidos são os próprios registros (somente leitura).
+        
         Args:
             termo: Termo de busca (código ou nome)
             
         Returns:
             Lista de produtos encontrados
         """
-        resultados = []
-        termo_lower = termo.lower()
+        termo_normalizado = _fold(termo)
         
-        for codigo, dados in self.produtos.items():
-            if (termo_lower in codigo.lower() or 
-                termo_lower in dados["nome"].lower() or 
-                termo_lower in dados["categoria"].lower()):
-                
-                produto = {
-                    "codigo": codigo,
-                    **dados
-                }
-                resultados.append(produto)
-        
-        return resultados
+        # O separador \x1f não aparece em termos digitados, então um termo
+        # nunca casa atravessando dois campos
+        return [self.produtos[codigo] for codigo, texto in self._busca.items() if termo_normalizado in texto]
     
     def obter_produtos_estoque_baixo(self) -> List[Dict]:
         """
         Obtém produtos com estoque baixo
         
+        Os dicionários devolvidos são os próprios registros (somente leitura).
+        
         Returns:
             Lista de produtos com estoque baixo
         """
-        produtos_baixo = []
-        for codigo, dados in self.produtos.items():
-            if dados.get("ativo", True) and dados["quantidade"] <= dados["estoque_minimo"]:
-                produto = {
-                    "codigo": codigo,
-                    **dados
-                }
-                produtos_baixo.append(produto)
-        
-        return sorted(produtos_baixo, key=lambda x: x["quantidade"])
+        produtos_baixo = [self.produtos[codigo] for codigo in self._agg["baixo"]]
+        return sorted(produtos_baixo, key=itemgetter("quantidade"))
+    
+    def contar_produtos_estoque_baixo(self) -> int:
+        """
+        Conta produtos com estoque baixo sem montar a lista
+        
+        Returns:
+            Quantidade de produtos ativos com estoque no mínimo ou abaixo
+        """
+        return len(self._agg["baixo"])
     
     def relatorio_estoque(self) -> Dict:
         """
@@ -245,30 +570,18 @@ class SistemaEstoque:
         Returns:
             Dicionário com dados do relatório
         """
-        total_produtos = len([p for p in self.produtos.values() if p.get("ativo", True)])
-        total_itens = sum(p["quantidade"] for p in self.produtos.values() if p.get("ativo", True))
-        valor_total = sum(p["quantidade"] * p["preco"] for p in self.produtos.values() if p.get("ativo", True))
-        produtos_zerados = len([p for p in self.produtos.values() if p.get("ativo", True) and p["quantidade"] == 0])
-        produtos_baixo = len(self.obter_produtos_estoque_baixo())
-        
-        categorias = {}
-        for dados in self.produtos.values():
-            if dados.get("ativo", True):
-                cat = dados["categoria"]
-                if cat not in categorias:
-                    categorias[cat] = {"produtos": 0, "itens": 0, "valor": 0}
-                categorias[cat]["produtos"] += 1
-                categorias[cat]["itens"] += dados["quantidade"]
-                categorias[cat]["valor"] += dados["quantidade"] * dados["preco"]
+        agg = self._agg
+        categorias = {cat: {**valores, "valor": valores["valor"] / 100}
+                      for cat, valores in agg["por_categoria"].items()}
         
         return {
-            "total_produtos": total_produtos,
-            "total_itens": total_itens,
-            "valor_total": valor_total,
-            "produtos_zerados": produtos_zerados,
-            "produtos_estoque_baixo": produtos_baixo,
+            "total_produtos": agg["total_produtos"],
+            "total_itens": agg["total_itens"],
+            "valor_total": agg["valor_total"] / 100,
+            "produtos_zerados": len(agg["zerados"]),
+            "produtos_estoque_baixo": self.contar_produtos_estoque_baixo(),
             "categorias": categorias,
-            "data_relatorio": time.strftime("%Y-%m-%d %H:%M:%S")
+            "data_relatorio": self._now_str()
         }
     
     def relatorio_movimentos(self, limite: int = 50) -> List[Dict]:
@@ -281,11 +594,11 @@ class SistemaEstoque:
         Returns:
             Lista das últimas movimentações
         """
-        # Ordena por data decrescente e pega os últimos
-        movimentos_ordenados = sorted(self.movimentos, 
-                                     key=lambda x: x["data_hora"], 
-                                     reverse=True)
-        return movimentos_ordenados[:limite]
+        if limite <= _MAX_RECENTES:
+            return list(islice(reversed(self._movimentos_recentes()), limite))
+        
+        # Mantém apenas as mais recentes, sem ordenar o histórico inteiro
+        return heapq.nlargest(limite, self._movimentos_iter(), key=itemgetter("data_hora"))
     
     def excluir_produto(self, codigo_produto: str, usuario: str = "sistema") -> bool:
         """
@@ -302,7 +615,9 @@ class SistemaEstoque:
             print("❌ Erro: Produto não encontrado!")
             return False
         
+        self._contabilizar(codigo_produto, self.produtos[codigo_produto], -1)
         self.produtos[codigo_produto]["ativo"] = False
+        self._versao += 1
         self.salvar_produtos()
         
         print(f"✅ Produto {self.produtos[codigo_produto]['nome']} desativado!")
@@ -1,162 +1,692 @@
-import json
+import atexit
+import bisect
+import copy
+import heapq
 import os
+import sys
 import time
-from datetime import datetime, timedelta
+from calendar import monthrange
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import lru_cache
+from operator import itemgetter
 from typing import Dict, List, Optional
-from decimal import Decimal, ROUND_HALF_UP
+from persistencia import ler_json, gravar_json, iterar_jsonl, dumps, dumps_linha, escrever_atomico
+
+# Categorias criadas na primeira execução (copiadas antes de usar, pois o dicionário é alterado)
+_DEFAULT_CATEGORIAS = {
+    "contas_pagar": {
+        "aluguel": {"nome": "Aluguel", "tipo": "fixa", "cor": "🔴"},
+        "internet": {"nome": "Internet", "tipo": "fixa", "cor": "🔴"},
+        "energia": {"nome": "Energia Elétrica", "tipo": "variavel", "cor": "🟡"},
+        "agua": {"nome": "Água", "tipo": "variavel", "cor": "🟡"},
+        "fornecedor": {"nome": "Fornecedor", "tipo": "variavel", "cor": "🟠"},
+        "imposto": {"nome": "Imposto", "tipo": "fixa", "cor": "🔴"},
+        "salario": {"nome": "Salário", "tipo": "fixa", "cor": "🔴"},
+        "manutencao": {"nome": "Manutenção", "tipo": "variavel", "cor": "🟠"},
+        "marketing": {"nome": "Marketing", "tipo": "variavel", "cor": "🟢"},
+        "outros": {"nome": "Outros", "tipo": "variavel", "cor": "⚪"}
+    },
+    "contas_receber": {
+        "venda": {"nome": "Venda", "tipo": "variavel", "cor": "🟢"},
+        "servico": {"nome": "Serviço", "tipo": "variavel", "cor": "🟢"},
+        "comissao": {"nome": "Comissão", "tipo": "variavel", "cor": "🟢"},
+        "aluguel_recebido": {"nome": "Aluguel Recebido", "tipo": "fixa", "cor": "🟢"},
+        "investimento": {"nome": "Investimento", "tipo": "variavel", "cor": "🟢"},
+        "outros_recebimentos": {"nome": "Outros Recebimentos", "tipo": "variavel", "cor": "🟢"}
+    }
+}
+
+# Chave de ordenação das listagens (vencimento mais próximo primeiro)
+_venc_key = itemgetter("data_vencimento")
+
+@lru_cache(maxsize=8192)
+def _parse_date(data_str: str) -> date:
+    """
+    Converte uma data YYYY-MM-DD em date, reaproveitando conversões anteriores
+    
+    Raises:
+        ValueError: Se a data for inválida
+    """
+    if len(data_str) == 10 and data_str[4] == "-" and data_str[7] == "-":
+        # Formato canônico: fromisoformat é bem mais rápido que strptime
+        return date.fromisoformat(data_str)
+    # Demais variantes aceitas por strptime (ex.: 2025-1-5)
+    return datetime.strptime(data_str, "%Y-%m-%d").date()
+
+
+def _ordinal(data_str: str) -> Optional[int]:
+    """Converte uma data YYYY-MM-DD no ordinal do dia (inteiro), ou None se a data for inválida"""
+    try:
+        return _parse_date(data_str).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=8192)
+def _validar(data_str: str) -> bool:
+    """Indica se a data está no formato YYYY-MM-DD; datas repetidas vêm do cache"""
+    try:
+        _parse_date(data_str)
+        return True
+    except ValueError:
+        return False
+
+
+@lru_cache(maxsize=16384)
+def _status_venc(data_str: str, hoje_ord: int) -> str:
+    """
+    Situação de vencimento de uma data em relação ao dia de hoje (ordinal)
+    
+    O ordinal de hoje faz parte da chave do cache, então os resultados
+    deixam de ser usados naturalmente na virada do dia.
+    """
+    try:
+        dias = _parse_date(data_str).toordinal() - hoje_ord
+    except ValueError:
+        return "data_invalida"
+    
+    if dias < 0:
+        return "atrasado"
+    elif dias == 0:
+        return "vencendo_hoje"
+    elif dias <= 7:
+        return "vencendo_em_breve"
+    else:
+        return "no_prazo"
+
+
+# Troca "," por "." e vice-versa em uma única passada (1,234.56 -> 1.234,56)
+_TRANS_MOEDA = str.maketrans({",": ".", ".": ","})
+
+
+@lru_cache(maxsize=4096)
+def _formatar_moeda(centavos: int) -> str:
+    """Formata um valor em centavos no padrão brasileiro (R$ 1.234,56); valores repetidos vêm do cache"""
+    reais, resto = divmod(abs(centavos), 100)
+    sinal = "-" if centavos < 0 else ""
+    return f"R$ {sinal}{reais:,}".translate(_TRANS_MOEDA) + f",{resto:02d}"
+
+
+def _centavos(valor: float) -> int:
+    """Converte um valor em reais para centavos inteiros (arredondado uma única vez)"""
+    return int(round(valor * 100))
+
+
+def _valor_valido(valor) -> bool:
+    """Indica se o valor de uma conta é um número positivo (texto e bool não são aceitos)"""
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool) and valor > 0
+
+
+def _textos_validos(*campos) -> bool:
+    """Indica se todos os campos são texto (dados importados podem trazer outros tipos)"""
+    return all(isinstance(campo, str) for campo in campos)
+
+
+# Data e hora do cadastro das contas (time.strftime resolvido uma única vez)
+_strftime = time.strftime
+_FORMATO_DATA_HORA = "%Y-%m-%d %H:%M:%S"
+
+# Nomes dos meses (índice 1-12), sem depender do locale do sistema
+_MES_PT = ["", "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+           "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
+
+# Linha das tabelas de transações do fluxo de caixa (ID, nome, descrição, valor, data)
+_LINHA_TABELA = "{:<8} {:<20} {:<25} {:<12} {:<12}".format
+
+# Campos de texto que se repetem entre contas (compartilhados via sys.intern)
+_CAMPOS_CONTA_REPETIDOS = ("categoria", "status", "status_vencimento", "usuario_cadastro",
+                           "usuario_pagamento", "usuario_recebimento", "fornecedor", "cliente")
+
+
+def _internar(conta: Dict) -> Dict:
+    """
+    Compartilha chaves e valores de texto repetidos de uma conta carregada
+    
+    Com sys.intern as categorias e status de todas as contas passam a ser a
+    mesma string, então as buscas por categoria nos dicionários de resumo
+    resolvem pela identidade, sem comparar o texto.
+    """
+    conta = {sys.intern(chave): valor for chave, valor in conta.items()}
+    for campo in _CAMPOS_CONTA_REPETIDOS:
+        valor = conta.get(campo)
+        if isinstance(valor, str):
+            conta[campo] = sys.intern(valor)
+    return conta
+
 
 class SistemaFinanceiro:
-    def __init__(self, arquivo_contas_pagar: str = "contas_pagar.json", 
-                 arquivo_contas_receber: str = "contas_receber.json",
+    def __init__(self, arquivo_contas_pagar: str = "contas_pagar.jsonl", 
+                 arquivo_contas_receber: str = "contas_receber.jsonl",
                  arquivo_categorias: str = "categorias_financeiras.json"):
         """
         Inicializa o sistema financeiro
         
         Args:
-            arquivo_contas_pagar: Arquivo para armazenar contas a pagar
-            arquivo_contas_receber: Arquivo para armazenar contas a receber
+            arquivo_contas_pagar: Arquivo para armazenar contas a pagar (JSON Lines)
+            arquivo_contas_receber: Arquivo para armazenar contas a receber (JSON Lines)
             arquivo_categorias: Arquivo para armazenar categorias
         """
         self.arquivo_contas_pagar = arquivo_contas_pagar
         self.arquivo_contas_receber = arquivo_contas_receber
         self.arquivo_categorias = arquivo_categorias
         
+        # Arquivos de contas abertos para acréscimo (caminho -> arquivo)
+        self._arquivos_log = {}
+        
+        # Valores derivados de cada conta, por ID (calculados no cadastro ou na carga e
+        # guardados fora dos registros, que são devolvidos tal como gravados): texto de
+        # busca em minúsculas, valor em centavos e ordinal do vencimento (None se inválido)
+        self._busca_conta: Dict[str, str] = {}
+        self._centavos_conta: Dict[str, int] = {}
+        self._venc_ord_conta: Dict[str, Optional[int]] = {}
+        
+        # Gravação adiada: reescritas completas pendentes e linhas acumuladas em lote
+        self._dirty_pagar = False
+        self._dirty_receber = False
+        self._em_lote = False
+        self._pendentes: Dict[str, List[bytes]] = {}
+        
+        # Versão dos dados (incrementada a cada alteração de conta) e fluxos/relatórios já calculados nela
+        self._versao_dados = 0
+        self._cache_fluxo: Dict[tuple, Dict] = {}
+        self._versao_cache_fluxo = 0
+        self._cache_relatorio: Dict[tuple, Dict] = {}
+        self._versao_cache_relatorio = 0
+        self._cache_alertas: Optional[tuple] = None  # ((versão, dia), alertas)
+        # Dia (ordinal) em que o status_vencimento das contas em aberto foi atualizado em memória
+        self._dia_status_vencimento: Optional[int] = None
+        atexit.register(self.fechar)
+        
         self.contas_pagar = self.carregar_contas_pagar()
         self.contas_receber = self.carregar_contas_receber()
         self.categorias = self.carregar_categorias()
         
+        # Índices ID -> conta, para localizar contas sem percorrer as listas
+        self._idx_pagar: Dict[str, Dict] = {conta["id"]: conta for conta in self.contas_pagar}
+        self._idx_receber: Dict[str, Dict] = {conta["id"]: conta for conta in self.contas_receber}
+        
+        # Contas em aberto ordenadas por vencimento: listas de (ordinal da data, ID)
+        self._abertos: Dict[str, List] = {"pagar": [], "receber": []}
+        for tipo, contas, status_quitado in (("pagar", self.contas_pagar, "pago"),
+                                             ("receber", self.contas_receber, "recebido")):
+            for conta in contas:
+                if conta.get("ativo", True) and conta["status"] != status_quitado:
+                    chave = self._chave_vencimento(conta)
+                    if chave is not None:
+                        self._abertos[tipo].append(chave)
+            self._abertos[tipo].sort()
+        
+        # Contas quitadas ordenadas pela data do pagamento/recebimento: listas de (ordinal, ID)
+        self._quitados: Dict[str, List] = {"pagar": [], "receber": []}
+        for tipo, contas, status_quitado in (("pagar", self.contas_pagar, "pago"),
+                                             ("receber", self.contas_receber, "recebido")):
+            for conta in contas:
+                if conta.get("ativo", True) and conta["status"] == status_quitado:
+                    chave = self._chave_quitacao(tipo, conta)
+                    if chave is not None:
+                        self._quitados[tipo].append(chave)
+            self._quitados[tipo].sort()
+        
+        # Contas ativas agrupadas por status e por categoria (ID -> conta), usadas nas listagens filtradas
+        self._por_status: Dict[str, Dict[str, Dict]] = {"pagar": {}, "receber": {}}
+        self._por_categoria: Dict[str, Dict[str, Dict]] = {"pagar": {}, "receber": {}}
+        for tipo, contas in (("pagar", self.contas_pagar), ("receber", self.contas_receber)):
+            for conta in contas:
+                if conta.get("ativo", True):
+                    self._indexar_filtros(tipo, conta)
+        
+        # Próximos números de ID, calculados uma vez a partir dos maiores IDs existentes
+        self._next_pagar = self._proximo_numero(self.contas_pagar, "CP")
+        self._next_receber = self._proximo_numero(self.contas_receber, "CR")
+        
         # Inicializa categorias padrão se não existirem
         if not self.categorias:
             self.inicializar_categorias_padrao()
     
-    def carregar_contas_pagar(self) -> List:
-        """Carrega contas a pagar do arquivo JSON"""
-        if os.path.exists(self.arquivo_contas_pagar):
+    def _carregar_log_contas(self, caminho: str) -> List:
+        """
+        Reconstrói a lista de contas a partir de um arquivo JSON Lines
+        
+        Cada linha guarda a versão completa de uma conta; quando o mesmo ID
+        aparece mais de uma vez (pagamento, exclusão...), vale a última linha.
+        Se o arquivo ainda não existir mas houver o .json no formato antigo
+        (lista JSON), ele é convertido automaticamente.
+        
+        Args:
+            caminho: Arquivo JSON Lines das contas
+            
+        Returns:
+            Lista de contas na ordem de cadastro
+        """
+        if os.path.exists(caminho):
+            contas = {}
             try:
-                with open(self.arquivo_contas_pagar, 'r', encoding='utf-8') as arquivo:
-                    return json.load(arquivo)
-            except (json.JSONDecodeError, FileNotFoundError):
+                # Linhas incompletas de uma gravação interrompida são ignoradas
+                for conta in iterar_jsonl(caminho):
+                    contas[conta["id"]] = _internar(conta)
+            except FileNotFoundError:
                 return []
-        return []
-    
-    def carregar_contas_receber(self) -> List:
-        """Carrega contas a receber do arquivo JSON"""
-        if os.path.exists(self.arquivo_contas_receber):
+            return list(contas.values())
+        
+        arquivo_legado = os.path.splitext(caminho)[0] + ".json"
+        if arquivo_legado != caminho and os.path.exists(arquivo_legado):
             try:
-                with open(self.arquivo_contas_receber, 'r', encoding='utf-8') as arquivo:
-                    return json.load(arquivo)
-            except (json.JSONDecodeError, FileNotFoundError):
+                contas = ler_json(arquivo_legado)
+            except (ValueError, FileNotFoundError):
                 return []
+            self._reescrever_log_contas(caminho, contas)
+            return [_internar(conta) for conta in contas]
         return []
     
+    def carregar_contas_pagar(self) -> List:
+        """Carrega contas a pagar do arquivo JSON Lines"""
+        contas = self._carregar_log_contas(self.arquivo_contas_pagar)
+        for conta in contas:
+            self._derivar(conta, conta["descricao"], conta["fornecedor"])
+        return contas
+    
+    def carregar_contas_receber(self) -> List:
+        """Carrega contas a receber do arquivo JSON Lines"""
+        contas = self._carregar_log_contas(self.arquivo_contas_receber)
+        for conta in contas:
+            self._derivar(conta, conta["cliente"], conta["descricao"])
+        return contas
+    
+    def _derivar(self, conta: Dict, *campos_busca: str):
+        """
+        Calcula os valores derivados de uma conta (ver __init__)
+        
+        Args:
+            conta: Conta cadastrada ou carregada
+            campos_busca: Campos de texto pesquisados pela busca, além do ID
+        """
+        conta_id = conta["id"]
+        self._busca_conta[conta_id] = self._texto_busca(conta_id, *campos_busca)
+        self._centavos_conta[conta_id] = _centavos(conta["valor"])
+        self._venc_ord_conta[conta_id] = _ordinal(conta["data_vencimento"])
+    
+    @staticmethod
+    def _texto_busca(*campos: str) -> str:
+        """Monta o texto em minúsculas usado pela busca de contas"""
+        return "\x1f".join(campos).lower()
+    
     def carregar_categorias(self) -> Dict:
         """Carrega categorias do arquivo JSON"""
         if os.path.exists(self.arquivo_categorias):
             try:
-                with open(self.arquivo_categorias, 'r', encoding='utf-8') as arquivo:
-                    return json.load(arquivo)
-            except (json.JSONDecodeError, FileNotFoundError):
+                return ler_json(self.arquivo_categorias)
+            except (ValueError, FileNotFoundError):
                 return {}
         return {}
     
-    def salvar_contas_pagar(self):
-        """Salva contas a pagar no arquivo JSON"""
-        with open(self.arquivo_contas_pagar, 'w', encoding='utf-8') as arquivo:
-            json.dump(self.contas_pagar, arquivo, indent=4, ensure_ascii=False)
+    def _anexar_conta(self, caminho: str, conta: Dict):
+        """
+        Acrescenta a versão atual de uma conta ao final do arquivo, sem reescrevê-lo
+        
+        Args:
+            caminho: Arquivo JSON Lines das contas
+            conta: Conta cadastrada ou alterada
+        """
+        # Toda alteração de conta passa por aqui: invalida os fluxos de caixa em cache
+        self._versao_dados += 1
+        linha = dumps_linha(conta)
+        if self._em_lote:
+            self._pendentes.setdefault(caminho, []).append(linha)
+            return
+        self._gravar_linhas(caminho, [linha])
+    
+    def _gravar_linhas(self, caminho: str, linhas: List[bytes]):
+        """Grava linhas no final do arquivo de contas com uma única sincronização (fsync)"""
+        arquivo = self._arquivos_log.get(caminho)
+        if arquivo is None:
+            arquivo = self._arquivos_log[caminho] = open(caminho, 'ab', buffering=1 << 16)
+        arquivo.write(b"".join(linhas))
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
     
-    def salvar_contas_receber(self):
-        """Salva contas a receber no arquivo JSON"""
-        with open(self.arquivo_contas_receber, 'w', encoding='utf-8') as arquivo:
-            json.dump(self.contas_receber, arquivo, indent=4, ensure_ascii=False)
+    def _reescrever_log_contas(self, caminho: str, contas: List):
+        """
+        Reescreve o arquivo de contas com uma linha por conta (compactação)
+        
+        A gravação é feita em um arquivo temporário que depois substitui o
+        original com os.replace, então uma interrupção não corrompe os dados.
+        
+        Args:
+            caminho: Arquivo JSON Lines das contas
+            contas: Lista completa de contas
+        """
+        arquivo = self._arquivos_log.pop(caminho, None)
+        if arquivo is not None:
+            arquivo.close()
+        
+        dados = b"".join(dumps_linha(conta) for conta in contas)
+        escrever_atomico(caminho, dados, sincronizar=True)
+    
+    def salvar_contas_pagar(self, flush_now: bool = False):
+        """
+        Marca o arquivo de contas a pagar para ser reescrito (compactado)
+        
+        A reescrita acontece em flush() (chamado ao sair do programa), a
+        menos que flush_now seja True.
+        """
+        self._dirty_pagar = True
+        if flush_now:
+            self.flush()
+    
+    def salvar_contas_receber(self, flush_now: bool = False):
+        """
+        Marca o arquivo de contas a receber para ser reescrito (compactado)
+        
+        A reescrita acontece em flush() (chamado ao sair do programa), a
+        menos que flush_now seja True.
+        """
+        self._dirty_receber = True
+        if flush_now:
+            self.flush()
+    
+    def flush(self):
+        """Grava o que estiver pendente: reescritas marcadas e linhas acumuladas em lote"""
+        for caminho, contas, dirty in ((self.arquivo_contas_pagar, self.contas_pagar, self._dirty_pagar),
+                                       (self.arquivo_contas_receber, self.contas_receber, self._dirty_receber)):
+            linhas = self._pendentes.pop(caminho, None)
+            if dirty:
+                # A reescrita já contém a versão atual de todas as contas
+                self._reescrever_log_contas(caminho, contas)
+            elif linhas:
+                self._gravar_linhas(caminho, linhas)
+        self._dirty_pagar = False
+        self._dirty_receber = False
+    
+    def fechar(self):
+        """
+        Grava o que estiver pendente e fecha os arquivos de contas abertos
+        
+        Chamado automaticamente ao sair do programa. O sistema continua
+        utilizável depois: os arquivos são reabertos na próxima gravação.
+        """
+        self.flush()
+        for arquivo in self._arquivos_log.values():
+            arquivo.close()
+        self._arquivos_log.clear()
+    
+    @contextmanager
+    def batch(self):
+        """
+        Agrupa várias operações e grava tudo uma única vez ao final do bloco
+        
+        Exemplo:
+            with financeiro.batch():
+                for item in itens:
+                    financeiro.cadastrar_conta_pagar(...)
+        """
+        anterior = self._em_lote
+        self._em_lote = True
+        try:
+            yield self
+        finally:
+            self._em_lote = anterior
+            if not anterior:
+                self.flush()
+    
+    def compactar(self):
+        """Compacta os arquivos de contas, mantendo apenas a versão atual de cada conta"""
+        self._dirty_pagar = True
+        self._dirty_receber = True
+        self.flush()
     
     def salvar_categorias(self):
-        """Salva categorias no arquivo JSON"""
-        with open(self.arquivo_categorias, 'w', encoding='utf-8') as arquivo:
-            json.dump(self.categorias, arquivo, indent=4, ensure_ascii=False)
+        """Salva categorias no arquivo JSON (substituição atômica, com fsync)"""
+        gravar_json(self.arquivo_categorias, self.categorias, sincronizar=True)
     
     def inicializar_categorias_padrao(self):
         """Inicializa categorias padrão do sistema"""
-        self.categorias = {
-            "contas_pagar": {
-                "aluguel": {"nome": "Aluguel", "tipo": "fixa", "cor": "🔴"},
-                "internet": {"nome": "Internet", "tipo": "fixa", "cor": "🔴"},
-                "energia": {"nome": "Energia Elétrica", "tipo": "variavel", "cor": "🟡"},
-                "agua": {"nome": "Água", "tipo": "variavel", "cor": "🟡"},
-                "fornecedor": {"nome": "Fornecedor", "tipo": "variavel", "cor": "🟠"},
-                "imposto": {"nome": "Imposto", "tipo": "fixa", "cor": "🔴"},
-                "salario": {"nome": "Salário", "tipo": "fixa", "cor": "🔴"},
-                "manutencao": {"nome": "Manutenção", "tipo": "variavel", "cor": "🟠"},
-                "marketing": {"nome": "Marketing", "tipo": "variavel", "cor": "🟢"},
-                "outros": {"nome": "Outros", "tipo": "variavel", "cor": "⚪"}
-            },
-            "contas_receber": {
-                "venda": {"nome": "Venda", "tipo": "variavel", "cor": "🟢"},
-                "servico": {"nome": "Serviço", "tipo": "variavel", "cor": "🟢"},
-                "comissao": {"nome": "Comissão", "tipo": "variavel", "cor": "🟢"},
-                "aluguel_recebido": {"nome": "Aluguel Recebido", "tipo": "fixa", "cor": "🟢"},
-                "investimento": {"nome": "Investimento", "tipo": "variavel", "cor": "🟢"},
-                "outros_recebimentos": {"nome": "Outros Recebimentos", "tipo": "variavel", "cor": "🟢"}
-            }
-        }
+        self.categorias = copy.deepcopy(_DEFAULT_CATEGORIAS)
         self.salvar_categorias()
     
-    def gerar_id_conta(self, tipo: str) -> str:
-        """Gera um ID único para conta"""
-        if tipo == "pagar":
-            prefixo = "CP"
-            contas = self.contas_pagar
-        else:
-            prefixo = "CR"
-            contas = self.contas_receber
+    def _chave_vencimento(self, conta: Dict):
+        """Chave (ordinal do vencimento, ID) usada no índice de contas em aberto, ou None se a data for inválida"""
+        ordinal = self._venc_ord_conta[conta["id"]]
+        if ordinal is None:
+            return None
+        return (ordinal, conta["id"])
+    
+    def _abrir_no_indice(self, tipo: str, conta: Dict):
+        """Inclui uma conta no índice de contas em aberto"""
+        chave = self._chave_vencimento(conta)
+        if chave is not None:
+            bisect.insort(self._abertos[tipo], chave)
+    
+    def _fechar_no_indice(self, tipo: str, conta: Dict):
+        """Retira uma conta (paga, recebida ou excluída) do índice de contas em aberto"""
+        chave = self._chave_vencimento(conta)
+        abertos = self._abertos[tipo]
+        if chave is not None:
+            posicao = bisect.bisect_left(abertos, chave)
+            if posicao < len(abertos) and abertos[posicao] == chave:
+                del abertos[posicao]
+    
+    @staticmethod
+    def _chave_quitacao(tipo: str, conta: Dict):
+        """Chave (ordinal do pagamento/recebimento, ID) do índice de contas quitadas, ou None se a data for inválida"""
+        campo = "data_pagamento" if tipo == "pagar" else "data_recebimento"
+        ordinal = _ordinal(conta.get(campo))
+        if ordinal is None:
+            return None
+        return (ordinal, conta["id"])
+    
+    def _registrar_quitacao(self, tipo: str, conta: Dict):
+        """Inclui uma conta paga/recebida no índice de contas quitadas"""
+        chave = self._chave_quitacao(tipo, conta)
+        if chave is not None:
+            bisect.insort(self._quitados[tipo], chave)
+    
+    def _remover_quitacao(self, tipo: str, conta: Dict):
+        """Retira uma conta excluída do índice de contas quitadas"""
+        chave = self._chave_quitacao(tipo, conta)
+        quitados = self._quitados[tipo]
+        if chave is not None:
+            posicao = bisect.bisect_left(quitados, chave)
+            if posicao < len(quitados) and quitados[posicao] == chave:
+                del quitados[posicao]
+    
+    def _quitadas_no_periodo(self, tipo: str, inicio_ord: int, fim_ord: int) -> List[Dict]:
+        """
+        Contas pagas/recebidas entre duas datas (ordinais, inclusive)
         
-        if not contas:
-            return f"{prefixo}001"
+        Usa busca binária no índice de contas quitadas, então só as contas do
+        período são visitadas. A lista vem ordenada pela data de quitação.
+        """
+        quitados = self._quitados[tipo]
+        # Nenhuma conta quitada, ou período todo fora do intervalo de datas do índice
+        if not quitados or fim_ord < quitados[0][0] or inicio_ord > quitados[-1][0]:
+            return []
+        
+        indice = self._idx_pagar if tipo == "pagar" else self._idx_receber
+        inicio = bisect.bisect_left(quitados, (inicio_ord,))
+        fim = bisect.bisect_left(quitados, (fim_ord + 1,))
+        return [indice[conta_id] for _, conta_id in quitados[inicio:fim]]
+    
+    def _somar_por_categoria(self, contas: List[Dict]):
+        """
+        Soma os valores (em centavos) de uma lista de contas, no total e por categoria
+        
+        Returns:
+            Tupla (total em centavos, dicionário categoria -> centavos)
+        """
+        total = 0
+        por_categoria = {}
+        obter = por_categoria.get
+        centavos_conta = self._centavos_conta
+        for conta in contas:
+            centavos = centavos_conta[conta["id"]]
+            total += centavos
+            categoria = conta.get("categoria", "Sem categoria")
+            por_categoria[categoria] = obter(categoria, 0) + centavos
+        return total, por_categoria
+    
+    def _indexar_filtros(self, tipo: str, conta: Dict):
+        """Inclui uma conta ativa nos índices por status e por categoria"""
+        conta_id = conta["id"]
+        self._por_status[tipo].setdefault(conta["status"], {})[conta_id] = conta
+        self._por_categoria[tipo].setdefault(conta["categoria"], {})[conta_id] = conta
+    
+    def _desindexar_filtros(self, tipo: str, conta: Dict):
+        """Retira uma conta dos índices por status e por categoria"""
+        conta_id = conta["id"]
+        self._por_status[tipo].get(conta["status"], {}).pop(conta_id, None)
+        self._por_categoria[tipo].get(conta["categoria"], {}).pop(conta_id, None)
+    
+    def _filtrar_contas(self, tipo: str, status: str = None, categoria: str = None) -> List[Dict]:
+        """
+        Seleciona as contas ativas pelos filtros usando os índices
         
-        # Encontra o maior número existente
+        Parte do menor grupo entre status e categoria e só confere o outro
+        filtro nas contas desse grupo, em vez de percorrer todas as contas.
+        """
+        if status and categoria:
+            por_status = self._por_status[tipo].get(status, {})
+            por_categoria = self._por_categoria[tipo].get(categoria, {})
+            if len(por_status) <= len(por_categoria):
+                return [conta for conta in por_status.values() if conta["categoria"] == categoria]
+            return [conta for conta in por_categoria.values() if conta["status"] == status]
+        if status:
+            return list(self._por_status[tipo].get(status, {}).values())
+        if categoria:
+            return list(self._por_categoria[tipo].get(categoria, {}).values())
+        contas = self.contas_pagar if tipo == "pagar" else self.contas_receber
+        return [conta for conta in contas if conta.get("ativo", True)]
+    
+    @staticmethod
+    def _proximo_numero(contas: List, prefixo: str) -> int:
+        """Calcula o próximo número de ID a partir do maior ID existente com o prefixo"""
         numeros = []
         for conta in contas:
             if conta["id"].startswith(prefixo):
                 try:
-                    numero = int(conta["id"][2:])
-                    numeros.append(numero)
+                    numeros.append(int(conta["id"][2:]))
                 except ValueError:
                     continue
+        return max(numeros, default=0) + 1
+    
+    def gerar_id_conta(self, tipo: str) -> str:
+        """Gera um ID único para conta"""
+        if tipo == "pagar":
+            numero = self._next_pagar
+            self._next_pagar += 1
+            return f"CP{numero:03d}"
         
-        if numeros:
-            proximo_numero = max(numeros) + 1
-        else:
-            proximo_numero = 1
-        
-        return f"{prefixo}{proximo_numero:03d}"
+        numero = self._next_receber
+        self._next_receber += 1
+        return f"CR{numero:03d}"
     
     def validar_data(self, data_str: str) -> bool:
         """Valida formato de data (YYYY-MM-DD)"""
-        try:
-            datetime.strptime(data_str, "%Y-%m-%d")
-            return True
-        except ValueError:
-            return False
+        return _validar(data_str)
     
-    def calcular_status_vencimento(self, data_vencimento: str) -> str:
-        """Calcula status baseado na data de vencimento"""
+    def calcular_status_vencimento(self, data_vencimento: str, hoje: Optional[date] = None) -> str:
+        """
+        Calcula status baseado na data de vencimento
+        
+        Args:
+            data_vencimento: Data de vencimento (YYYY-MM-DD)
+            hoje: Data atual já calculada (evita consultar o relógio em laços)
+        """
         try:
-            data_venc = datetime.strptime(data_vencimento, "%Y-%m-%d")
-            data_atual = datetime.now().date()
-            
-            if data_venc.date() < data_atual:
-                return "atrasado"
-            elif data_venc.date() == data_atual:
-                return "vencendo_hoje"
-            elif (data_venc.date() - data_atual).days <= 7:
-                return "vencendo_em_breve"
-            else:
-                return "no_prazo"
-        except:
+            if hoje is None:
+                hoje = date.today()
+            return _status_venc(data_vencimento, hoje.toordinal())
+        except (TypeError, ValueError):
             return "data_invalida"
     
-    def formatar_valor(self, valor: float) -> str:
+    @staticmethod
+    def formatar_valor(valor: float) -> str:
         """Formata valor para exibição"""
-        return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        # A chave do cache são os centavos inteiros (arredondados em decimal, como antes):
+        # valores iguais em centavos caem na mesma entrada e -0.0 não vira "R$ -0,00"
+        return _formatar_moeda(round(round(valor, 2) * 100))
+    
+    def _montar_conta_pagar(self, descricao: str, categoria: str, valor: float, data_vencimento: str,
+                            fornecedor: str, observacoes: str, usuario: str, agora: str,
+                            hoje: Optional[date] = None) -> Dict:
+        """
+        Cria uma conta a pagar já validada, inclui nos índices e anexa ao arquivo
+        
+        Usado pelo cadastro individual e pelo cadastro em lote.
+        
+        Args:
+            agora: Data e hora do cadastro já formatadas
+            hoje: Data atual já calculada (evita consultar o relógio em laços)
+            
+        Returns:
+            A conta criada
+        """
+        conta_id = self.gerar_id_conta("pagar")
+        conta = {
+            "id": conta_id,
+            "descricao": descricao,
+            "categoria": sys.intern(categoria),
+            "valor": valor,
+            "data_vencimento": data_vencimento,
+            "status": "pendente",
+            "status_vencimento": self.calcular_status_vencimento(data_vencimento, hoje),
+            "fornecedor": fornecedor,
+            "observacoes": observacoes,
+            "data_cadastro": agora,
+            "usuario_cadastro": usuario,
+            "data_pagamento": None,
+            "usuario_pagamento": None,
+            "ativo": True
+        }
+        self._derivar(conta, descricao, fornecedor)
+        
+        self.contas_pagar.append(conta)
+        self._idx_pagar[conta_id] = conta
+        self._abrir_no_indice("pagar", conta)
+        self._indexar_filtros("pagar", conta)
+        self._anexar_conta(self.arquivo_contas_pagar, conta)
+        return conta
+    
+    def _montar_conta_receber(self, cliente: str, descricao: str, categoria: str, valor: float,
+                              data_vencimento: str, observacoes: str, usuario: str, agora: str,
+                              hoje: Optional[date] = None) -> Dict:
+        """
+        Cria uma conta a receber já validada, inclui nos índices e anexa ao arquivo
+        
+        Usado pelo cadastro individual e pelo cadastro em lote.
+        
+        Args:
+            agora: Data e hora do cadastro já formatadas
+            hoje: Data atual já calculada (evita consultar o relógio em laços)
+            
+        Returns:
+            A conta criada
+        """
+        conta_id = self.gerar_id_conta("receber")
+        conta = {
+            "id": conta_id,
+            "cliente": cliente,
+            "descricao": descricao,
+            "categoria": sys.intern(categoria),
+            "valor": valor,
+            "data_vencimento": data_vencimento,
+            "status": "pendente",
+            "status_vencimento": self.calcular_status_vencimento(data_vencimento, hoje),
+            "observacoes": observacoes,
+            "data_cadastro": agora,
+            "usuario_cadastro": usuario,
+            "data_recebimento": None,
+            "usuario_recebimento": None,
+            "ativo": True
+        }
+        self._derivar(conta, cliente, descricao)
+        
+        self.contas_receber.append(conta)
+        self._idx_receber[conta_id] = conta
+        self._abrir_no_indice("receber", conta)
+        self._indexar_filtros("receber", conta)
+        self._anexar_conta(self.arquivo_contas_receber, conta)
+        return conta
     
     def cadastrar_conta_pagar(self, descricao: str, categoria: str, valor: float, 
                             data_vencimento: str, fornecedor: str = "", 
@@ -176,7 +706,8 @@ class SistemaFinanceiro:
         Returns:
             ID da conta criada ou None se erro
         """
-        if not descricao or not categoria or valor <= 0:
+        if (not descricao or not categoria or not _valor_valido(valor)
+                or not _textos_validos(descricao, categoria, fornecedor, observacoes)):
             print("❌ Erro: Dados da conta inválidos!")
             return None
         
@@ -184,40 +715,20 @@ class SistemaFinanceiro:
             print("❌ Erro: Categoria inválida!")
             return None
         
-        if not self.validar_data(data_vencimento):
+        if not isinstance(data_vencimento, str) or not self.validar_data(data_vencimento):
             print("❌ Erro: Data de vencimento inválida! Use formato YYYY-MM-DD")
             return None
         
-        conta_id = self.gerar_id_conta("pagar")
-        status_vencimento = self.calcular_status_vencimento(data_vencimento)
-        
-        conta = {
-            "id": conta_id,
-            "descricao": descricao,
-            "categoria": categoria,
-            "valor": valor,
-            "data_vencimento": data_vencimento,
-            "status": "pendente",
-            "status_vencimento": status_vencimento,
-            "fornecedor": fornecedor,
-            "observacoes": observacoes,
-            "data_cadastro": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "usuario_cadastro": usuario,
-            "data_pagamento": None,
-            "usuario_pagamento": None,
-            "ativo": True
-        }
-        
-        self.contas_pagar.append(conta)
-        self.salvar_contas_pagar()
+        conta = self._montar_conta_pagar(descricao, categoria, valor, data_vencimento, fornecedor,
+                                         observacoes, usuario, _strftime(_FORMATO_DATA_HORA))
         
         categoria_info = self.categorias["contas_pagar"][categoria]
-        print(f"✅ Conta a pagar {conta_id} cadastrada!")
+        print(f"✅ Conta a pagar {conta['id']} cadastrada!")
         print(f"📝 {descricao} - {categoria_info['nome']}")
         print(f"💰 Valor: {self.formatar_valor(valor)}")
         print(f"📅 Vencimento: {data_vencimento}")
         
-        return conta_id
+        return conta["id"]
     
     def cadastrar_conta_receber(self, cliente: str, descricao: str, categoria: str, 
                               valor: float, data_vencimento: str, 
@@ -237,7 +748,8 @@ class SistemaFinanceiro:
         Returns:
             ID da conta criada ou None se erro
         """
-        if not cliente or not descricao or not categoria or valor <= 0:
+        if (not cliente or not descricao or not categoria or not _valor_valido(valor)
+                or not _textos_validos(cliente, descricao, categoria, observacoes)):
             print("❌ Erro: Dados da conta inválidos!")
             return None
         
@@ -245,107 +757,189 @@ class SistemaFinanceiro:
             print("❌ Erro: Categoria inválida!")
             return None
         
-        if not self.validar_data(data_vencimento):
+        if not isinstance(data_vencimento, str) or not self.validar_data(data_vencimento):
             print("❌ Erro: Data de vencimento inválida! Use formato YYYY-MM-DD")
             return None
         
-        conta_id = self.gerar_id_conta("receber")
-        status_vencimento = self.calcular_status_vencimento(data_vencimento)
-        
-        conta = {
-            "id": conta_id,
-            "cliente": cliente,
-            "descricao": descricao,
-            "categoria": categoria,
-            "valor": valor,
-            "data_vencimento": data_vencimento,
-            "status": "pendente",
-            "status_vencimento": status_vencimento,
-            "observacoes": observacoes,
-            "data_cadastro": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "usuario_cadastro": usuario,
-            "data_recebimento": None,
-            "usuario_recebimento": None,
-            "ativo": True
-        }
-        
-        self.contas_receber.append(conta)
-        self.salvar_contas_receber()
+        conta = self._montar_conta_receber(cliente, descricao, categoria, valor, data_vencimento,
+                                           observacoes, usuario, _strftime(_FORMATO_DATA_HORA))
         
         categoria_info = self.categorias["contas_receber"][categoria]
-        print(f"✅ Conta a receber {conta_id} cadastrada!")
+        print(f"✅ Conta a receber {conta['id']} cadastrada!")
         print(f"👤 Cliente: {cliente}")
         print(f"📝 {descricao} - {categoria_info['nome']}")
         print(f"💰 Valor: {self.formatar_valor(valor)}")
         print(f"📅 Vencimento: {data_vencimento}")
         
-        return conta_id
+        return conta["id"]
     
-    def listar_contas_pagar(self, status: str = None, categoria: str = None) -> List[Dict]:
+    def cadastrar_contas_pagar_batch(self, itens: List[Dict], usuario: str = "sistema") -> List[str]:
+        """
+        Cadastra várias contas a pagar de uma vez (ex.: importação)
+        
+        Faz as mesmas validações de cadastrar_conta_pagar, mas grava o arquivo
+        uma única vez e mostra apenas um resumo no final. Itens com dados
+        inválidos (inclusive de tipo errado) são contados e ignorados.
+        
+        Args:
+            itens: Dicionários com descricao, categoria, valor, data_vencimento
+                   e, opcionalmente, fornecedor e observacoes
+            usuario: Usuário que está cadastrando
+            
+        Returns:
+            Lista com os IDs das contas criadas
+        """
+        categorias = self.categorias["contas_pagar"]
+        validar = self.validar_data
+        montar = self._montar_conta_pagar
+        agora = _strftime(_FORMATO_DATA_HORA)
+        hoje = datetime.now().date()
+        
+        ids = []
+        erros = 0
+        with self.batch():
+            for item in itens:
+                if not isinstance(item, dict):
+                    erros += 1
+                    continue
+                descricao = item.get("descricao")
+                categoria = item.get("categoria")
+                valor = item.get("valor", 0)
+                data_vencimento = item.get("data_vencimento", "")
+                fornecedor = item.get("fornecedor", "")
+                observacoes = item.get("observacoes", "")
+                if (not descricao or not _textos_validos(descricao, categoria, data_vencimento, fornecedor, observacoes)
+                        or categoria not in categorias or not _valor_valido(valor) or not validar(data_vencimento)):
+                    erros += 1
+                    continue
+                
+                conta = montar(descricao, categoria, valor, data_vencimento, fornecedor, observacoes,
+                               usuario, agora, hoje)
+                ids.append(conta["id"])
+        
+        print(f"✅ {len(ids)} contas a pagar cadastradas!")
+        if erros:
+            print(f"❌ {erros} contas ignoradas por dados inválidos")
+        return ids
+    
+    def cadastrar_contas_receber_batch(self, itens: List[Dict], usuario: str = "sistema") -> List[str]:
+        """
+        Cadastra várias contas a receber de uma vez (ex.: importação)
+        
+        Faz as mesmas validações de cadastrar_conta_receber, mas grava o
+        arquivo uma única vez e mostra apenas um resumo no final. Itens com
+        dados inválidos (inclusive de tipo errado) são contados e ignorados.
+        
+        Args:
+            itens: Dicionários com cliente, descricao, categoria, valor,
+                   data_vencimento e, opcionalmente, observacoes
+            usuario: Usuário que está cadastrando
+            
+        Returns:
+            Lista com os IDs das contas criadas
+        """
+        categorias = self.categorias["contas_receber"]
+        validar = self.validar_data
+        montar = self._montar_conta_receber
+        agora = _strftime(_FORMATO_DATA_HORA)
+        hoje = datetime.now().date()
+        
+        ids = []
+        erros = 0
+        with self.batch():
+            for item in itens:
+                if not isinstance(item, dict):
+                    erros += 1
+                    continue
+                cliente = item.get("cliente")
+                descricao = item.get("descricao")
+                categoria = item.get("categoria")
+                valor = item.get("valor", 0)
+                data_vencimento = item.get("data_vencimento", "")
+                observacoes = item.get("observacoes", "")
+                if (not cliente or not descricao
+                        or not _textos_validos(cliente, descricao, categoria, data_vencimento, observacoes)
+                        or categoria not in categorias or not _valor_valido(valor) or not validar(data_vencimento)):
+                    erros += 1
+                    continue
+                
+                conta = montar(cliente, descricao, categoria, valor, data_vencimento, observacoes,
+                               usuario, agora, hoje)
+                ids.append(conta["id"])
+        
+        print(f"✅ {len(ids)} contas a receber cadastradas!")
+        if erros:
+            print(f"❌ {erros} contas ignoradas por dados inválidos")
+        return ids
+    
+    def listar_contas_pagar(self, status: str = None, categoria: str = None, 
+                            limit: Optional[int] = None) -> List[Dict]:
         """
         Lista contas a pagar com filtros
         
         Args:
             status: Filtro por status (pendente, pago, atrasado)
             categoria: Filtro por categoria
+            limit: Se informado, retorna apenas as primeiras contas (por vencimento)
             
         Returns:
             Lista de contas a pagar
         """
-        contas_filtradas = []
-        
-        for conta in self.contas_pagar:
-            if not conta.get("ativo", True):
-                continue
-            
-            # Atualiza status de vencimento
-            conta["status_vencimento"] = self.calcular_status_vencimento(conta["data_vencimento"])
-            
-            # Aplica filtros
-            if status and conta["status"] != status:
-                continue
-            if categoria and conta["categoria"] != categoria:
-                continue
-            
-            contas_filtradas.append(conta)
-        
-        # Salva alterações
-        self.salvar_contas_pagar()
+        self._atualizar_status_vencimento()
+        contas_filtradas = self._filtrar_contas("pagar", status, categoria)
         
-        return sorted(contas_filtradas, key=lambda x: x["data_vencimento"])
+        if limit:
+            return heapq.nsmallest(limit, contas_filtradas, key=_venc_key)
+        return sorted(contas_filtradas, key=_venc_key)
     
-    def listar_contas_receber(self, status: str = None, categoria: str = None) -> List[Dict]:
+    def listar_contas_receber(self, status: str = None, categoria: str = None, 
+                            limit: Optional[int] = None) -> List[Dict]:
         """
         Lista contas a receber com filtros
         
         Args:
             status: Filtro por status (pendente, recebido, atrasado)
             categoria: Filtro por categoria
+            limit: Se informado, retorna apenas as primeiras contas (por vencimento)
             
         Returns:
             Lista de contas a receber
         """
-        contas_filtradas = []
+        self._atualizar_status_vencimento()
+        contas_filtradas = self._filtrar_contas("receber", status, categoria)
         
-        for conta in self.contas_receber:
-            if not conta.get("ativo", True):
-                continue
-            
-            # Atualiza status de vencimento
-            conta["status_vencimento"] = self.calcular_status_vencimento(conta["data_vencimento"])
-            
-            # Aplica filtros
-            if status and conta["status"] != status:
-                continue
-            if categoria and conta["categoria"] != categoria:
-                continue
-            
-            contas_filtradas.append(conta)
+        if limit:
+            return heapq.nsmallest(limit, contas_filtradas, key=_venc_key)
+        return sorted(contas_filtradas, key=_venc_key)
+    
+    def _atualizar_status_vencimento(self):
+        """
+        Atualiza em memória o status_vencimento das contas em aberto, uma vez por dia
         
-        # Salva alterações
-        self.salvar_contas_receber()
+        Chamado pelas consultas que devolvem contas, para que o campo corresponda
+        à data de hoje; não marca os arquivos para reescrita (o valor gravado é
+        atualizado quando a conta for gravada de novo).
+        """
+        hoje = datetime.now().date()
+        if self._dia_status_vencimento == hoje.toordinal():
+            return
+        for contas, status_quitado in ((self.contas_pagar, "pago"), (self.contas_receber, "recebido")):
+            for conta in contas:
+                if conta["status"] != status_quitado:
+                    conta["status_vencimento"] = self.calcular_status_vencimento(conta["data_vencimento"], hoje)
+        self._dia_status_vencimento = hoje.toordinal()
+    
+    def recomputar_status_vencimentos(self):
+        """
+        Atualiza o status_vencimento gravado de todas as contas em aberto
         
-        return sorted(contas_filtradas, key=lambda x: x["data_vencimento"])
+        As consultas já atualizam o campo em memória; este método também
+        marca os arquivos para reescrita, gravando o valor atual.
+        """
+        self._dia_status_vencimento = None
+        self._atualizar_status_vencimento()
+        self.salvar_contas_pagar()
+        self.salvar_contas_receber()
     
     def buscar_conta_pagar(self, termo: str) -> List[Dict]:
         """
@@ -357,19 +951,11 @@ class SistemaFinanceiro:
         Returns:
             Lista de contas encontradas
         """
-        resultados = []
+        self._atualizar_status_vencimento()
         termo_lower = termo.lower()
-        
-        for conta in self.contas_pagar:
-            if not conta.get("ativo", True):
-                continue
-            
-            if (termo_lower in conta["id"].lower() or 
-                termo_lower in conta["descricao"].lower() or 
-                termo_lower in conta["fornecedor"].lower()):
-                resultados.append(conta)
-        
-        return resultados
+        busca = self._busca_conta
+        return [conta for conta in self.contas_pagar
+                if conta.get("ativo", True) and termo_lower in busca[conta["id"]]]
     
     def buscar_conta_receber(self, termo: str) -> List[Dict]:
         """
@@ -381,19 +967,11 @@ class SistemaFinanceiro:
         Returns:
             Lista de contas encontradas
         """
-        resultados = []
+        self._atualizar_status_vencimento()
         termo_lower = termo.lower()
-        
-        for conta in self.contas_receber:
-            if not conta.get("ativo", True):
-                continue
-            
-            if (termo_lower in conta["id"].lower() or 
-                termo_lower in conta["cliente"].lower() or 
-                termo_lower in conta["descricao"].lower()):
-                resultados.append(conta)
-        
-        return resultados
+        busca = self._busca_conta
+        return [conta for conta in self.contas_receber
+                if conta.get("ativo", True) and termo_lower in busca[conta["id"]]]
     
     def registrar_pagamento(self, conta_id: str, data_pagamento: str = None, 
                           usuario: str = "sistema") -> bool:
@@ -408,35 +986,39 @@ class SistemaFinanceiro:
         Returns:
             True se sucesso, False se erro
         """
-        for conta in self.contas_pagar:
-            if conta["id"] == conta_id and conta.get("ativo", True):
-                if conta["status"] == "pago":
-                    print("❌ Erro: Conta já foi paga!")
-                    return False
-                
-                if not data_pagamento:
-                    data_pagamento = time.strftime("%Y-%m-%d")
-                
-                if not self.validar_data(data_pagamento):
-                    print("❌ Erro: Data de pagamento inválida!")
-                    return False
-                
-                conta["status"] = "pago"
-                conta["data_pagamento"] = data_pagamento
-                conta["usuario_pagamento"] = usuario
-                conta["status_vencimento"] = "pago"
-                
-                self.salvar_contas_pagar()
-                
-                print(f"✅ Pagamento registrado para conta {conta_id}!")
-                print(f"📝 {conta['descricao']}")
-                print(f"💰 Valor: {self.formatar_valor(conta['valor'])}")
-                print(f"📅 Data do pagamento: {data_pagamento}")
-                
-                return True
+        conta = self._idx_pagar.get(conta_id)
+        if conta is None or not conta.get("ativo", True):
+            print("❌ Erro: Conta não encontrada!")
+            return False
         
-        print("❌ Erro: Conta não encontrada!")
-        return False
+        if conta["status"] == "pago":
+            print("❌ Erro: Conta já foi paga!")
+            return False
+        
+        if not data_pagamento:
+            data_pagamento = date.today().isoformat()
+        
+        if not self.validar_data(data_pagamento):
+            print("❌ Erro: Data de pagamento inválida!")
+            return False
+        
+        self._desindexar_filtros("pagar", conta)
+        conta["status"] = "pago"
+        conta["data_pagamento"] = data_pagamento
+        conta["usuario_pagamento"] = usuario
+        conta["status_vencimento"] = "pago"
+        self._fechar_no_indice("pagar", conta)
+        self._indexar_filtros("pagar", conta)
+        self._registrar_quitacao("pagar", conta)
+        
+        self._anexar_conta(self.arquivo_contas_pagar, conta)
+        
+        print(f"✅ Pagamento registrado para conta {conta_id}!")
+        print(f"📝 {conta['descricao']}")
+        print(f"💰 Valor: {self.formatar_valor(conta['valor'])}")
+        print(f"📅 Data do pagamento: {data_pagamento}")
+        
+        return True
     
     def registrar_recebimento(self, conta_id: str, data_recebimento: str = None, 
                             usuario: str = "sistema") -> bool:
@@ -451,41 +1033,117 @@ class SistemaFinanceiro:
         Returns:
             True se sucesso, False se erro
         """
-        for conta in self.contas_receber:
-            if conta["id"] == conta_id and conta.get("ativo", True):
-                if conta["status"] == "recebido":
-                    print("❌ Erro: Conta já foi recebida!")
-                    return False
-                
-                if not data_recebimento:
-                    data_recebimento = time.strftime("%Y-%m-%d")
-                
-                if not self.validar_data(data_recebimento):
-                    print("❌ Erro: Data de recebimento inválida!")
-                    return False
-                
-                conta["status"] = "recebido"
-                conta["data_recebimento"] = data_recebimento
-                conta["usuario_recebimento"] = usuario
-                conta["status_vencimento"] = "recebido"
-                
-                self.salvar_contas_receber()
-                
-                print(f"✅ Recebimento registrado para conta {conta_id}!")
-                print(f"👤 Cliente: {conta['cliente']}")
-                print(f"📝 {conta['descricao']}")
-                print(f"💰 Valor: {self.formatar_valor(conta['valor'])}")
-                print(f"📅 Data do recebimento: {data_recebimento}")
-                
-                return True
+        conta = self._idx_receber.get(conta_id)
+        if conta is None or not conta.get("ativo", True):
+            print("❌ Erro: Conta não encontrada!")
+            return False
         
-        print("❌ Erro: Conta não encontrada!")
-        return False
+        if conta["status"] == "recebido":
+            print("❌ Erro: Conta já foi recebida!")
+            return False
+        
+        if not data_recebimento:
+            data_recebimento = date.today().isoformat()
+        
+        if not self.validar_data(data_recebimento):
+            print("❌ Erro: Data de recebimento inválida!")
+            return False
+        
+        self._desindexar_filtros("receber", conta)
+        conta["status"] = "recebido"
+        conta["data_recebimento"] = data_recebimento
+        conta["usuario_recebimento"] = usuario
+        conta["status_vencimento"] = "recebido"
+        self._fechar_no_indice("receber", conta)
+        self._indexar_filtros("receber", conta)
+        self._registrar_quitacao("receber", conta)
+        
+        self._anexar_conta(self.arquivo_contas_receber, conta)
+        
+        print(f"✅ Recebimento registrado para conta {conta_id}!")
+        print(f"👤 Cliente: {conta['cliente']}")
+        print(f"📝 {conta['descricao']}")
+        print(f"💰 Valor: {self.formatar_valor(conta['valor'])}")
+        print(f"📅 Data do recebimento: {data_recebimento}")
+        
+        return True
+    
+    def _resumir_contas(self, contas: List, status_quitado: str) -> Dict:
+        """
+        Acumula totais, contadores, atrasadas e categorias de uma lista de contas
+        
+        Args:
+            contas: Contas ativas a resumir
+            status_quitado: Status que indica conta quitada ("pago" ou "recebido")
+            
+        Returns:
+            Dicionário com os valores agregados
+        """
+        total = quitado = pendente = atrasado = 0
+        n_pendentes = n_quitadas = 0
+        atrasadas = []
+        hoje = date.today().toordinal()
+        
+        # Acumuladores por categoria em listas [total, quitado, pendente]: somar por
+        # posição é mais barato que por chave; os dicionários são montados no final
+        acumulados = {}
+        obter_acumulado = acumulados.get
+        centavos_conta = self._centavos_conta
+        venc_ord_conta = self._venc_ord_conta
+        
+        # Somas em centavos inteiros (exatas); convertidas para reais só no final
+        for conta in contas:
+            conta_id = conta["id"]
+            valor = centavos_conta[conta_id]
+            status = conta["status"]
+            total += valor
+            
+            categoria = conta["categoria"]
+            acc = obter_acumulado(categoria)
+            if acc is None:
+                acc = acumulados[categoria] = [0, 0, 0]
+            acc[0] += valor
+            
+            if status == status_quitado:
+                quitado += valor
+                n_quitadas += 1
+                acc[1] += valor
+            else:
+                if status == "pendente":
+                    pendente += valor
+                    n_pendentes += 1
+                acc[2] += valor
+            
+            # Situação de vencimento calculada na hora (não depende do campo gravado)
+            venc_ord = venc_ord_conta[conta_id]
+            if status != status_quitado and venc_ord is not None and venc_ord < hoje:
+                atrasadas.append(conta)
+                atrasado += valor
+        
+        categorias = {
+            categoria: {"total": acc[0] / 100, status_quitado: acc[1] / 100, "pendente": acc[2] / 100}
+            for categoria, acc in acumulados.items()
+        }
+        
+        return {
+            "total": total / 100,
+            "quitado": quitado / 100,
+            "pendente": pendente / 100,
+            "atrasado": atrasado / 100,
+            "n_pendentes": n_pendentes,
+            "n_quitadas": n_quitadas,
+            "atrasadas": atrasadas,
+            "categorias": categorias
+        }
     
     def relatorio_financeiro(self, data_inicio: str = None, data_fim: str = None) -> Dict:
         """
         Gera relatório financeiro completo
         
+        O cálculo fica em cache até a próxima alteração de conta (ou a troca
+        do dia, que muda o que está atrasado); os dicionários internos do
+        resultado são compartilhados e não devem ser alterados.
+        
         Args:
             data_inicio: Data de início (YYYY-MM-DD)
             data_fim: Data de fim (YYYY-MM-DD)
@@ -493,87 +1151,86 @@ class SistemaFinanceiro:
         Returns:
             Dicionário com dados do relatório
         """
-        # Filtra contas por período se especificado
-        contas_pagar_filtradas = self.contas_pagar
-        contas_receber_filtradas = self.contas_receber
-        
+        self._atualizar_status_vencimento()
+        periodo = None
         if data_inicio or data_fim:
-            contas_pagar_filtradas = []
-            contas_receber_filtradas = []
+            # Limites convertidos em ordinais uma vez; a comparação por conta é entre inteiros
+            inicio_ord = _ordinal(data_inicio) if data_inicio else None
+            fim_ord = _ordinal(data_fim) if data_fim else None
+            if data_inicio and inicio_ord is None:
+                print("❌ Erro: Data de início inválida! O filtro será ignorado.")
+            if data_fim and fim_ord is None:
+                print("❌ Erro: Data de fim inválida! O filtro será ignorado.")
+            if inicio_ord is None:
+                inicio_ord = date.min.toordinal()
+            if fim_ord is None:
+                fim_ord = date.max.toordinal()
+            periodo = (inicio_ord, fim_ord)
+        
+        if self._versao_cache_relatorio != self._versao_dados:
+            self._cache_relatorio.clear()
+            self._versao_cache_relatorio = self._versao_dados
+        chave_cache = (periodo, date.today().toordinal())
+        relatorio = self._cache_relatorio.get(chave_cache)
+        if relatorio is None:
+            relatorio = self._cache_relatorio[chave_cache] = self._calcular_relatorio(periodo)
+        
+        return {
+            **relatorio,
+            "data_inicio": data_inicio,
+            "data_fim": data_fim,
+            "data_relatorio": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+    
+    def _calcular_relatorio(self, periodo: Optional[tuple]) -> Dict:
+        """
+        Calcula os totais do relatório financeiro
+        
+        Args:
+            periodo: Tupla (ordinal inicial, ordinal final) de vencimento, ou None para todas
             
-            for conta in self.contas_pagar:
-                if conta.get("ativo", True):
-                    data_conta = conta["data_vencimento"]
-                    if data_inicio and data_conta < data_inicio:
-                        continue
-                    if data_fim and data_conta > data_fim:
-                        continue
-                    contas_pagar_filtradas.append(conta)
+        Returns:
+            Dicionário com resumo, contadores, categorias e contas atrasadas
+        """
+        # Filtra contas ativas (e por período, se especificado) uma única vez
+        if periodo is None:
+            contas_pagar_filtradas = [conta for conta in self.contas_pagar if conta.get("ativo", True)]
+            contas_receber_filtradas = [conta for conta in self.contas_receber if conta.get("ativo", True)]
+        else:
+            inicio_ord, fim_ord = periodo
+            venc_ord_conta = self._venc_ord_conta
             
-            for conta in self.contas_receber:
-                if conta.get("ativo", True):
-                    data_conta = conta["data_vencimento"]
-                    if data_inicio and data_conta < data_inicio:
-                        continue
-                    if data_fim and data_conta > data_fim:
-                        continue
-                    contas_receber_filtradas.append(conta)
-        
-        # Calcula totais
-        total_pagar = sum(conta["valor"] for conta in contas_pagar_filtradas if conta.get("ativo", True))
-        total_receber = sum(conta["valor"] for conta in contas_receber_filtradas if conta.get("ativo", True))
-        
-        # Contas pagas e recebidas
-        total_pago = sum(conta["valor"] for conta in contas_pagar_filtradas 
-                        if conta.get("ativo", True) and conta["status"] == "pago")
-        total_recebido = sum(conta["valor"] for conta in contas_receber_filtradas 
-                           if conta.get("ativo", True) and conta["status"] == "recebido")
-        
-        # Contas pendentes
-        total_pagar_pendente = sum(conta["valor"] for conta in contas_pagar_filtradas 
-                                 if conta.get("ativo", True) and conta["status"] == "pendente")
-        total_receber_pendente = sum(conta["valor"] for conta in contas_receber_filtradas 
-                                   if conta.get("ativo", True) and conta["status"] == "pendente")
-        
-        # Contas atrasadas
-        contas_pagar_atrasadas = [conta for conta in contas_pagar_filtradas 
-                                if conta.get("ativo", True) and conta["status_vencimento"] == "atrasado"]
-        contas_receber_atrasadas = [conta for conta in contas_receber_filtradas 
-                                  if conta.get("ativo", True) and conta["status_vencimento"] == "atrasado"]
-        
-        total_pagar_atrasado = sum(conta["valor"] for conta in contas_pagar_atrasadas)
-        total_receber_atrasado = sum(conta["valor"] for conta in contas_receber_atrasadas)
+            # Filtro por vencimento só com comparações de inteiros (ordinais calculados no cadastro)
+            contas_pagar_filtradas = [
+                conta for conta in self.contas_pagar
+                if conta.get("ativo", True) and (venc_ord := venc_ord_conta[conta["id"]]) is not None
+                and inicio_ord <= venc_ord <= fim_ord
+            ]
+            contas_receber_filtradas = [
+                conta for conta in self.contas_receber
+                if conta.get("ativo", True) and (venc_ord := venc_ord_conta[conta["id"]]) is not None
+                and inicio_ord <= venc_ord <= fim_ord
+            ]
+        
+        # Calcula totais, contadores e categorias em uma única passada por lista
+        pagar = self._resumir_contas(contas_pagar_filtradas, "pago")
+        receber = self._resumir_contas(contas_receber_filtradas, "recebido")
+        
+        total_pagar = pagar["total"]
+        total_receber = receber["total"]
+        total_pago = pagar["quitado"]
+        total_recebido = receber["quitado"]
+        total_pagar_pendente = pagar["pendente"]
+        total_receber_pendente = receber["pendente"]
+        contas_pagar_atrasadas = pagar["atrasadas"]
+        contas_receber_atrasadas = receber["atrasadas"]
+        total_pagar_atrasado = pagar["atrasado"]
+        total_receber_atrasado = receber["atrasado"]
         
         # Saldo
         saldo = total_recebido - total_pago
         saldo_futuro = (total_receber - total_pagar)
         
-        # Análise por categoria
-        categorias_pagar = {}
-        categorias_receber = {}
-        
-        for conta in contas_pagar_filtradas:
-            if conta.get("ativo", True):
-                cat = conta["categoria"]
-                if cat not in categorias_pagar:
-                    categorias_pagar[cat] = {"total": 0, "pago": 0, "pendente": 0}
-                categorias_pagar[cat]["total"] += conta["valor"]
-                if conta["status"] == "pago":
-                    categorias_pagar[cat]["pago"] += conta["valor"]
-                else:
-                    categorias_pagar[cat]["pendente"] += conta["valor"]
-        
-        for conta in contas_receber_filtradas:
-            if conta.get("ativo", True):
-                cat = conta["categoria"]
-                if cat not in categorias_receber:
-                    categorias_receber[cat] = {"total": 0, "recebido": 0, "pendente": 0}
-                categorias_receber[cat]["total"] += conta["valor"]
-                if conta["status"] == "recebido":
-                    categorias_receber[cat]["recebido"] += conta["valor"]
-                else:
-                    categorias_receber[cat]["pendente"] += conta["valor"]
-        
         return {
             "resumo": {
                 "total_pagar": total_pagar,
@@ -589,77 +1246,61 @@ class SistemaFinanceiro:
             },
             "contas_pagar": {
                 "total": len(contas_pagar_filtradas),
-                "pendentes": len([c for c in contas_pagar_filtradas if c.get("ativo", True) and c["status"] == "pendente"]),
-                "pagas": len([c for c in contas_pagar_filtradas if c.get("ativo", True) and c["status"] == "pago"]),
+                "pendentes": pagar["n_pendentes"],
+                "pagas": pagar["n_quitadas"],
                 "atrasadas": len(contas_pagar_atrasadas)
             },
             "contas_receber": {
                 "total": len(contas_receber_filtradas),
-                "pendentes": len([c for c in contas_receber_filtradas if c.get("ativo", True) and c["status"] == "pendente"]),
-                "recebidas": len([c for c in contas_receber_filtradas if c.get("ativo", True) and c["status"] == "recebido"]),
+                "pendentes": receber["n_pendentes"],
+                "recebidas": receber["n_quitadas"],
                 "atrasadas": len(contas_receber_atrasadas)
             },
-            "categorias_pagar": categorias_pagar,
-            "categorias_receber": categorias_receber,
+            "categorias_pagar": pagar["categorias"],
+            "categorias_receber": receber["categorias"],
             "contas_atrasadas": {
                 "pagar": contas_pagar_atrasadas,
                 "receber": contas_receber_atrasadas
-            },
-            "data_inicio": data_inicio,
-            "data_fim": data_fim,
-            "data_relatorio": time.strftime("%Y-%m-%d %H:%M:%S")
+            }
         }
     
     def obter_alertas_vencimento(self) -> Dict:
         """
         Obtém alertas de vencimento
         
+        Cada grupo vem ordenado por data de vencimento (contas a pagar primeiro).
+        O resultado fica em cache até a próxima alteração de conta ou a troca do
+        dia; as listas são compartilhadas e não devem ser alteradas.
+        
         Returns:
             Dicionário com alertas
         """
-        hoje = datetime.now().date()
+        self._atualizar_status_vencimento()
+        hoje = datetime.now().toordinal()
+        chave_cache = (self._versao_dados, hoje)
+        if self._cache_alertas is not None and self._cache_alertas[0] == chave_cache:
+            return self._cache_alertas[1]
+        
         alertas = {
             "vencendo_hoje": [],
             "vencendo_em_7_dias": [],
             "atrasadas": []
         }
         
-        # Contas a pagar
-        for conta in self.contas_pagar:
-            if not conta.get("ativo", True) or conta["status"] == "pago":
-                continue
-            
-            try:
-                data_venc = datetime.strptime(conta["data_vencimento"], "%Y-%m-%d").date()
-                dias_para_vencer = (data_venc - hoje).days
-                
-                if dias_para_vencer == 0:
-                    alertas["vencendo_hoje"].append({"tipo": "pagar", "conta": conta})
-                elif dias_para_vencer < 0:
-                    alertas["atrasadas"].append({"tipo": "pagar", "conta": conta})
-                elif dias_para_vencer <= 7:
-                    alertas["vencendo_em_7_dias"].append({"tipo": "pagar", "conta": conta})
-            except:
-                continue
-        
-        # Contas a receber
-        for conta in self.contas_receber:
-            if not conta.get("ativo", True) or conta["status"] == "recebido":
-                continue
+        # O índice está ordenado por vencimento: os três grupos são fatias contíguas
+        # das contas em aberto, delimitadas por busca binária (atrasadas | hoje | 7 dias)
+        for tipo, indice in (("pagar", self._idx_pagar), ("receber", self._idx_receber)):
+            abertos = self._abertos[tipo]
+            inicio_hoje = bisect.bisect_left(abertos, (hoje,))
+            inicio_amanha = bisect.bisect_left(abertos, (hoje + 1,), inicio_hoje)
+            fim = bisect.bisect_left(abertos, (hoje + 8,), inicio_amanha)
             
-            try:
-                data_venc = datetime.strptime(conta["data_vencimento"], "%Y-%m-%d").date()
-                dias_para_vencer = (data_venc - hoje).days
-                
-                if dias_para_vencer == 0:
-                    alertas["vencendo_hoje"].append({"tipo": "receber", "conta": conta})
-                elif dias_para_vencer < 0:
-                    alertas["atrasadas"].append({"tipo": "receber", "conta": conta})
-                elif dias_para_vencer <= 7:
-                    alertas["vencendo_em_7_dias"].append({"tipo": "receber", "conta": conta})
-            except:
-                continue
+            for grupo, fatia in (("atrasadas", abertos[:inicio_hoje]),
+                                 ("vencendo_hoje", abertos[inicio_hoje:inicio_amanha]),
+                                 ("vencendo_em_7_dias", abertos[inicio_amanha:fim])):
+                alertas[grupo].extend({"tipo": tipo, "conta": indice[conta_id]} for _, conta_id in fatia)
         
+        self._cache_alertas = (chave_cache, alertas)
         return alertas
     
     def excluir_conta_pagar(self, conta_id: str, usuario: str = "sistema") -> bool:
@@ -673,15 +1314,19 @@ class SistemaFinanceiro:
         Returns:
             True se sucesso, False se erro
         """
-        for conta in self.contas_pagar:
-            if conta["id"] == conta_id and conta.get("ativo", True):
-                conta["ativo"] = False
-                self.salvar_contas_pagar()
-                print(f"✅ Conta a pagar {conta_id} excluída!")
-                return True
+        conta = self._idx_pagar.get(conta_id)
+        if conta is None or not conta.get("ativo", True):
+            print("❌ Erro: Conta não encontrada!")
+            return False
         
-        print("❌ Erro: Conta não encontrada!")
-        return False
+        conta["ativo"] = False
+        self._fechar_no_indice("pagar", conta)
+        if conta["status"] == "pago":
+            self._remover_quitacao("pagar", conta)
+        self._desindexar_filtros("pagar", conta)
+        self._anexar_conta(self.arquivo_contas_pagar, conta)
+        print(f"✅ Conta a pagar {conta_id} excluída!")
+        return True
     
     def excluir_conta_receber(self, conta_id: str, usuario: str = "sistema") -> bool:
         """
@@ -694,15 +1339,71 @@ class SistemaFinanceiro:
         Returns:
             True se sucesso, False se erro
         """
-        for conta in self.contas_receber:
-            if conta["id"] == conta_id and conta.get("ativo", True):
-                conta["ativo"] = False
-                self.salvar_contas_receber()
-                print(f"✅ Conta a receber {conta_id} excluída!")
-                return True
+        conta = self._idx_receber.get(conta_id)
+        if conta is None or not conta.get("ativo", True):
+            print("❌ Erro: Conta não encontrada!")
+            return False
         
-        print("❌ Erro: Conta não encontrada!")
-        return False
+        conta["ativo"] = False
+        self._fechar_no_indice("receber", conta)
+        if conta["status"] == "recebido":
+            self._remover_quitacao("receber", conta)
+        self._desindexar_filtros("receber", conta)
+        self._anexar_conta(self.arquivo_contas_receber, conta)
+        print(f"✅ Conta a receber {conta_id} excluída!")
+        return True
+    
+    def _fluxo_intervalo(self, inicio_ord: int, fim_ord: int, por_categoria: bool = False) -> Dict:
+        """
+        Calcula entradas, saídas e saldo entre duas datas (ordinais, inclusive)
+        
+        Núcleo comum dos fluxos de caixa diário, mensal e por período. O
+        resultado fica em cache até a próxima alteração de conta, então
+        relatórios repetidos do mesmo período não refazem as somas; os
+        dicionários devolvidos são compartilhados e não devem ser alterados.
+        
+        Args:
+            inicio_ord: Ordinal da data inicial
+            fim_ord: Ordinal da data final
+            por_categoria: Se deve incluir o resumo por categoria
+            
+        Returns:
+            Dicionário com entradas, saidas e saldo (em reais e em centavos)
+        """
+        if self._versao_cache_fluxo != self._versao_dados:
+            self._cache_fluxo.clear()
+            self._versao_cache_fluxo = self._versao_dados
+        chave_cache = (inicio_ord, fim_ord, por_categoria)
+        resultado = self._cache_fluxo.get(chave_cache)
+        if resultado is not None:
+            return resultado
+        
+        resultado = {}
+        saldo = 0
+        for chave, tipo, sinal in (("entradas", "receber", 1), ("saidas", "pagar", -1)):
+            contas = self._quitadas_no_periodo(tipo, inicio_ord, fim_ord)
+            if por_categoria:
+                total, categorias = self._somar_por_categoria(contas)
+            else:
+                centavos_conta = self._centavos_conta
+                total = sum(centavos_conta[conta["id"]] for conta in contas)
+            
+            resumo = {
+                "transacoes": contas,
+                "total": total / 100,
+                "total_centavos": total,
+                "quantidade": len(contas)
+            }
+            if por_categoria:
+                resumo["por_categoria"] = {k: v / 100 for k, v in categorias.items()}
+                resumo["por_categoria_centavos"] = categorias
+            resultado[chave] = resumo
+            saldo += sinal * total
+        
+        resultado["saldo"] = saldo / 100
+        resultado["saldo_centavos"] = saldo
+        self._cache_fluxo[chave_cache] = resultado
+        return resultado
     
     def fluxo_caixa_diario(self, data: str = None) -> Dict:
         """
@@ -715,52 +1416,21 @@ class SistemaFinanceiro:
             Dicionário com resumo do fluxo de caixa
         """
         if data is None:
-            data = datetime.now().strftime("%Y-%m-%d")
+            data = date.today().isoformat()
         
         if not self.validar_data(data):
             return {"erro": "Data inválida"}
         
-        data_obj = datetime.strptime(data, "%Y-%m-%d").date()
-        
-        # Entradas (receitas recebidas na data)
-        entradas = []
-        total_entradas = Decimal('0.00')
-        
-        for conta in self.contas_receber:
-            if (conta.get("ativo", True) and 
-                conta["status"] == "recebido" and 
-                conta.get("data_recebimento") == data):
-                entradas.append(conta)
-                total_entradas += Decimal(str(conta["valor"]))
-        
-        # Saídas (despesas pagas na data)
-        saidas = []
-        total_saidas = Decimal('0.00')
-        
-        for conta in self.contas_pagar:
-            if (conta.get("ativo", True) and 
-                conta["status"] == "pago" and 
-                conta.get("data_pagamento") == data):
-                saidas.append(conta)
-                total_saidas += Decimal(str(conta["valor"]))
-        
-        # Saldo do dia
-        saldo_dia = total_entradas - total_saidas
+        data_ord = _ordinal(data)
+        fluxo = self._fluxo_intervalo(data_ord, data_ord)
         
         return {
             "data": data,
-            "entradas": {
-                "transacoes": entradas,
-                "total": float(total_entradas),
-                "quantidade": len(entradas)
-            },
-            "saidas": {
-                "transacoes": saidas,
-                "total": float(total_saidas),
-                "quantidade": len(saidas)
-            },
-            "saldo_dia": float(saldo_dia),
-            "saldo_formatado": self.formatar_valor(saldo_dia)
+            "entradas": fluxo["entradas"],
+            "saidas": fluxo["saidas"],
+            "saldo_dia": fluxo["saldo"],
+            "saldo_centavos": fluxo["saldo_centavos"],
+            "saldo_formatado": self.formatar_valor(fluxo["saldo"])
         }
     
     def fluxo_caixa_mensal(self, ano: int = None, mes: int = None) -> Dict:
@@ -780,83 +1450,22 @@ class SistemaFinanceiro:
             mes = datetime.now().month
         
         # Primeiro e último dia do mês
-        data_inicio = datetime(ano, mes, 1).date()
-        if mes == 12:
-            data_fim = datetime(ano + 1, 1, 1).date() - timedelta(days=1)
-        else:
-            data_fim = datetime(ano, mes + 1, 1).date() - timedelta(days=1)
-        
-        # Entradas do mês
-        entradas = []
-        total_entradas = Decimal('0.00')
-        
-        for conta in self.contas_receber:
-            if not conta.get("ativo", True) or conta["status"] != "recebido":
-                continue
-            
-            try:
-                data_recebimento = datetime.strptime(conta.get("data_recebimento", ""), "%Y-%m-%d").date()
-                if data_inicio <= data_recebimento <= data_fim:
-                    entradas.append(conta)
-                    total_entradas += Decimal(str(conta["valor"]))
-            except:
-                continue
-        
-        # Saídas do mês
-        saidas = []
-        total_saidas = Decimal('0.00')
-        
-        for conta in self.contas_pagar:
-            if not conta.get("ativo", True) or conta["status"] != "pago":
-                continue
-            
-            try:
-                data_pagamento = datetime.strptime(conta.get("data_pagamento", ""), "%Y-%m-%d").date()
-                if data_inicio <= data_pagamento <= data_fim:
-                    saidas.append(conta)
-                    total_saidas += Decimal(str(conta["valor"]))
-            except:
-                continue
-        
-        # Saldo do mês
-        saldo_mes = total_entradas - total_saidas
+        data_inicio = date(ano, mes, 1)
+        data_fim = date(ano, mes, monthrange(ano, mes)[1])
         
-        # Resumo por categoria
-        categorias_entradas = {}
-        categorias_saidas = {}
-        
-        for conta in entradas:
-            categoria = conta.get("categoria", "Sem categoria")
-            if categoria not in categorias_entradas:
-                categorias_entradas[categoria] = Decimal('0.00')
-            categorias_entradas[categoria] += Decimal(str(conta["valor"]))
-        
-        for conta in saidas:
-            categoria = conta.get("categoria", "Sem categoria")
-            if categoria not in categorias_saidas:
-                categorias_saidas[categoria] = Decimal('0.00')
-            categorias_saidas[categoria] += Decimal(str(conta["valor"]))
+        fluxo = self._fluxo_intervalo(data_inicio.toordinal(), data_fim.toordinal(), por_categoria=True)
         
         return {
             "ano": ano,
             "mes": mes,
-            "mes_nome": datetime(ano, mes, 1).strftime("%B"),
-            "data_inicio": data_inicio.strftime("%Y-%m-%d"),
-            "data_fim": data_fim.strftime("%Y-%m-%d"),
-            "entradas": {
-                "transacoes": entradas,
-                "total": float(total_entradas),
-                "quantidade": len(entradas),
-                "por_categoria": {k: float(v) for k, v in categorias_entradas.items()}
-            },
-            "saidas": {
-                "transacoes": saidas,
-                "total": float(total_saidas),
-                "quantidade": len(saidas),
-                "por_categoria": {k: float(v) for k, v in categorias_saidas.items()}
-            },
-            "saldo_mes": float(saldo_mes),
-            "saldo_formatado": self.formatar_valor(saldo_mes)
+            "mes_nome": _MES_PT[mes],
+            "data_inicio": data_inicio.isoformat(),
+            "data_fim": data_fim.isoformat(),
+            "entradas": fluxo["entradas"],
+            "saidas": fluxo["saidas"],
+            "saldo_mes": fluxo["saldo"],
+            "saldo_centavos": fluxo["saldo_centavos"],
+            "saldo_formatado": self.formatar_valor(fluxo["saldo"])
         }
     
     def fluxo_caixa_periodo(self, data_inicio: str, data_fim: str) -> Dict:
@@ -873,64 +1482,38 @@ class SistemaFinanceiro:
         if not self.validar_data(data_inicio) or not self.validar_data(data_fim):
             return {"erro": "Data inválida"}
         
-        data_ini = datetime.strptime(data_inicio, "%Y-%m-%d").date()
-        data_fim_obj = datetime.strptime(data_fim, "%Y-%m-%d").date()
+        data_ini = _parse_date(data_inicio)
+        data_fim_obj = _parse_date(data_fim)
         
         if data_ini > data_fim_obj:
             return {"erro": "Data inicial maior que data final"}
         
-        # Entradas do período
-        entradas = []
-        total_entradas = Decimal('0.00')
-        
-        for conta in self.contas_receber:
-            if not conta.get("ativo", True) or conta["status"] != "recebido":
-                continue
-            
-            try:
-                data_recebimento = datetime.strptime(conta.get("data_recebimento", ""), "%Y-%m-%d").date()
-                if data_ini <= data_recebimento <= data_fim_obj:
-                    entradas.append(conta)
-                    total_entradas += Decimal(str(conta["valor"]))
-            except:
-                continue
-        
-        # Saídas do período
-        saidas = []
-        total_saidas = Decimal('0.00')
-        
-        for conta in self.contas_pagar:
-            if not conta.get("ativo", True) or conta["status"] != "pago":
-                continue
-            
-            try:
-                data_pagamento = datetime.strptime(conta.get("data_pagamento", ""), "%Y-%m-%d").date()
-                if data_ini <= data_pagamento <= data_fim_obj:
-                    saidas.append(conta)
-                    total_saidas += Decimal(str(conta["valor"]))
-            except:
-                continue
-        
-        # Saldo do período
-        saldo_periodo = total_entradas - total_saidas
+        fluxo = self._fluxo_intervalo(data_ini.toordinal(), data_fim_obj.toordinal())
         
         return {
             "data_inicio": data_inicio,
             "data_fim": data_fim,
-            "entradas": {
-                "transacoes": entradas,
-                "total": float(total_entradas),
-                "quantidade": len(entradas)
-            },
-            "saidas": {
-                "transacoes": saidas,
-                "total": float(total_saidas),
-                "quantidade": len(saidas)
-            },
-            "saldo_periodo": float(saldo_periodo),
-            "saldo_formatado": self.formatar_valor(saldo_periodo)
+            "entradas": fluxo["entradas"],
+            "saidas": fluxo["saidas"],
+            "saldo_periodo": fluxo["saldo"],
+            "saldo_centavos": fluxo["saldo_centavos"],
+            "saldo_formatado": self.formatar_valor(fluxo["saldo"])
         }
     
+    def fluxo_para_json(self, fluxo_data: Dict) -> bytes:
+        """
+        Serializa um fluxo de caixa em JSON (bytes)
+        
+        Os valores exatos vão nos campos *_centavos, sem conversões extras.
+        
+        Args:
+            fluxo_data: Dados retornados por fluxo_caixa_diario/mensal/periodo
+            
+        Returns:
+            JSON em bytes (orjson quando disponível)
+        """
+        return dumps(fluxo_data)
+    
     def tabela_transacoes_fluxo_caixa(self, fluxo_data: Dict) -> str:
         """
         Gera tabela formatada das transações do fluxo de caixa
@@ -945,6 +1528,7 @@ class SistemaFinanceiro:
             return f"❌ Erro: {fluxo_data['erro']}"
         
         tabela = []
+        fmt = self.formatar_valor
         
         # Cabeçalho
         if "data" in fluxo_data:  # Fluxo diário
@@ -963,8 +1547,8 @@ class SistemaFinanceiro:
         # Resumo
         tabela.append("")
         tabela.append("📈 RESUMO:")
-        tabela.append(f"   Entradas: {fluxo_data['entradas']['quantidade']} transações - {self.formatar_valor(fluxo_data['entradas']['total'])}")
-        tabela.append(f"   Saídas: {fluxo_data['saidas']['quantidade']} transações - {self.formatar_valor(fluxo_data['saidas']['total'])}")
+        tabela.append(f"   Entradas: {fluxo_data['entradas']['quantidade']} transações - {fmt(fluxo_data['entradas']['total'])}")
+        tabela.append(f"   Saídas: {fluxo_data['saidas']['quantidade']} transações - {fmt(fluxo_data['saidas']['total'])}")
         
         if "saldo_dia" in fluxo_data:
             saldo = fluxo_data['saldo_dia']
@@ -973,7 +1557,7 @@ class SistemaFinanceiro:
         else:
             saldo = fluxo_data['saldo_periodo']
         
-        saldo_str = self.formatar_valor(saldo)
+        saldo_str = fmt(saldo)
         if saldo >= 0:
             tabela.append(f"   Saldo: +{saldo_str} ✅")
         else:
@@ -984,11 +1568,14 @@ class SistemaFinanceiro:
             tabela.append("")
             tabela.append("💰 ENTRADAS (Receitas Recebidas):")
             tabela.append("-" * 80)
-            tabela.append(f"{'ID':<8} {'Cliente':<20} {'Descrição':<25} {'Valor':<12} {'Data':<12}")
+            tabela.append(_LINHA_TABELA("ID", "Cliente", "Descrição", "Valor", "Data"))
             tabela.append("-" * 80)
             
-            for conta in fluxo_data['entradas']['transacoes']:
-                tabela.append(f"{conta['id']:<8} {conta.get('cliente', 'N/A')[:18]:<20} {conta['descricao'][:23]:<25} {self.formatar_valor(conta['valor']):<12} {conta.get('data_recebimento', 'N/A'):<12}")
+            tabela.extend([
+                _LINHA_TABELA(conta['id'], conta.get('cliente', 'N/A')[:18], conta['descricao'][:23],
+                              fmt(conta['valor']), conta.get('data_recebimento', 'N/A'))
+                for conta in fluxo_data['entradas']['transacoes']
+            ])
         else:
             tabela.append("")
             tabela.append("💰 ENTRADAS: Nenhuma transação encontrada")
@@ -998,11 +1585,14 @@ class SistemaFinanceiro:
             tabela.append("")
             tabela.append("💸 SAÍDAS (Despesas Pagas):")
             tabela.append("-" * 80)
-            tabela.append(f"{'ID':<8} {'Fornecedor':<20} {'Descrição':<25} {'Valor':<12} {'Data':<12}")
+            tabela.append(_LINHA_TABELA("ID", "Fornecedor", "Descrição", "Valor", "Data"))
             tabela.append("-" * 80)
             
-            for conta in fluxo_data['saidas']['transacoes']:
-                tabela.append(f"{conta['id']:<8} {conta.get('fornecedor', 'N/A')[:18]:<20} {conta['descricao'][:23]:<25} {self.formatar_valor(conta['valor']):<12} {conta.get('data_pagamento', 'N/A'):<12}")
+            tabela.extend([
+                _LINHA_TABELA(conta['id'], conta.get('fornecedor', 'N/A')[:18], conta['descricao'][:23],
+                              fmt(conta['valor']), conta.get('data_pagamento', 'N/A'))
+                for conta in fluxo_data['saidas']['transacoes']
+            ])
         else:
             tabela.append("")
             tabela.append("💸 SAÍDAS: Nenhuma transação encontrada")
@@ -1053,30 +1643,30 @@ class SistemaFinanceiro:
         
         # Transações diárias (para gráfico de linha)
         if "mes_nome" in fluxo_data:  # Apenas para fluxo mensal
+            # Acumuladores por dia em listas [entradas, saidas], somados em centavos
             transacoes_por_dia = {}
+            obter_dia = transacoes_por_dia.get
+            centavos_conta = self._centavos_conta
             
-            # Agrupar entradas por dia
-            for conta in fluxo_data['entradas']['transacoes']:
-                data = conta.get('data_recebimento', '')
-                if data not in transacoes_por_dia:
-                    transacoes_por_dia[data] = {"entradas": 0, "saidas": 0}
-                transacoes_por_dia[data]["entradas"] += conta['valor']
-            
-            # Agrupar saídas por dia
-            for conta in fluxo_data['saidas']['transacoes']:
-                data = conta.get('data_pagamento', '')
-                if data not in transacoes_por_dia:
-                    transacoes_por_dia[data] = {"entradas": 0, "saidas": 0}
-                transacoes_por_dia[data]["saidas"] += conta['valor']
+            for posicao, chave, campo_data in ((0, "entradas", "data_recebimento"),
+                                                (1, "saidas", "data_pagamento")):
+                for conta in fluxo_data[chave]['transacoes']:
+                    data = conta.get(campo_data, '')
+                    acc = obter_dia(data)
+                    if acc is None:
+                        acc = transacoes_por_dia[data] = [0, 0]
+                    acc[posicao] += centavos_conta[conta['id']]
             
             # Ordenar por data
-            for data in sorted(transacoes_por_dia.keys()):
-                dados_grafico["transacoes_diarias"].append({
+            dados_grafico["transacoes_diarias"] = [
+                {
                     "data": data,
-                    "entradas": transacoes_por_dia[data]["entradas"],
-                    "saidas": transacoes_por_dia[data]["saidas"],
-                    "saldo": transacoes_por_dia[data]["entradas"] - transacoes_por_dia[data]["saidas"]
-                })
+                    "entradas": entradas / 100,
+                    "saidas": saidas / 100,
+                    "saldo": (entradas - saidas) / 100
+                }
+                for data, (entradas, saidas) in sorted(transacoes_por_dia.items())
+            ]
         
         return dados_grafico
     
@@ -1092,8 +1682,8 @@ class SistemaFinanceiro:
             String formatada do relatório
         """
         if tipo == "dia":
-            data = kwargs.get('data', datetime.now().strftime("%Y-%m-%d"))
-            fluxo_data = self.fluxo_caixa_diario(data)
+            # Sem data, fluxo_caixa_diario usa o dia de hoje
+            fluxo_data = self.fluxo_caixa_diario(kwargs.get('data'))
         elif tipo == "mes":
             ano = kwargs.get('ano', datetime.now().year)
             mes = kwargs.get('mes', datetime.now().month)
@@ -1113,31 +1703,38 @@ class SistemaFinanceiro:
         # Preparar dados para gráfico
         dados_grafico = self.dados_para_grafico_fluxo_caixa(fluxo_data)
         
-        # Adicionar informações sobre gráficos
-        relatorio = tabela + "\n\n"
-        relatorio += "📊 DADOS PARA GRÁFICOS:\n"
-        relatorio += "-" * 40 + "\n"
-        relatorio += f"Título: {dados_grafico['titulo']}\n"
-        relatorio += f"Total Entradas: {self.formatar_valor(dados_grafico['valores']['entradas'])}\n"
-        relatorio += f"Total Saídas: {self.formatar_valor(dados_grafico['valores']['saidas'])}\n"
-        
-        if dados_grafico['categorias_entradas']:
-            relatorio += "\nCategorias de Entradas:\n"
-            for categoria, valor in dados_grafico['categorias_entradas'].items():
-                relatorio += f"  {categoria}: {self.formatar_valor(valor)}\n"
-        
-        if dados_grafico['categorias_saidas']:
-            relatorio += "\nCategorias de Saídas:\n"
-            for categoria, valor in dados_grafico['categorias_saidas'].items():
-                relatorio += f"  {categoria}: {self.formatar_valor(valor)}\n"
-        
-        if dados_grafico['transacoes_diarias']:
-            relatorio += f"\nTransações Diárias ({len(dados_grafico['transacoes_diarias'])} dias):\n"
-            for transacao in dados_grafico['transacoes_diarias'][:5]:  # Mostrar apenas os primeiros 5 dias
-                relatorio += f"  {transacao['data']}: E={self.formatar_valor(transacao['entradas'])}, S={self.formatar_valor(transacao['saidas'])}, Saldo={self.formatar_valor(transacao['saldo'])}\n"
-            if len(dados_grafico['transacoes_diarias']) > 5:
-                relatorio += f"  ... e mais {len(dados_grafico['transacoes_diarias']) - 5} dias\n"
-        
-        relatorio += "\n💡 DICA: Use os dados acima para gerar gráficos com Matplotlib ou Plotly!"
-        
-        return relatorio
+        fmt = self.formatar_valor
+        categorias_entradas = dados_grafico['categorias_entradas']
+        categorias_saidas = dados_grafico['categorias_saidas']
+        transacoes_diarias = dados_grafico['transacoes_diarias']
+        
+        # Adicionar informações sobre gráficos (partes unidas uma única vez no final)
+        partes = [
+            tabela, "\n\n",
+            "📊 DADOS PARA GRÁFICOS:\n",
+            "-" * 40 + "\n",
+            f"Título: {dados_grafico['titulo']}\n",
+            f"Total Entradas: {fmt(dados_grafico['valores']['entradas'])}\n",
+            f"Total Saídas: {fmt(dados_grafico['valores']['saidas'])}\n"
+        ]
+        
+        if categorias_entradas:
+            partes.append("\nCategorias de Entradas:\n")
+            partes.extend(f"  {categoria}: {fmt(valor)}\n" for categoria, valor in categorias_entradas.items())
+        
+        if categorias_saidas:
+            partes.append("\nCategorias de Saídas:\n")
+            partes.extend(f"  {categoria}: {fmt(valor)}\n" for categoria, valor in categorias_saidas.items())
+        
+        if transacoes_diarias:
+            partes.append(f"\nTransações Diárias ({len(transacoes_diarias)} dias):\n")
+            partes.extend(
+                f"  {transacao['data']}: E={fmt(transacao['entradas'])}, S={fmt(transacao['saidas'])}, Saldo={fmt(transacao['saldo'])}\n"
+                for transacao in transacoes_diarias[:5]  # Mostrar apenas os primeiros 5 dias
+            )
+            if len(transacoes_diarias) > 5:
+                partes.append(f"  ... e mais {len(transacoes_diarias) - 5} dias\n")
+        
+        partes.append("\n💡 DICA: Use os dados acima para gerar gráficos com Matplotlib ou Plotly!")
+        
+        return "".join(partes)
@@ -0,0 +1,120 @@
+"""
+Funções de leitura e escrita de arquivos JSON compartilhadas pelos sistemas
+
+Usa orjson quando disponível, ujson como segunda opção e o módulo json
+da biblioteca padrão como último recurso, sempre trabalhando com bytes.
+"""
+import os
+
+try:
+    import orjson
+
+    def loads(dados: bytes):
+        """Converte bytes JSON em objetos Python"""
+        return orjson.loads(dados)
+
+    def dumps(obj) -> bytes:
+        """Converte objetos Python em bytes JSON indentados"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+
+    def dumps_compacto(obj) -> bytes:
+        """Converte objetos Python em bytes JSON sem espaços nem indentação"""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def dumps_linha(obj) -> bytes:
+        """Converte um objeto em uma linha JSON compacta (formato JSON Lines)"""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+
+except ImportError:
+    try:
+        import ujson as _json
+    except ImportError:
+        import json as _json
+
+    def loads(dados: bytes):
+        """Converte bytes JSON em objetos Python"""
+        return _json.loads(dados)
+
+    def dumps(obj) -> bytes:
+        """Converte objetos Python em bytes JSON indentados"""
+        return _json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+    def dumps_compacto(obj) -> bytes:
+        """Converte objetos Python em bytes JSON sem espaços nem indentação"""
+        return _json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def dumps_linha(obj) -> bytes:
+        """Converte um objeto em uma linha JSON compacta (formato JSON Lines)"""
+        return (_json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def escrever_atomico(caminho: str, dados: bytes, sincronizar: bool = False):
+    """
+    Substitui o conteúdo de um arquivo de forma atômica
+
+    Os bytes são gravados em um arquivo temporário ao lado do destino, que
+    depois o substitui com os.replace. Uma interrupção no meio da gravação
+    deixa o arquivo anterior intacto em vez de um arquivo truncado.
+
+    Args:
+        caminho: Arquivo de destino
+        dados: Conteúdo completo do arquivo
+        sincronizar: Se deve forçar a gravação em disco (fsync) antes da troca
+    """
+    temporario = f"{caminho}.tmp"
+    fd = os.open(temporario, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        visao = memoryview(dados)
+        while visao:
+            visao = visao[os.write(fd, visao):]
+        if sincronizar:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(temporario, caminho)
+
+
+def ler_json(caminho: str):
+    """
+    Lê um arquivo JSON
+
+    Raises:
+        FileNotFoundError: Se o arquivo não existir
+        ValueError: Se o conteúdo não for JSON válido
+    """
+    with open(caminho, 'rb') as arquivo:
+        return loads(arquivo.read())
+
+
+def gravar_json(caminho: str, obj, sincronizar: bool = False, compacto: bool = False):
+    """Grava um objeto em um arquivo JSON (substituição atômica; compacto omite a indentação)"""
+    escrever_atomico(caminho, dumps_compacto(obj) if compacto else dumps(obj), sincronizar)
+
+
+def iterar_jsonl(caminho: str):
+    """
+    Percorre um arquivo JSON Lines (um objeto por linha) sem carregá-lo inteiro
+
+    Linhas vazias ou corrompidas (ex.: gravação interrompida) são ignoradas.
+
+    Raises:
+        FileNotFoundError: Se o arquivo não existir
+    """
+    with open(caminho, 'rb') as arquivo:
+        for linha in arquivo:
+            if not linha.strip():
+                continue
+            try:
+                yield loads(linha)
+            except ValueError:
+                continue
+
+
+def ler_jsonl(caminho: str) -> list:
+    """Lê todos os objetos de um arquivo JSON Lines"""
+    return list(iterar_jsonl(caminho))
+
+
+def gravar_jsonl(caminho: str, itens, sincronizar: bool = False):
+    """Grava uma sequência de objetos em um arquivo JSON Lines (substituição atômica)"""
+    escrever_atomico(caminho, b"".join(dumps_linha(item) for item in itens), sincronizar)
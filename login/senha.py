@@ -1,18 +1,135 @@
+import atexit
 import hashlib
-import json
+import heapq
+import hmac
 import os
 import time
 import base64
-from datetime import datetime
+import struct
+import sys
+from collections import Counter, OrderedDict, defaultdict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from functools import cached_property
 from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from typing import Dict, Optional
-from estoque import SistemaEstoque
-from vendas import SistemaVendas
-from financeiro import SistemaFinanceiro
+from typing import Callable, Dict, Optional
+from persistencia import ler_json, gravar_json, escrever_atomico
+
+try:
+    # Opcional: Argon2id para novas senhas (sem ele continua-se usando PBKDF2)
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHash, VerificationError
+except ImportError:
+    PasswordHasher = None
+
+try:
+    # Opcional: edição de linha e histórico no input() (não existe no Windows)
+    import readline  # noqa: F401
+except ImportError:
+    readline = None
+
+try:
+    # Opcional: cópia binária de usuarios.json para carregar mais rápido na inicialização
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Iterações do PBKDF2: padrão e mínimo aceito (abaixo disso cada tentativa fica barata demais)
+ITERACOES_PADRAO = 100_000
+ITERACOES_MINIMAS = 10_000
+
+# Hasher Argon2id das novas senhas (None se argon2-cffi não estiver instalado)
+_ARGON2 = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1) if PasswordHasher else None
+
+# Verificações de senha bem-sucedidas recentes: (hash armazenado, resumo da senha) -> True.
+# O resumo usa uma chave aleatória do processo, então não serve para nada fora dele.
+_CACHE_VERIFICACAO: "OrderedDict[tuple, bool]" = OrderedDict()
+_CHAVE_CACHE_VERIFICACAO = os.urandom(32)
+_LIMITE_CACHE_VERIFICACAO = 128
+
+
+def _resumo_senha(senha: str) -> bytes:
+    """Resumo rápido (BLAKE2b com chave do processo) usado apenas como chave do cache de verificação"""
+    return hashlib.blake2b(senha.encode(), key=_CHAVE_CACHE_VERIFICACAO, digest_size=16).digest()
+
+
+# Último carimbo de data/hora gerado: [segundo (time.time() truncado), texto]
+_cached_ts = [0, ""]
+
+
+def _now_str() -> str:
+    """Data/hora atual no formato "%Y-%m-%d %H:%M:%S", refeita só quando o segundo muda"""
+    agora = int(time.time())
+    if agora != _cached_ts[0]:
+        _cached_ts[0] = agora
+        _cached_ts[1] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(agora))
+    return _cached_ts[1]
+
+
+def _verificar_hash(par: tuple) -> bool:
+    """
+    Verifica uma senha contra o hash armazenado (Argon2id ou PBKDF2)
+    
+    Não usa estado da instância, então pode rodar nas threads de
+    verificar_senhas_lote().
+    
+    Args:
+        par: Tupla (senha em texto plano, senha criptografada)
+        
+    Returns:
+        True se a senha está correta
+    """
+    senha, senha_criptografada = par
+    if senha_criptografada.startswith("$argon2"):
+        if _ARGON2 is None:
+            return False
+        try:
+            return _ARGON2.verify(senha_criptografada, senha)
+        except (VerificationError, InvalidHash):
+            return False
+    
+    try:
+        # Decodifica a string criptografada (as fatias da memoryview não copiam os bytes)
+        dados = memoryview(base64.urlsafe_b64decode(senha_criptografada.encode()))
+        
+        # Extrai salt, iterações e hash. Formatos pelo tamanho:
+        #   52 bytes: salt + iterações + hash
+        #   48 bytes: salt + hash (100.000 iterações)
+        #   60 bytes: salt + hash em base64 (formato mais antigo, 100.000 iterações)
+        salt = bytes(dados[:16])
+        if len(dados) == 52:
+            iteracoes = struct.unpack_from(">I", dados, 16)[0]
+            hash_armazenado = dados[20:]
+        else:
+            iteracoes = ITERACOES_PADRAO
+            hash_armazenado = dados[16:]
+        
+        # Deriva chave da senha fornecida
+        chave_derivada = hashlib.pbkdf2_hmac("sha256", senha.encode(), salt, iteracoes, dklen=32)
+        
+        # Senhas antigas guardavam o hash já em base64 (44 bytes em vez de 32)
+        if len(hash_armazenado) != len(chave_derivada):
+            chave_derivada = base64.urlsafe_b64encode(chave_derivada)
+        
+        # Compara os hashes em tempo constante
+        return hmac.compare_digest(hash_armazenado, chave_derivada)
+    except:
+        return False
+
+
+def _guardar_verificacao(chave_cache: tuple):
+    """Registra uma verificação bem-sucedida no cache, descartando a mais antiga se cheio"""
+    _CACHE_VERIFICACAO[chave_cache] = True
+    if len(_CACHE_VERIFICACAO) > _LIMITE_CACHE_VERIFICACAO:
+        _CACHE_VERIFICACAO.popitem(last=False)
+
 
 class SistemaLogin:
+    # Nível de cada tipo de usuário (quem tem nível maior acessa o que os menores acessam)
+    _HIERARQUIA = {"cliente": 1, "funcionario": 2, "admin": 3}
+    _TIPOS_VALIDOS = frozenset(_HIERARQUIA)
+    
     def __init__(self, arquivo_usuarios: str = "usuarios.json"):
         """
         Inicializa o sistema de login
@@ -21,12 +138,64 @@ class SistemaLogin:
             arquivo_usuarios: Nome do arquivo para armazenar os usuários
         """
         self.arquivo_usuarios = arquivo_usuarios
+        self.arquivo_cache_usuarios = os.path.splitext(arquivo_usuarios)[0] + ".cache.mp"
         self.usuario_atual = None
+        self._nivel_atual = 0
         self.usuarios = self.carregar_usuarios()
-        self.chave_mestre = self.obter_chave_mestre()
-        self.estoque = SistemaEstoque()
-        self.vendas = SistemaVendas()
-        self.financeiro = SistemaFinanceiro()
+        
+        # Índice tipo -> {usuário: None} (dict para manter a ordem de cadastro) e total de ativos
+        self._por_tipo: Dict[str, Dict[str, None]] = defaultdict(dict)
+        self._count_ativos = 0
+        for usuario, dados in self.usuarios.items():
+            self._por_tipo[dados.get("tipo")][usuario] = None
+            if dados.get("ativo", True):
+                self._count_ativos += 1
+        
+        # Gravação adiada: alterações pendentes e momento da última gravação (time.monotonic)
+        self._dirty = False
+        self._last_flush = 0.0
+        self._em_lote = False
+        atexit.register(self._salvar_usuarios_agora)
+        
+        self.pbkdf2_iters = self.iteracoes_configuradas()
+        self._ph = _ARGON2
+        
+        # Opcional (LOGIN_TEMPO_UNIFORME=1): falhas de login rápidas também pagam uma
+        # verificação completa, para não revelar pelo tempo se o usuário existe
+        self.tempo_uniforme = os.environ.get("LOGIN_TEMPO_UNIFORME") == "1"
+        self._hash_ficticio = None
+        
+        # Sistemas de estoque, vendas e financeiro: importados e carregados no primeiro uso
+        self._estoque = self._vendas = self._financeiro = None
+    
+    @property
+    def estoque(self):
+        """Sistema de estoque (carregado no primeiro acesso)"""
+        if self._estoque is None:
+            from estoque import SistemaEstoque
+            self._estoque = SistemaEstoque()
+        return self._estoque
+    
+    @property
+    def vendas(self):
+        """Sistema de vendas (carregado no primeiro acesso)"""
+        if self._vendas is None:
+            from vendas import SistemaVendas
+            self._vendas = SistemaVendas()
+        return self._vendas
+    
+    @property
+    def financeiro(self):
+        """Sistema financeiro (carregado no primeiro acesso)"""
+        if self._financeiro is None:
+            from financeiro import SistemaFinanceiro
+            self._financeiro = SistemaFinanceiro()
+        return self._financeiro
+    
+    @cached_property
+    def chave_mestre(self) -> bytes:
+        """Chave mestra, lida (ou criada) no primeiro uso em vez de a cada inicialização"""
+        return self.obter_chave_mestre()
     
     def obter_chave_mestre(self) -> bytes:
         """
@@ -57,24 +226,72 @@ class SistemaLogin:
         """
         return os.urandom(16)
     
-    def derivar_chave(self, senha: str, salt: bytes) -> bytes:
+    @staticmethod
+    def iteracoes_configuradas() -> int:
+        """
+        Número de iterações do PBKDF2 para novas senhas
+        
+        Pode ser ajustado pela variável de ambiente PBKDF2_ITERS (por exemplo
+        com o valor sugerido por calibrar()); valores abaixo de
+        ITERACOES_MINIMAS são ignorados.
+        
+        Returns:
+            Número de iterações
+        """
+        valor = os.environ.get("PBKDF2_ITERS")
+        if not valor:
+            return ITERACOES_PADRAO
+        try:
+            iteracoes = int(valor)
+        except ValueError:
+            print(f"❌ Erro: PBKDF2_ITERS inválido ({valor}), usando {ITERACOES_PADRAO}")
+            return ITERACOES_PADRAO
+        if iteracoes < ITERACOES_MINIMAS:
+            print(f"❌ Erro: PBKDF2_ITERS abaixo do mínimo ({ITERACOES_MINIMAS}), usando {ITERACOES_PADRAO}")
+            return ITERACOES_PADRAO
+        return iteracoes
+    
+    @classmethod
+    def calibrar(cls, alvo_ms: float = 8.0) -> int:
+        """
+        Mede este computador e sugere o número de iterações para um tempo alvo
+        
+        Dobra as iterações até uma derivação levar pelo menos alvo_ms e então
+        ajusta proporcionalmente, nunca abaixo de ITERACOES_MINIMAS.
+        
+        Args:
+            alvo_ms: Tempo desejado por verificação, em milissegundos
+            
+        Returns:
+            Número de iterações sugerido
+        """
+        salt = os.urandom(16)
+        iteracoes = 1000
+        while True:
+            inicio = time.perf_counter()
+            hashlib.pbkdf2_hmac("sha256", b"calibragem", salt, iteracoes, dklen=32)
+            decorrido_ms = (time.perf_counter() - inicio) * 1000
+            if decorrido_ms >= alvo_ms:
+                break
+            iteracoes *= 2
+        return max(ITERACOES_MINIMAS, int(iteracoes * alvo_ms / decorrido_ms))
+    
+    def derivar_chave(self, senha: str, salt: bytes, iteracoes: int = None) -> bytes:
         """
         Deriva uma chave da senha usando PBKDF2
         
         Args:
             senha: Senha em texto plano
             salt: Salt único
+            iteracoes: Iterações do PBKDF2 (padrão: as configuradas para novas senhas)
             
         Returns:
-            Chave derivada em bytes
+            Chave derivada em bytes (32 bytes)
         """
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        return base64.urlsafe_b64encode(kdf.derive(senha.encode()))
+        if iteracoes is None:
+            iteracoes = self.pbkdf2_iters
+        # hashlib chama o PBKDF2 do OpenSSL diretamente (mesmo resultado do PBKDF2HMAC)
+        return hashlib.pbkdf2_hmac("sha256", senha.encode(), salt, iteracoes, dklen=32)
     
     def criptografar_senha(self, senha: str) -> str:
         """
@@ -84,13 +301,15 @@ class SistemaLogin:
             senha: Senha em texto plano
             
         Returns:
-            String criptografada (salt + hash)
+            String criptografada (salt + iterações + hash)
         """
         salt = self.gerar_salt()
-        chave_derivada = self.derivar_chave(senha, salt)
+        iteracoes = self.pbkdf2_iters
+        chave_derivada = self.derivar_chave(senha, salt, iteracoes)
         
-        # Combina salt + hash para armazenamento
-        return base64.urlsafe_b64encode(salt + chave_derivada).decode()
+        # Combina salt + iterações (4 bytes) + hash, codificados uma única vez. As
+        # iterações ficam gravadas para que mudar a configuração não invalide senhas
+        return base64.urlsafe_b64encode(salt + struct.pack(">I", iteracoes) + chave_derivada).decode()
     
     def verificar_senha(self, senha: str, senha_criptografada: str) -> bool:
         """
@@ -103,25 +322,51 @@ class SistemaLogin:
         Returns:
             True se a senha está correta
         """
-        try:
-            # Decodifica a string criptografada
-            dados = base64.urlsafe_b64decode(senha_criptografada.encode())
-            
-            # Extrai salt e hash
-            salt = dados[:16]
-            hash_armazenado = dados[16:]
-            
-            # Deriva chave da senha fornecida
-            chave_derivada = self.derivar_chave(senha, salt)
+        # Logins repetidos com a mesma senha não refazem o hash
+        chave_cache = (senha_criptografada, _resumo_senha(senha))
+        if chave_cache in _CACHE_VERIFICACAO:
+            _CACHE_VERIFICACAO.move_to_end(chave_cache)
+            return True
+        
+        correta = _verificar_hash((senha, senha_criptografada))
+        
+        # Só acertos entram no cache; tentativas erradas sempre pagam o custo completo
+        if correta:
+            _guardar_verificacao(chave_cache)
+        return correta
+    
+    @staticmethod
+    def verificar_senhas_lote(pares: list) -> list:
+        """
+        Verifica várias senhas em paralelo (importações, migrações de hashes)
+        
+        Cada verificação é independente, então os pares são distribuídos entre
+        threads, uma por núcleo: o PBKDF2 (hashlib) e o Argon2 liberam o GIL
+        durante a derivação, e threads não têm o custo de iniciar processos.
+        Com um único núcleo (ou um único par) a verificação é feita direto.
+        
+        Args:
+            pares: Lista de tuplas (senha em texto plano, senha criptografada)
             
-            # Compara os hashes
-            return hash_armazenado == chave_derivada
-        except:
-            return False
+        Returns:
+            Lista de booleanos na mesma ordem dos pares
+        """
+        pares = list(pares)
+        trabalhadores = min(os.cpu_count() or 1, len(pares))
+        if trabalhadores <= 1:
+            resultados = [_verificar_hash(par) for par in pares]
+        else:
+            with ThreadPoolExecutor(max_workers=trabalhadores) as pool:
+                resultados = list(pool.map(_verificar_hash, pares))
+        
+        for (senha, senha_criptografada), correta in zip(pares, resultados):
+            if correta:
+                _guardar_verificacao((senha_criptografada, _resumo_senha(senha)))
+        return resultados
     
     def hash_senha(self, senha: str) -> str:
         """
-        Criptografa uma senha usando PBKDF2 com salt único
+        Gera o hash de uma nova senha: Argon2id se disponível, senão PBKDF2 com salt único
         
         Args:
             senha: Senha em texto plano
@@ -129,8 +374,29 @@ class SistemaLogin:
         Returns:
             Senha criptografada
         """
+        if self._ph is not None:
+            return self._ph.hash(senha)
         return self.criptografar_senha(senha)
     
+    def precisa_novo_hash(self, senha_criptografada: str) -> bool:
+        """
+        Indica se um hash deve ser refeito (PBKDF2 com Argon2 disponível, ou parâmetros antigos)
+        
+        Args:
+            senha_criptografada: Senha criptografada armazenada
+            
+        Returns:
+            True se o hash deve ser substituído no próximo login
+        """
+        if self._ph is None:
+            return False
+        if not senha_criptografada.startswith("$argon2"):
+            return True
+        try:
+            return self._ph.check_needs_rehash(senha_criptografada)
+        except InvalidHash:
+            return False
+    
     def carregar_usuarios(self) -> Dict:
         """
         Carrega os usuários do arquivo JSON
@@ -138,18 +404,77 @@ class SistemaLogin:
         Returns:
             Dicionário com os usuários
         """
-        if os.path.exists(self.arquivo_usuarios):
+        # A cópia msgpack só é usada se o JSON, que continua sendo a fonte principal
+        # (e pode ser editado à mão), tiver exatamente o tamanho e o mtime anotados nela
+        if msgpack is not None:
             try:
-                with open(self.arquivo_usuarios, 'r', encoding='utf-8') as arquivo:
-                    return json.load(arquivo)
-            except (json.JSONDecodeError, FileNotFoundError):
-                return {}
-        return {}
+                info = os.stat(self.arquivo_usuarios)
+                with open(self.arquivo_cache_usuarios, "rb") as f:
+                    cache = msgpack.unpackb(f.read(), raw=False)
+                if (isinstance(cache, dict) and cache.get("tamanho") == info.st_size
+                        and cache.get("mtime_ns") == info.st_mtime_ns):
+                    return cache["usuarios"]
+            except (OSError, ValueError, KeyError):
+                pass
+        
+        # Leitura binária decodificada por persistencia (orjson quando disponível);
+        # arquivo inexistente já cai no FileNotFoundError, sem consultar o disco antes
+        try:
+            return ler_json(self.arquivo_usuarios)
+        except (ValueError, FileNotFoundError):
+            return {}
     
     def salvar_usuarios(self):
-        """Salva os usuários no arquivo JSON"""
-        with open(self.arquivo_usuarios, 'w', encoding='utf-8') as arquivo:
-            json.dump(self.usuarios, arquivo, indent=4, ensure_ascii=False)
+        """Grava os usuários no arquivo JSON (dentro de lote(), ao final do bloco)"""
+        self._dirty = True
+        if not self._em_lote:
+            self._salvar_usuarios_agora()
+    
+    def _salvar_ultimo_login(self):
+        """
+        Marca o último login como alterado e grava no máximo a cada 2 segundos
+        
+        Vários logins seguidos são agrupados em uma única gravação; o que ficar
+        pendente é gravado na próxima alteração de usuário, no logout ou ao sair.
+        Senhas, cadastros e ativações são sempre gravados na hora (salvar_usuarios).
+        """
+        self._dirty = True
+        if not self._em_lote and time.monotonic() - self._last_flush > 2.0:
+            self._salvar_usuarios_agora()
+    
+    @contextmanager
+    def lote(self):
+        """
+        Agrupa várias alterações de usuários e grava tudo uma única vez ao final do bloco
+        
+        Exemplo:
+            with sistema.lote():
+                for usuario in usuarios:
+                    sistema.desativar_usuario(usuario)
+        """
+        anterior = self._em_lote
+        self._em_lote = True
+        try:
+            yield self
+        finally:
+            self._em_lote = anterior
+            if not anterior:
+                self._salvar_usuarios_agora()
+    
+    def _salvar_usuarios_agora(self):
+        """Grava os usuários pendentes no arquivo JSON (substituição atômica)"""
+        if not self._dirty:
+            return
+        # Arquivo temporário + fsync + os.replace: uma queda deixa a versão anterior
+        # inteira; o fsync sai barato porque as gravações já são agrupadas
+        gravar_json(self.arquivo_usuarios, self.usuarios, sincronizar=True, compacto=True)
+        if msgpack is not None:
+            # Gravada depois do JSON, anotando o tamanho e o mtime da versão que ela contém
+            info = os.stat(self.arquivo_usuarios)
+            escrever_atomico(self.arquivo_cache_usuarios, msgpack.packb(
+                {"tamanho": info.st_size, "mtime_ns": info.st_mtime_ns, "usuarios": self.usuarios}))
+        self._dirty = False
+        self._last_flush = time.monotonic()
     
     def cadastrar_usuario(self, usuario: str, senha: str, email: str = "", tipo_usuario: str = "cliente") -> bool:
         """
@@ -173,8 +498,7 @@ class SistemaLogin:
             return False
         
         # Valida o tipo de usuário
-        tipos_validos = ["cliente", "funcionario", "admin"]
-        if tipo_usuario not in tipos_validos:
+        if tipo_usuario not in self._TIPOS_VALIDOS:
             print("❌ Erro: Tipo de usuário inválido! Use: cliente, funcionario ou admin")
             return False
         
@@ -186,10 +510,12 @@ class SistemaLogin:
             "senha": senha_hash,
             "email": email,
             "tipo": tipo_usuario,
-            "data_cadastro": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "data_cadastro": _now_str(),
             "ultimo_login": None,
             "ativo": True
         }
+        self._por_tipo[tipo_usuario][usuario] = None
+        self._count_ativos += 1
         
         # Salva no arquivo
         self.salvar_usuarios()
@@ -208,9 +534,16 @@ class SistemaLogin:
             True se o login foi bem-sucedido, False caso contrário
         """
         if usuario not in self.usuarios:
+            self._igualar_tempo(senha)
             print("❌ Erro: Usuário não encontrado!")
             return False
         
+        # Toda senha cadastrada tem pelo menos 6 caracteres: não adianta derivar a chave
+        if len(senha) < 6:
+            self._igualar_tempo(senha)
+            print("❌ Erro: Senha incorreta!")
+            return False
+        
         if self.verificar_senha(senha, self.usuarios[usuario]["senha"]):
             # Verifica se o usuário está ativo
             if not self.usuarios[usuario].get("ativo", True):
@@ -218,8 +551,15 @@ class SistemaLogin:
                 return False
             
             self.usuario_atual = usuario
-            self.usuarios[usuario]["ultimo_login"] = time.strftime("%Y-%m-%d %H:%M:%S")
-            self.salvar_usuarios()
+            self._nivel_atual = self._HIERARQUIA.get(self.usuarios[usuario].get("tipo", "cliente"), 0)
+            self.usuarios[usuario]["ultimo_login"] = _now_str()
+            
+            # A senha está em mãos: aproveita para migrar hashes antigos para Argon2id
+            if self.precisa_novo_hash(self.usuarios[usuario]["senha"]):
+                self.usuarios[usuario]["senha"] = self.hash_senha(senha)
+                self.salvar_usuarios()
+            else:
+                self._salvar_ultimo_login()
             
             tipo_usuario = self.usuarios[usuario].get("tipo", "cliente")
             print(f"✅ Login realizado com sucesso! Bem-vindo, {usuario} ({tipo_usuario})!")
@@ -228,11 +568,26 @@ class SistemaLogin:
             print("❌ Erro: Senha incorreta!")
             return False
     
+    def _igualar_tempo(self, senha: str):
+        """
+        Faz uma verificação descartável quando o modo de tempo uniforme está ativo
+        
+        Args:
+            senha: Senha digitada
+        """
+        if not self.tempo_uniforme:
+            return
+        if self._hash_ficticio is None:
+            self._hash_ficticio = self.hash_senha(os.urandom(16).hex())
+        _verificar_hash((senha, self._hash_ficticio))
+    
     def fazer_logout(self):
         """Realiza o logout do usuário atual"""
         if self.usuario_atual:
             print(f"👋 Logout realizado. Até logo, {self.usuario_atual}!")
             self.usuario_atual = None
+            self._nivel_atual = 0
+            self._salvar_usuarios_agora()
         else:
             print("❌ Nenhum usuário logado!")
     
@@ -255,10 +610,16 @@ class SistemaLogin:
             print("❌ Erro: A nova senha deve ter pelo menos 6 caracteres!")
             return False
         
-        if not self.verificar_senha(senha_atual, self.usuarios[self.usuario_atual]["senha"]):
+        # Senha atual curta demais não pode estar correta (uma única derivação no caminho válido)
+        if len(senha_atual) < 6 or not self.verificar_senha(senha_atual, self.usuarios[self.usuario_atual]["senha"]):
             print("❌ Erro: Senha atual incorreta!")
             return False
         
+        # Descarta as verificações em cache do hash antigo
+        hash_antigo = self.usuarios[self.usuario_atual]["senha"]
+        for chave in [chave for chave in _CACHE_VERIFICACAO if chave[0] == hash_antigo]:
+            del _CACHE_VERIFICACAO[chave]
+        
         self.usuarios[self.usuario_atual]["senha"] = self.hash_senha(nova_senha)
         self.salvar_usuarios()
         print("✅ Senha alterada com sucesso!")
@@ -319,10 +680,8 @@ class SistemaLogin:
         if not self.usuario_atual:
             return False
         
-        hierarquia = {"cliente": 1, "funcionario": 2, "admin": 3}
-        tipo_atual = self.obter_tipo_usuario()
-        
-        return hierarquia.get(tipo_atual, 0) >= hierarquia.get(tipo_necessario, 0)
+        # Nível do usuário logado calculado uma vez no login
+        return self._nivel_atual >= self._HIERARQUIA.get(tipo_necessario, 0)
     
     def listar_usuarios_por_tipo(self, tipo: str = None) -> list:
         """
@@ -335,10 +694,18 @@ class SistemaLogin:
             Lista de usuários do tipo especificado
         """
         if tipo:
-            return [usuario for usuario, dados in self.usuarios.items() 
-                   if dados.get("tipo") == tipo]
+            return list(self._por_tipo.get(tipo, ()))
         return list(self.usuarios.keys())
     
+    def contar_usuarios_ativos(self) -> int:
+        """
+        Conta os usuários ativos (mantido a cada cadastro, ativação e desativação)
+        
+        Returns:
+            Número de usuários ativos
+        """
+        return self._count_ativos
+    
     def desativar_usuario(self, usuario: str) -> bool:
         """
         Desativa um usuário (apenas admin pode fazer isso)
@@ -357,6 +724,8 @@ class SistemaLogin:
             print("❌ Erro: Usuário não encontrado!")
             return False
         
+        if self.usuarios[usuario].get("ativo", True):
+            self._count_ativos -= 1
         self.usuarios[usuario]["ativo"] = False
         self.salvar_usuarios()
         print(f"✅ Usuário {usuario} desativado com sucesso!")
@@ -380,80 +749,298 @@ class SistemaLogin:
             print("❌ Erro: Usuário não encontrado!")
             return False
         
+        if not self.usuarios[usuario].get("ativo", True):
+            self._count_ativos += 1
         self.usuarios[usuario]["ativo"] = True
         self.salvar_usuarios()
         print(f"✅ Usuário {usuario} ativado com sucesso!")
         return True
 
+# Com a entrada vinda de um pipe ou arquivo (scripts), ninguém lê os menus: eles
+# deixam de ser exibidos e o fim da entrada encerra o programa
+_INTERATIVO = sys.stdin is not None and sys.stdin.isatty()
+
+# Opção do cadastro -> tipo de usuário
+_TIPOS_POR_OPCAO = {"1": "cliente", "2": "funcionario", "3": "admin"}
+
+
+def _ask(prompt: str, lower: bool = False, upper: bool = False) -> str:
+    """
+    Lê uma resposta do usuário sem os espaços das pontas
+    
+    Args:
+        prompt: Texto exibido antes da leitura
+        lower: Converte a resposta para minúsculas
+        upper: Converte a resposta para maiúsculas
+        
+    Returns:
+        str: Resposta digitada
+    """
+    try:
+        s = input(prompt).strip()
+    except EOFError:
+        if _INTERATIVO:
+            raise
+        # Fim da entrada não interativa: encerra como a opção "Sair"
+        print("\n👋 Obrigado por usar o sistema!")
+        sys.exit(0)
+    return s.lower() if lower else s.upper() if upper else s
+
+
+def _periodo_valido(*datas: str) -> bool:
+    """
+    Indica se todas as datas digitadas estão no formato YYYY-MM-DD
+    
+    Args:
+        datas: Datas digitadas pelo usuário
+        
+    Returns:
+        bool: True se todas forem datas válidas
+    """
+    try:
+        return all(len(d) == 10 and d[4] == d[7] == "-" and date.fromisoformat(d) for d in datas)
+    except ValueError:
+        return False
+
+
+# Textos dos menus, montados uma única vez e exibidos com um só print
+_MENU_PRINCIPAL = "\n".join([
+    "\n" + "="*50,
+    "🔐 SISTEMA DE LOGIN E SENHA",
+    "="*50,
+    "1. Cadastrar novo usuário",
+    "2. Fazer login",
+    "3. Sair",
+    "="*50,
+])
+
+
 def exibir_menu_principal():
     """Exibe o menu principal do sistema"""
-    print("\n" + "="*50)
-    print("🔐 SISTEMA DE LOGIN E SENHA")
-    print("="*50)
-    print("1. Cadastrar novo usuário")
-    print("2. Fazer login")
-    print("3. Sair")
-    print("="*50)
+    if _INTERATIVO:
+        print(_MENU_PRINCIPAL)
 
-def exibir_menu_usuario(sistema):
-    """Exibe o menu do usuário logado baseado no tipo"""
-    tipo_usuario = sistema.obter_tipo_usuario()
+def _opcao_info_conta(sistema):
+    """Mostra as informações da conta do usuário logado"""
+    print("\n📋 INFORMAÇÕES DA CONTA")
+    print("=" * 40)
+    info = sistema.obter_info_usuario()
+    if info:
+        print(f"👤 Nome de usuário: {sistema.usuario_atual}")
+        print(f"👥 Tipo: {info.get('tipo', 'cliente').upper()}")
+        print(f"📧 Email: {info.get('email', 'Não informado')}")
+        print(f"📅 Data de cadastro: {info.get('data_cadastro', 'Não informado')}")
+        print(f"🕒 Último login: {info.get('ultimo_login', 'Primeiro login')}")
+        print(f"🟢 Status: {'Ativo' if info.get('ativo', True) else 'Inativo'}")
+    
+        # Calcular tempo desde o cadastro
+        if info.get('data_cadastro'):
+            try:
+                data_cadastro = datetime.strptime(info['data_cadastro'], "%Y-%m-%d %H:%M:%S")
+            except (TypeError, ValueError):
+                data_cadastro = None
+            if data_cadastro is not None:
+                dias_cadastro = (datetime.now() - data_cadastro).days
+                print(f"⏱️  Conta criada há: {dias_cadastro} dias")
+    
+        # Mostrar se é o primeiro login
+        if info.get('ultimo_login') is None:
+            print("🎉 Esta é sua primeira vez no sistema!")
+        else:
+            print("✅ Conta ativa e funcionando")
+    
+        print("=" * 40)
+
+
+def _opcao_alterar_senha(sistema):
+    """Pede a senha atual e a nova senha do usuário logado"""
+    print("\n🔒 ALTERAR SENHA")
+    print("-" * 30)
+    senha_atual = _ask("Digite a senha atual: ")
+    nova_senha = _ask("Digite a nova senha: ")
+    confirmar_senha = _ask("Confirme a nova senha: ")
     
-    print("\n" + "="*50)
-    print(f"👤 MENU DO {tipo_usuario.upper()}")
-    print("="*50)
-    print("1. Ver informações da conta")
-    print("2. Alterar senha")
+    if nova_senha == confirmar_senha:
+        sistema.alterar_senha(senha_atual, nova_senha)
+    else:
+        print("❌ Erro: As senhas não coincidem!")
+
+
+def _opcao_gerenciar_clientes(sistema):
+    """Lista os clientes cadastrados"""
+    print("\n👥 GERENCIAR CLIENTES")
+    print("-" * 30)
+    clientes = sistema.listar_usuarios_por_tipo("cliente")
+    if clientes:
+        print("📋 Lista de clientes:")
+        for i, cliente in enumerate(clientes, 1):
+            print(f"  {i}. {cliente}")
+    else:
+        print("❌ Nenhum cliente cadastrado!")
+
+
+def _opcao_relatorios_basicos(sistema):
+    """Mostra o total de clientes e funcionários"""
+    print("\n📊 RELATÓRIOS BÁSICOS")
+    print("-" * 30)
+    total_clientes = len(sistema.listar_usuarios_por_tipo("cliente"))
+    total_funcionarios = len(sistema.listar_usuarios_por_tipo("funcionario"))
+    print(f"👥 Total de clientes: {total_clientes}")
+    print(f"👨‍💼 Total de funcionários: {total_funcionarios}")
+
+
+_MENU_USUARIOS = "\n".join([
+    "\n⚙️ GERENCIAR USUÁRIOS",
+    "-" * 30,
+    "1. Listar todos os usuários",
+    "2. Desativar usuário",
+    "3. Ativar usuário",
+])
+
+
+def _opcao_gerenciar_usuarios(sistema):
+    """Lista, desativa ou ativa usuários"""
+    if _INTERATIVO:
+        print(_MENU_USUARIOS)
+    sub_opcao = _ask("Escolha uma opção: ")
     
-    opcao_atual = 3
+    if sub_opcao == "1":
+        print("\n📋 TODOS OS USUÁRIOS:")
+        for usuario, dados in sistema.usuarios.items():
+            status = "🟢 Ativo" if dados.get("ativo", True) else "🔴 Inativo"
+            print(f"  👤 {usuario} ({dados.get('tipo', 'cliente')}) - {status}")
     
-    # Menu de estoque para funcionários e administradores
-    if sistema.tem_permissao("funcionario"):
-        print(f"{opcao_atual}. 📦 Gerenciar Estoque")
-        opcao_atual += 1
-        print(f"   └─ Cadastrar produtos, entradas e saídas")
-        print(f"{opcao_atual}. 📊 Relatórios de Estoque")
-        opcao_atual += 1
-        print(f"   └─ Consultar estoque e movimentações")
+    elif sub_opcao == "2":
+        usuario = _ask("Digite o nome do usuário a desativar: ")
+        sistema.desativar_usuario(usuario)
     
-    # Menu de vendas para funcionários e administradores
-    if sistema.tem_permissao("funcionario"):
-        print(f"{opcao_atual}. 🛒 Gerenciar Vendas")
-        opcao_atual += 1
-        print(f"   └─ Criar pedidos e gerenciar clientes")
-        print(f"{opcao_atual}. 📋 Relatórios de Vendas")
-        opcao_atual += 1
-        print(f"   └─ Consultar vendas e gerar recibos")
+    elif sub_opcao == "3":
+        usuario = _ask("Digite o nome do usuário a ativar: ")
+        sistema.ativar_usuario(usuario)
+
+
+def _opcao_relatorios_avancados(sistema):
+    """Mostra os totais de usuários, administradores e ativos"""
+    print("\n📈 RELATÓRIOS AVANÇADOS")
+    print("-" * 30)
+    total_usuarios = len(sistema.usuarios)
+    total_admins = len(sistema.listar_usuarios_por_tipo("admin"))
+    usuarios_ativos = sistema.contar_usuarios_ativos()
     
-    # Menu específico para funcionários (usuários)
-    if sistema.tem_permissao("funcionario"):
-        print(f"{opcao_atual}. Gerenciar clientes")
-        opcao_atual += 1
-        print(f"{opcao_atual}. Relatórios básicos")
-        opcao_atual += 1
+    print(f"📊 Total de usuários: {total_usuarios}")
+    print(f"👑 Administradores: {total_admins}")
+    print(f"🟢 Usuários ativos: {usuarios_ativos}")
+    print(f"🔴 Usuários inativos: {total_usuarios - usuarios_ativos}")
+
+
+def _opcao_configuracoes(sistema):
+    """Mostra as configurações do sistema"""
+    print("\n⚙️ CONFIGURAÇÕES DO SISTEMA")
+    print("-" * 30)
+    print(f"🔐 Sistema de criptografia: {'Argon2id' if sistema._ph is not None else 'PBKDF2'}")
+    print("🛡️ Níveis de segurança: Ativo")
+    print("📁 Arquivo de usuários: usuarios.json")
+    print("🔑 Chave mestra: chave_mestra.key")
+    print("📦 Arquivo de produtos: produtos.json")
+    print("📝 Arquivo de movimentos: movimentos.jsonl")
+    print("🛒 Arquivo de pedidos: pedidos.jsonl")
+    print("💰 Arquivo de contas a pagar: contas_pagar.jsonl")
+    print("💰 Arquivo de contas a receber: contas_receber.jsonl")
+
+
+def _opcao_logout(sistema):
+    """Encerra a sessão do usuário logado"""
+    sistema.fazer_logout()
+
+
+def _opcoes_menu_usuario() -> list:
+    """
+    Opções do menu do usuário logado, na ordem de exibição
+    
+    Os números das opções são atribuídos na montagem do menu, conforme as
+    opções disponíveis para o tipo do usuário.
+    
+    Returns:
+        Lista de tuplas (tipo mínimo ou None, título, detalhe ou None, função)
+    """
+    return [
+        (None, "Ver informações da conta", None, _opcao_info_conta),
+        (None, "Alterar senha", None, _opcao_alterar_senha),
+        ("funcionario", "📦 Gerenciar Estoque", "Cadastrar produtos, entradas e saídas", menu_gerenciar_estoque),
+        ("funcionario", "📊 Relatórios de Estoque", "Consultar estoque e movimentações", menu_relatorios_estoque),
+        ("funcionario", "🛒 Gerenciar Vendas", "Criar pedidos e gerenciar clientes", menu_gerenciar_vendas),
+        ("funcionario", "📋 Relatórios de Vendas", "Consultar vendas e gerar recibos", menu_relatorios_vendas),
+        ("funcionario", "Gerenciar clientes", None, _opcao_gerenciar_clientes),
+        ("funcionario", "Relatórios básicos", None, _opcao_relatorios_basicos),
+        ("admin", "Gerenciar usuários", None, _opcao_gerenciar_usuarios),
+        ("admin", "Relatórios avançados", None, _opcao_relatorios_avancados),
+        ("admin", "Configurações do sistema", None, _opcao_configuracoes),
+        ("funcionario", "💰 Gerenciar Financeiro", "Contas a pagar e receber", menu_gerenciar_financeiro),
+        ("funcionario", "📊 Relatórios Financeiros", "Análise financeira completa", menu_relatorios_financeiros),
+        (None, "Fazer logout", None, _opcao_logout),
+        # Sem ação associada: escolher esta opção mostra "Opção inválida"
+        (None, "Voltar ao menu principal", None, None),
+    ]
+
+
+# Menu do usuário já montado por tipo: (texto do menu, ações por opção digitada)
+_MENU_CACHE: Dict[str, tuple] = {}
+
+
+def _menu_usuario(tipo_usuario: str) -> tuple:
+    """
+    Texto e ações do menu de um tipo de usuário, montados uma única vez
+    
+    As ações são usadas mesmo quando o menu não é exibido (entrada não
+    interativa), por isso não dependem de exibir_menu_usuario.
+    
+    Args:
+        tipo_usuario: Tipo do usuário logado
+        
+    Returns:
+        Tupla (texto do menu, dicionário opção -> função)
+    """
+    menu = _MENU_CACHE.get(tipo_usuario)
+    if menu is None:
+        menu = _MENU_CACHE[tipo_usuario] = _montar_menu_usuario(tipo_usuario)
+    return menu
+
+
+def exibir_menu_usuario(sistema):
+    """Exibe o menu do usuário logado baseado no tipo"""
+    if not _INTERATIVO:
+        return
+    # O menu só depende do tipo: é montado uma vez e escrito de uma só vez
+    sys.stdout.write(_menu_usuario(sistema.obter_tipo_usuario())[0])
+
+
+def _montar_menu_usuario(tipo_usuario: str) -> tuple:
+    """
+    Monta o texto do menu do usuário e as ações de cada opção
     
-    # Menu específico para administradores
-    if sistema.tem_permissao("admin"):
-        print(f"{opcao_atual}. Gerenciar usuários")
-        opcao_atual += 1
-        print(f"{opcao_atual}. Relatórios avançados")
-        opcao_atual += 1
-        print(f"{opcao_atual}. Configurações do sistema")
-        opcao_atual += 1
+    Args:
+        tipo_usuario: Tipo do usuário logado
+        
+    Returns:
+        Tupla (texto completo do menu, dicionário opção -> função)
+    """
+    nivel = SistemaLogin._HIERARQUIA.get(tipo_usuario, 0)
+    linhas = ["", "="*50, f"👤 MENU DO {tipo_usuario.upper()}", "="*50]
+    acoes: Dict[str, Callable] = {}
     
-    # Menu financeiro para funcionários e administradores
-    if sistema.tem_permissao("funcionario"):
-        print(f"{opcao_atual}. 💰 Gerenciar Financeiro")
-        opcao_atual += 1
-        print(f"   └─ Contas a pagar e receber")
-        print(f"{opcao_atual}. 📊 Relatórios Financeiros")
-        opcao_atual += 1
-        print(f"   └─ Análise financeira completa")
+    numero = 1
+    for tipo_minimo, titulo, detalhe, acao in _opcoes_menu_usuario():
+        if tipo_minimo is not None and nivel < SistemaLogin._HIERARQUIA[tipo_minimo]:
+            continue
+        linhas.append(f"{numero}. {titulo}")
+        if detalhe:
+            linhas.append(f"   └─ {detalhe}")
+        if acao is not None:
+            acoes[str(numero)] = acao
+        numero += 1
     
-    print(f"{opcao_atual}. Fazer logout")
-    opcao_atual += 1
-    print(f"{opcao_atual}. Voltar ao menu principal")
-    print("="*50)
+    linhas.append("="*50)
+    return "\n".join(linhas) + "\n", acoes
 
 def main():
     """Função principal do programa"""
@@ -462,24 +1049,23 @@ def main():
     while True:
         if not sistema.esta_logado():
             exibir_menu_principal()
-            opcao = input("Escolha uma opção: ").strip()
+            opcao = _ask("Escolha uma opção: ")
             
             if opcao == "1":
                 print("\n📝 CADASTRO DE USUÁRIO")
                 print("-" * 30)
-                usuario = input("Digite o nome de usuário: ").strip()
-                senha = input("Digite a senha: ").strip()
-                email = input("Digite o email (opcional): ").strip()
+                usuario = _ask("Digite o nome de usuário: ")
+                senha = _ask("Digite a senha: ")
+                email = _ask("Digite o email (opcional): ")
                 
                 print("\n👥 TIPOS DE USUÁRIO:")
                 print("1. Cliente")
                 print("2. Funcionário")
                 print("3. Administrador")
-                tipo_opcao = input("Escolha o tipo de usuário (1-3): ").strip()
+                tipo_opcao = _ask("Escolha o tipo de usuário (1-3): ")
                 
                 # Mapeia a opção para o tipo
-                tipos = {"1": "cliente", "2": "funcionario", "3": "admin"}
-                tipo_usuario = tipos.get(tipo_opcao, "cliente")
+                tipo_usuario = _TIPOS_POR_OPCAO.get(tipo_opcao, "cliente")
                 
                 if usuario and senha:
                     sistema.cadastrar_usuario(usuario, senha, email, tipo_usuario)
@@ -489,8 +1075,8 @@ def main():
             elif opcao == "2":
                 print("\n🔑 LOGIN")
                 print("-" * 30)
-                usuario = input("Digite o nome de usuário: ").strip()
-                senha = input("Digite a senha: ").strip()
+                usuario = _ask("Digite o nome de usuário: ")
+                senha = _ask("Digite a senha: ")
                 
                 if usuario and senha:
                     sistema.fazer_login(usuario, senha)
@@ -506,198 +1092,88 @@ def main():
         
         else:
             exibir_menu_usuario(sistema)
-            opcao = input("Escolha uma opção: ").strip()
-            
-            if opcao == "1":
-                print("\n📋 INFORMAÇÕES DA CONTA")
-                print("=" * 40)
-                info = sistema.obter_info_usuario()
-                if info:
-                    print(f"👤 Nome de usuário: {sistema.usuario_atual}")
-                    print(f"👥 Tipo: {info.get('tipo', 'cliente').upper()}")
-                    print(f"📧 Email: {info.get('email', 'Não informado')}")
-                    print(f"📅 Data de cadastro: {info.get('data_cadastro', 'Não informado')}")
-                    print(f"🕒 Último login: {info.get('ultimo_login', 'Primeiro login')}")
-                    print(f"🟢 Status: {'Ativo' if info.get('ativo', True) else 'Inativo'}")
-                    
-                    # Calcular tempo desde o cadastro
-                    if info.get('data_cadastro'):
-                        try:
-                            from datetime import datetime
-                            data_cadastro = datetime.strptime(info['data_cadastro'], "%Y-%m-%d %H:%M:%S")
-                            data_atual = datetime.now()
-                            dias_cadastro = (data_atual - data_cadastro).days
-                            print(f"⏱️  Conta criada há: {dias_cadastro} dias")
-                        except:
-                            pass
-                    
-                    # Mostrar se é o primeiro login
-                    if info.get('ultimo_login') is None:
-                        print("🎉 Esta é sua primeira vez no sistema!")
-                    else:
-                        print("✅ Conta ativa e funcionando")
-                    
-                    print("=" * 40)
-            
-            elif opcao == "2":
-                print("\n🔒 ALTERAR SENHA")
-                print("-" * 30)
-                senha_atual = input("Digite a senha atual: ").strip()
-                nova_senha = input("Digite a nova senha: ").strip()
-                confirmar_senha = input("Confirme a nova senha: ").strip()
-                
-                if nova_senha == confirmar_senha:
-                    sistema.alterar_senha(senha_atual, nova_senha)
-                else:
-                    print("❌ Erro: As senhas não coincidem!")
-            
-            # Funcionalidades de estoque (opção 3) - Gerenciar Estoque
-            elif opcao == "3" and sistema.tem_permissao("funcionario"):
-                menu_gerenciar_estoque(sistema)
-            
-            # Funcionalidades de estoque (opção 4) - Relatórios de Estoque  
-            elif opcao == "4" and sistema.tem_permissao("funcionario"):
-                menu_relatorios_estoque(sistema)
-            
-            # Funcionalidades de vendas (opção 5) - Gerenciar Vendas
-            elif opcao == "5" and sistema.tem_permissao("funcionario"):
-                menu_gerenciar_vendas(sistema)
-            
-            # Funcionalidades de vendas (opção 6) - Relatórios de Vendas
-            elif opcao == "6" and sistema.tem_permissao("funcionario"):
-                menu_relatorios_vendas(sistema)
-            
-            # Funcionalidades para funcionários (opção 7) - Gerenciar Clientes
-            elif opcao == "7" and sistema.tem_permissao("funcionario"):
-                print("\n👥 GERENCIAR CLIENTES")
-                print("-" * 30)
-                clientes = sistema.listar_usuarios_por_tipo("cliente")
-                if clientes:
-                    print("📋 Lista de clientes:")
-                    for i, cliente in enumerate(clientes, 1):
-                        print(f"  {i}. {cliente}")
-                else:
-                    print("❌ Nenhum cliente cadastrado!")
-            
-            # Funcionalidades para funcionários (opção 8) - Relatórios Básicos
-            elif opcao == "8" and sistema.tem_permissao("funcionario"):
-                print("\n📊 RELATÓRIOS BÁSICOS")
-                print("-" * 30)
-                total_clientes = len(sistema.listar_usuarios_por_tipo("cliente"))
-                total_funcionarios = len(sistema.listar_usuarios_por_tipo("funcionario"))
-                print(f"👥 Total de clientes: {total_clientes}")
-                print(f"👨‍💼 Total de funcionários: {total_funcionarios}")
-            
-            # Funcionalidades para administradores (opção 9) - Gerenciar Usuários
-            elif opcao == "9" and sistema.tem_permissao("admin"):
-                print("\n⚙️ GERENCIAR USUÁRIOS")
-                print("-" * 30)
-                print("1. Listar todos os usuários")
-                print("2. Desativar usuário")
-                print("3. Ativar usuário")
-                sub_opcao = input("Escolha uma opção: ").strip()
-                
-                if sub_opcao == "1":
-                    print("\n📋 TODOS OS USUÁRIOS:")
-                    for usuario, dados in sistema.usuarios.items():
-                        status = "🟢 Ativo" if dados.get("ativo", True) else "🔴 Inativo"
-                        print(f"  👤 {usuario} ({dados.get('tipo', 'cliente')}) - {status}")
-                
-                elif sub_opcao == "2":
-                    usuario = input("Digite o nome do usuário a desativar: ").strip()
-                    sistema.desativar_usuario(usuario)
-                
-                elif sub_opcao == "3":
-                    usuario = input("Digite o nome do usuário a ativar: ").strip()
-                    sistema.ativar_usuario(usuario)
-            
-            # Funcionalidades para administradores (opção 10) - Relatórios Avançados
-            elif opcao == "10" and sistema.tem_permissao("admin"):
-                print("\n📈 RELATÓRIOS AVANÇADOS")
-                print("-" * 30)
-                total_usuarios = len(sistema.usuarios)
-                total_admins = len(sistema.listar_usuarios_por_tipo("admin"))
-                usuarios_ativos = sum(1 for dados in sistema.usuarios.values() if dados.get("ativo", True))
-                
-                print(f"📊 Total de usuários: {total_usuarios}")
-                print(f"👑 Administradores: {total_admins}")
-                print(f"🟢 Usuários ativos: {usuarios_ativos}")
-                print(f"🔴 Usuários inativos: {total_usuarios - usuarios_ativos}")
-            
-            # Funcionalidades para administradores (opção 11) - Configurações
-            elif opcao == "11" and sistema.tem_permissao("admin"):
-                print("\n⚙️ CONFIGURAÇÕES DO SISTEMA")
-                print("-" * 30)
-                print("🔐 Sistema de criptografia: PBKDF2")
-                print("🛡️ Níveis de segurança: Ativo")
-                print("📁 Arquivo de usuários: usuarios.json")
-                print("🔑 Chave mestra: chave_mestra.key")
-                print("📦 Arquivo de produtos: produtos.json")
-                print("📝 Arquivo de movimentos: movimentos.json")
-                print("💰 Arquivo de contas a pagar: contas_pagar.json")
-                print("💰 Arquivo de contas a receber: contas_receber.json")
-            
-            # Funcionalidades financeiras (opção 12) - Gerenciar Financeiro
-            elif opcao == "12" and sistema.tem_permissao("funcionario"):
-                menu_gerenciar_financeiro(sistema)
-            
-            # Funcionalidades financeiras (opção 13) - Relatórios Financeiros
-            elif opcao == "13" and sistema.tem_permissao("funcionario"):
-                menu_relatorios_financeiros(sistema)
-            
-            # Logout (opção dinâmica)
-            elif opcao in ["3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "13", "14", "15"]:
-                # Verifica se é logout baseado no tipo de usuário
-                tipo_usuario = sistema.obter_tipo_usuario()
-                
-                if tipo_usuario == "cliente":
-                    # Cliente: opção 3 = logout
-                    if opcao == "3":
-                        sistema.fazer_logout()
-                    else:
-                        print("❌ Opção inválida!")
-                
-                elif tipo_usuario == "funcionario":
-                    # Funcionário: opção 11 = logout
-                    if opcao == "11":
-                        sistema.fazer_logout()
-                    else:
-                        print("❌ Opção inválida!")
-                
-                elif tipo_usuario == "admin":
-                    # Admin: opção 14 = logout
-                    if opcao == "14":
-                        sistema.fazer_logout()
-                    else:
-                        print("❌ Opção inválida!")
+            opcao = _ask("Escolha uma opção: ")
             
+            acao = _menu_usuario(sistema.obter_tipo_usuario())[1].get(opcao)
+            if acao:
+                acao(sistema)
             else:
                 print("❌ Opção inválida!")
 
+# Modelos das linhas das tabelas dos menus, interpretados uma única vez. A precisão
+# (".19") corta o texto como o fatiamento [:19]; {0[campo]} lê o campo do registro passado
+_LINHA_PRODUTO = "{0[codigo]:<8} {0[nome]:<20.19} {0[categoria]:<15.14} R${0[preco]:<9.2f} {0[quantidade]:<8} {0[estoque_minimo]:<5} {1}".format
+_LINHA_PRODUTO_BUSCA = "{codigo:<8} {nome:<20.19} {categoria:<15.14} R${preco:<9.2f} {quantidade:<8}".format_map
+_LINHA_PRODUTO_PEDIDO = "{codigo:<8} {nome:<20.19} R${preco:<9.2f} {quantidade:<8}".format_map
+_LINHA_CLIENTE = "{id:<4} {nome:<20.19} {email:<25.24} {telefone:<15.14}".format_map
+_LINHA_PEDIDO = "{codigo:<8} {cliente_nome:<20.19} R${total:<9.2f} {status:<12} {data_criacao:.10}".format_map
+_LINHA_CONTA_PAGAR = "{0[id]:<8} {0[descricao]:<25.24} {0[categoria]:<15.14} {1:<12} {0[data_vencimento]:<12} {2}".format
+_LINHA_CONTA_PAGAR_BUSCA = "{0[id]:<8} {0[descricao]:<25.24} {0[fornecedor]:<15.14} {1:<12} {0[data_vencimento]:<12} {2}".format
+_LINHA_CONTA_RECEBER = "{0[id]:<8} {0[cliente]:<20.19} {0[descricao]:<20.19} {1:<12} {0[data_vencimento]:<12} {2}".format
+
+# Cabeçalhos correspondentes (mesmas larguras dos modelos acima)
+_CABECALHO_PRODUTO = f"{'Código':<8} {'Nome':<20} {'Categoria':<15} {'Preço':<10} {'Estoque':<8} {'Mín.':<5}"
+_CABECALHO_PRODUTO_BUSCA = f"{'Código':<8} {'Nome':<20} {'Categoria':<15} {'Preço':<10} {'Estoque':<8}"
+_CABECALHO_PRODUTO_PEDIDO = f"{'Código':<8} {'Nome':<20} {'Preço':<10} {'Estoque':<8}"
+_CABECALHO_CLIENTE = f"{'ID':<4} {'Nome':<20} {'Email':<25} {'Telefone':<15}"
+_CABECALHO_PEDIDO = f"{'Código':<8} {'Cliente':<20} {'Total':<10} {'Status':<12} {'Data'}"
+_CABECALHO_CONTA_PAGAR = f"{'ID':<8} {'Descrição':<25} {'Categoria':<15} {'Valor':<12} {'Vencimento':<12} {'Status'}"
+_CABECALHO_CONTA_PAGAR_BUSCA = f"{'ID':<8} {'Descrição':<25} {'Fornecedor':<15} {'Valor':<12} {'Vencimento':<12} {'Status'}"
+_CABECALHO_CONTA_RECEBER = f"{'ID':<8} {'Cliente':<20} {'Descrição':<20} {'Valor':<12} {'Vencimento':<12} {'Status'}"
+
+# Emoji do status das contas (os demais status são mostrados como atrasados)
+_EMOJI_PAGAR = {"pago": "✅", "pendente": "⏳"}
+_EMOJI_RECEBER = {"recebido": "✅", "pendente": "⏳"}
+
+# Emoji do tipo de movimentação (tudo que não é entrada é saída) e rótulo do tipo de conta
+_EMOJI_MOVIMENTO = {"entrada": "📦", "saida": "📤"}
+_ROTULO_TIPO_CONTA = {"pagar": "PAGAR", "receber": "RECEBER"}
+
+
+def _imprimir_tabela(cabecalho: str, largura: int, linhas):
+    """
+    Escreve uma tabela (cabeçalho, separador e linhas) com uma única chamada a sys.stdout.write
+    
+    Args:
+        cabecalho: Linha de títulos das colunas
+        largura: Largura do separador abaixo do cabeçalho
+        linhas: Linhas já formatadas
+    """
+    tabela = [cabecalho, "-" * largura]
+    tabela.extend(linhas)
+    _escrever_linhas(tabela)
+
+
+_MENU_ESTOQUE = "\n".join([
+    "\n📦 GERENCIAR ESTOQUE",
+    "=" * 40,
+    "1. Cadastrar produto",
+    "2. Listar produtos",
+    "3. Buscar produto",
+    "4. Entrada de estoque",
+    "5. Saída de estoque",
+    "6. Excluir produto",
+    "7. Voltar ao menu anterior",
+    "=" * 40,
+])
+
+
 def menu_gerenciar_estoque(sistema):
     """Menu para gerenciar estoque"""
     while True:
-        print("\n📦 GERENCIAR ESTOQUE")
-        print("=" * 40)
-        print("1. Cadastrar produto")
-        print("2. Listar produtos")
-        print("3. Buscar produto")
-        print("4. Entrada de estoque")
-        print("5. Saída de estoque")
-        print("6. Excluir produto")
-        print("7. Voltar ao menu anterior")
-        print("=" * 40)
+        if _INTERATIVO:
+            print(_MENU_ESTOQUE)
         
-        opcao = input("Escolha uma opção: ").strip()
+        opcao = _ask("Escolha uma opção: ")
         
         if opcao == "1":
             print("\n📝 CADASTRAR PRODUTO")
             print("-" * 30)
-            nome = input("Nome do produto: ").strip()
-            categoria = input("Categoria: ").strip()
+            nome = _ask("Nome do produto: ")
+            categoria = _ask("Categoria: ")
             try:
-                preco = float(input("Preço unitário: R$ ").strip())
-                estoque_minimo = int(input("Estoque mínimo (padrão 5): ").strip() or "5")
+                preco = float(_ask("Preço unitário: R$ "))
+                estoque_minimo = int(_ask("Estoque mínimo (padrão 5): ") or "5")
                 
                 sistema.estoque.cadastrar_produto(nome, categoria, preco, estoque_minimo, sistema.usuario_atual)
             except ValueError:
@@ -708,35 +1184,30 @@ def menu_gerenciar_estoque(sistema):
             print("-" * 30)
             produtos = sistema.estoque.listar_produtos()
             if produtos:
-                print(f"{'Código':<8} {'Nome':<20} {'Categoria':<15} {'Preço':<10} {'Estoque':<8} {'Mín.':<5}")
-                print("-" * 70)
-                for produto in produtos:
-                    alerta = "⚠️" if produto["quantidade"] <= produto["estoque_minimo"] else "  "
-                    print(f"{produto['codigo']:<8} {produto['nome'][:19]:<20} {produto['categoria'][:14]:<15} R${produto['preco']:<9.2f} {produto['quantidade']:<8} {produto['estoque_minimo']:<5} {alerta}")
+                _imprimir_tabela(_CABECALHO_PRODUTO, 70, (
+                    _LINHA_PRODUTO(produto, "⚠️" if produto["quantidade"] <= produto["estoque_minimo"] else "  ")
+                    for produto in produtos))
             else:
                 print("❌ Nenhum produto cadastrado!")
         
         elif opcao == "3":
             print("\n🔍 BUSCAR PRODUTO")
             print("-" * 30)
-            termo = input("Digite código, nome ou categoria: ").strip()
+            termo = _ask("Digite código, nome ou categoria: ")
             if termo:
                 produtos = sistema.estoque.buscar_produto(termo)
                 if produtos:
-                    print(f"{'Código':<8} {'Nome':<20} {'Categoria':<15} {'Preço':<10} {'Estoque':<8}")
-                    print("-" * 65)
-                    for produto in produtos:
-                        print(f"{produto['codigo']:<8} {produto['nome'][:19]:<20} {produto['categoria'][:14]:<15} R${produto['preco']:<9.2f} {produto['quantidade']:<8}")
+                    _imprimir_tabela(_CABECALHO_PRODUTO_BUSCA, 65, map(_LINHA_PRODUTO_BUSCA, produtos))
                 else:
                     print("❌ Nenhum produto encontrado!")
         
         elif opcao == "4":
             print("\n📦 ENTRADA DE ESTOQUE")
             print("-" * 30)
-            codigo = input("Código do produto: ").strip().upper()
+            codigo = _ask("Código do produto: ", upper=True)
             try:
-                quantidade = int(input("Quantidade: ").strip())
-                observacao = input("Observação (opcional): ").strip()
+                quantidade = int(_ask("Quantidade: "))
+                observacao = _ask("Observação (opcional): ")
                 
                 sistema.estoque.registrar_movimento(codigo, "entrada", quantidade, observacao, sistema.usuario_atual)
             except ValueError:
@@ -745,10 +1216,10 @@ def menu_gerenciar_estoque(sistema):
         elif opcao == "5":
             print("\n📤 SAÍDA DE ESTOQUE")
             print("-" * 30)
-            codigo = input("Código do produto: ").strip().upper()
+            codigo = _ask("Código do produto: ", upper=True)
             try:
-                quantidade = int(input("Quantidade: ").strip())
-                observacao = input("Observação (opcional): ").strip()
+                quantidade = int(_ask("Quantidade: "))
+                observacao = _ask("Observação (opcional): ")
                 
                 sistema.estoque.registrar_movimento(codigo, "saida", quantidade, observacao, sistema.usuario_atual)
             except ValueError:
@@ -757,8 +1228,8 @@ def menu_gerenciar_estoque(sistema):
         elif opcao == "6" and sistema.tem_permissao("admin"):
             print("\n🗑️ EXCLUIR PRODUTO")
             print("-" * 30)
-            codigo = input("Código do produto: ").strip().upper()
-            confirmacao = input("Tem certeza? (s/N): ").strip().lower()
+            codigo = _ask("Código do produto: ", upper=True)
+            confirmacao = _ask("Tem certeza? (s/N): ", lower=True)
             if confirmacao == 's':
                 sistema.estoque.excluir_produto(codigo, sistema.usuario_atual)
         
@@ -768,85 +1239,99 @@ def menu_gerenciar_estoque(sistema):
         else:
             print("❌ Opção inválida!")
 
+def _escrever_linhas(linhas: list):
+    """Escreve as linhas de um relatório com uma única chamada a sys.stdout.write"""
+    if linhas:
+        sys.stdout.write("\n".join(linhas) + "\n")
+
+
+_MENU_RELATORIOS_ESTOQUE = "\n".join([
+    "\n📊 RELATÓRIOS DE ESTOQUE",
+    "=" * 40,
+    "1. Relatório geral do estoque",
+    "2. Produtos com estoque baixo",
+    "3. Últimas movimentações",
+    "4. Buscar movimentações por produto",
+    "5. Voltar ao menu anterior",
+    "=" * 40,
+])
+
+
 def menu_relatorios_estoque(sistema):
     """Menu para relatórios de estoque"""
     while True:
-        print("\n📊 RELATÓRIOS DE ESTOQUE")
-        print("=" * 40)
-        print("1. Relatório geral do estoque")
-        print("2. Produtos com estoque baixo")
-        print("3. Últimas movimentações")
-        print("4. Buscar movimentações por produto")
-        print("5. Voltar ao menu anterior")
-        print("=" * 40)
+        if _INTERATIVO:
+            print(_MENU_RELATORIOS_ESTOQUE)
         
-        opcao = input("Escolha uma opção: ").strip()
+        opcao = _ask("Escolha uma opção: ")
         
         if opcao == "1":
-            print("\n📈 RELATÓRIO GERAL DO ESTOQUE")
-            print("=" * 50)
+            linhas = ["\n📈 RELATÓRIO GERAL DO ESTOQUE", "=" * 50]
             relatorio = sistema.estoque.relatorio_estoque()
             
-            print(f"📦 Total de produtos: {relatorio['total_produtos']}")
-            print(f"📊 Total de itens: {relatorio['total_itens']}")
-            print(f"💰 Valor total: R$ {relatorio['valor_total']:.2f}")
-            print(f"⚪ Produtos zerados: {relatorio['produtos_zerados']}")
-            print(f"⚠️ Produtos com estoque baixo: {relatorio['produtos_estoque_baixo']}")
+            linhas.append(f"📦 Total de produtos: {relatorio['total_produtos']}")
+            linhas.append(f"📊 Total de itens: {relatorio['total_itens']}")
+            linhas.append(f"💰 Valor total: R$ {relatorio['valor_total']:.2f}")
+            linhas.append(f"⚪ Produtos zerados: {relatorio['produtos_zerados']}")
+            linhas.append(f"⚠️ Produtos com estoque baixo: {relatorio['produtos_estoque_baixo']}")
             
             if relatorio['categorias']:
-                print("\n📋 Por categoria:")
+                linhas.append("\n📋 Por categoria:")
                 for cat, dados in relatorio['categorias'].items():
-                    print(f"  {cat}: {dados['produtos']} produtos, {dados['itens']} itens, R$ {dados['valor']:.2f}")
+                    linhas.append(f"  {cat}: {dados['produtos']} produtos, {dados['itens']} itens, R$ {dados['valor']:.2f}")
             
-            print(f"\n📅 Relatório gerado em: {relatorio['data_relatorio']}")
+            linhas.append(f"\n📅 Relatório gerado em: {relatorio['data_relatorio']}")
+            _escrever_linhas(linhas)
         
         elif opcao == "2":
-            print("\n⚠️ PRODUTOS COM ESTOQUE BAIXO")
-            print("-" * 40)
+            linhas = ["\n⚠️ PRODUTOS COM ESTOQUE BAIXO", "-" * 40]
             produtos = sistema.estoque.obter_produtos_estoque_baixo()
             if produtos:
-                print(f"{'Código':<8} {'Nome':<20} {'Atual':<6} {'Mín.':<5} {'Status'}")
-                print("-" * 50)
+                linhas.append(f"{'Código':<8} {'Nome':<20} {'Atual':<6} {'Mín.':<5} {'Status'}")
+                linhas.append("-" * 50)
                 for produto in produtos:
                     status = "ZERADO" if produto["quantidade"] == 0 else "BAIXO"
-                    print(f"{produto['codigo']:<8} {produto['nome'][:19]:<20} {produto['quantidade']:<6} {produto['estoque_minimo']:<5} {status}")
+                    linhas.append(f"{produto['codigo']:<8} {produto['nome'][:19]:<20} {produto['quantidade']:<6} {produto['estoque_minimo']:<5} {status}")
             else:
-                print("✅ Nenhum produto com estoque baixo!")
+                linhas.append("✅ Nenhum produto com estoque baixo!")
+            _escrever_linhas(linhas)
         
         elif opcao == "3":
-            print("\n📝 ÚLTIMAS MOVIMENTAÇÕES")
-            print("-" * 40)
+            linhas = ["\n📝 ÚLTIMAS MOVIMENTAÇÕES", "-" * 40]
             movimentos = sistema.estoque.relatorio_movimentos(20)
             if movimentos:
-                print(f"{'Data/Hora':<17} {'Tipo':<8} {'Produto':<15} {'Qtd':<5} {'Usuário':<10}")
-                print("-" * 60)
+                linhas.append(f"{'Data/Hora':<17} {'Tipo':<8} {'Produto':<15} {'Qtd':<5} {'Usuário':<10}")
+                linhas.append("-" * 60)
                 for mov in movimentos:
-                    emoji = "📦" if mov["tipo"] == "entrada" else "📤"
-                    print(f"{mov['data_hora']:<17} {emoji} {mov['tipo'][:7]:<8} {mov['nome_produto'][:14]:<15} {mov['quantidade']:<5} {mov['usuario'][:9]:<10}")
+                    emoji = _EMOJI_MOVIMENTO.get(mov["tipo"], "📤")
+                    linhas.append(f"{mov['data_hora']:<17} {emoji} {mov['tipo'][:7]:<8} {mov['nome_produto'][:14]:<15} {mov['quantidade']:<5} {mov['usuario'][:9]:<10}")
             else:
-                print("❌ Nenhuma movimentação registrada!")
+                linhas.append("❌ Nenhuma movimentação registrada!")
+            _escrever_linhas(linhas)
         
         elif opcao == "4":
             print("\n🔍 MOVIMENTAÇÕES POR PRODUTO")
             print("-" * 40)
-            termo = input("Digite código ou nome do produto: ").strip()
+            termo = _ask("Digite código ou nome do produto: ")
+            linhas = []
             if termo:
                 produtos = sistema.estoque.buscar_produto(termo)
                 if produtos:
                     codigo = produtos[0]["codigo"]
-                    movimentos = [m for m in sistema.estoque.movimentos if m["codigo_produto"] == codigo]
+                    movimentos = sistema.estoque.movimentos_por_codigo.get(codigo, [])[-10:]  # Últimas 10
                     
                     if movimentos:
-                        print(f"\nMovimentações de {produtos[0]['nome']}:")
-                        print(f"{'Data/Hora':<17} {'Tipo':<8} {'Qtd':<5} {'Ant.':<5} {'Atual':<5} {'Usuário'}")
-                        print("-" * 55)
-                        for mov in movimentos[-10:]:  # Últimas 10
-                            emoji = "📦" if mov["tipo"] == "entrada" else "📤"
-                            print(f"{mov['data_hora']:<17} {emoji} {mov['tipo'][:7]:<8} {mov['quantidade']:<5} {mov['estoque_anterior']:<5} {mov['estoque_atual']:<5} {mov['usuario']}")
+                        linhas.append(f"\nMovimentações de {produtos[0]['nome']}:")
+                        linhas.append(f"{'Data/Hora':<17} {'Tipo':<8} {'Qtd':<5} {'Ant.':<5} {'Atual':<5} {'Usuário'}")
+                        linhas.append("-" * 55)
+                        for mov in movimentos:
+                            emoji = _EMOJI_MOVIMENTO.get(mov["tipo"], "📤")
+                            linhas.append(f"{mov['data_hora']:<17} {emoji} {mov['tipo'][:7]:<8} {mov['quantidade']:<5} {mov['estoque_anterior']:<5} {mov['estoque_atual']:<5} {mov['usuario']}")
                     else:
-                        print("❌ Nenhuma movimentação encontrada!")
+                        linhas.append("❌ Nenhuma movimentação encontrada!")
                 else:
-                    print("❌ Produto não encontrado!")
+                    linhas.append("❌ Produto não encontrado!")
+            _escrever_linhas(linhas)
         
         elif opcao == "5":
             break
@@ -854,31 +1339,41 @@ def menu_relatorios_estoque(sistema):
         else:
             print("❌ Opção inválida!")
 
+# Status aceitos na atualização de pedidos
+_STATUS_PEDIDO = frozenset({"pendente", "aprovado", "cancelado", "finalizado"})
+
+
+_MENU_VENDAS = "\n".join([
+    "\n🛒 GERENCIAR VENDAS",
+    "=" * 40,
+    "1. Cadastrar cliente",
+    "2. Listar clientes",
+    "3. Buscar cliente",
+    "4. Criar pedido",
+    "5. Listar pedidos",
+    "6. Buscar pedido",
+    "7. Atualizar status do pedido",
+    "8. Gerar recibo PDF",
+    "9. Voltar ao menu anterior",
+    "=" * 40,
+])
+
+
 def menu_gerenciar_vendas(sistema):
     """Menu para gerenciar vendas"""
     while True:
-        print("\n🛒 GERENCIAR VENDAS")
-        print("=" * 40)
-        print("1. Cadastrar cliente")
-        print("2. Listar clientes")
-        print("3. Buscar cliente")
-        print("4. Criar pedido")
-        print("5. Listar pedidos")
-        print("6. Buscar pedido")
-        print("7. Atualizar status do pedido")
-        print("8. Gerar recibo PDF")
-        print("9. Voltar ao menu anterior")
-        print("=" * 40)
+        if _INTERATIVO:
+            print(_MENU_VENDAS)
         
-        opcao = input("Escolha uma opção: ").strip()
+        opcao = _ask("Escolha uma opção: ")
         
         if opcao == "1":
             print("\n👤 CADASTRAR CLIENTE")
             print("-" * 30)
-            nome = input("Nome do cliente: ").strip()
-            email = input("Email: ").strip()
-            telefone = input("Telefone: ").strip()
-            endereco = input("Endereço (opcional): ").strip()
+            nome = _ask("Nome do cliente: ")
+            email = _ask("Email: ")
+            telefone = _ask("Telefone: ")
+            endereco = _ask("Endereço (opcional): ")
             
             sistema.vendas.cadastrar_cliente(nome, email, telefone, endereco, sistema.usuario_atual)
         
@@ -887,24 +1382,18 @@ def menu_gerenciar_vendas(sistema):
             print("-" * 30)
             clientes = sistema.vendas.listar_clientes()
             if clientes:
-                print(f"{'ID':<4} {'Nome':<20} {'Email':<25} {'Telefone':<15}")
-                print("-" * 70)
-                for cliente in clientes:
-                    print(f"{cliente['id']:<4} {cliente['nome'][:19]:<20} {cliente['email'][:24]:<25} {cliente['telefone'][:14]:<15}")
+                _imprimir_tabela(_CABECALHO_CLIENTE, 70, map(_LINHA_CLIENTE, clientes))
             else:
                 print("❌ Nenhum cliente cadastrado!")
         
         elif opcao == "3":
             print("\n🔍 BUSCAR CLIENTE")
             print("-" * 30)
-            termo = input("Digite ID, nome ou email: ").strip()
+            termo = _ask("Digite ID, nome ou email: ")
             if termo:
                 clientes = sistema.vendas.buscar_cliente(termo)
                 if clientes:
-                    print(f"{'ID':<4} {'Nome':<20} {'Email':<25} {'Telefone':<15}")
-                    print("-" * 70)
-                    for cliente in clientes:
-                        print(f"{cliente['id']:<4} {cliente['nome'][:19]:<20} {cliente['email'][:24]:<25} {cliente['telefone'][:14]:<15}")
+                    _imprimir_tabela(_CABECALHO_CLIENTE, 70, map(_LINHA_CLIENTE, clientes))
                 else:
                     print("❌ Nenhum cliente encontrado!")
         
@@ -913,7 +1402,7 @@ def menu_gerenciar_vendas(sistema):
             print("-" * 30)
             
             # Seleciona cliente
-            cliente_id = input("ID do cliente: ").strip()
+            cliente_id = _ask("ID do cliente: ")
             if cliente_id not in sistema.vendas.clientes:
                 print("❌ Cliente não encontrado!")
                 continue
@@ -925,33 +1414,29 @@ def menu_gerenciar_vendas(sistema):
                 continue
             
             print("\n📦 PRODUTOS DISPONÍVEIS:")
-            print(f"{'Código':<8} {'Nome':<20} {'Preço':<10} {'Estoque':<8}")
-            print("-" * 50)
-            for produto in produtos_estoque:
-                print(f"{produto['codigo']:<8} {produto['nome'][:19]:<20} R${produto['preco']:<9.2f} {produto['quantidade']:<8}")
+            _imprimir_tabela(_CABECALHO_PRODUTO_PEDIDO, 50, map(_LINHA_PRODUTO_PEDIDO, produtos_estoque))
+            
+            # Índice código -> produto para as buscas do laço abaixo
+            produtos_por_codigo = {produto['codigo']: produto for produto in produtos_estoque}
             
             # Adiciona produtos ao pedido
             produtos_pedido = []
             while True:
                 print("\nAdicionar produto ao pedido:")
-                codigo_produto = input("Código do produto (ou 'fim' para finalizar): ").strip().upper()
+                codigo_produto = _ask("Código do produto (ou 'fim' para finalizar): ", upper=True)
                 
                 if codigo_produto.lower() == 'fim':
                     break
                 
                 # Encontra o produto
-                produto_encontrado = None
-                for produto in produtos_estoque:
-                    if produto['codigo'] == codigo_produto:
-                        produto_encontrado = produto
-                        break
+                produto_encontrado = produtos_por_codigo.get(codigo_produto)
                 
                 if not produto_encontrado:
                     print("❌ Produto não encontrado!")
                     continue
                 
                 try:
-                    quantidade = int(input(f"Quantidade de {produto_encontrado['nome']}: ").strip())
+                    quantidade = int(_ask(f"Quantidade de {produto_encontrado['nome']}: "))
                     if quantidade <= 0:
                         print("❌ Quantidade deve ser maior que zero!")
                         continue
@@ -973,21 +1458,16 @@ def menu_gerenciar_vendas(sistema):
                     print("❌ Quantidade inválida!")
             
             if produtos_pedido:
-                observacoes = input("Observações do pedido (opcional): ").strip()
+                observacoes = _ask("Observações do pedido (opcional): ")
                 
                 # Cria o pedido
                 codigo_pedido = sistema.vendas.criar_pedido(cliente_id, produtos_pedido, observacoes, sistema.usuario_atual)
                 
                 if codigo_pedido:
-                    # Atualiza estoque (saída automática)
-                    for item in produtos_pedido:
-                        sistema.estoque.registrar_movimento(
-                            item['codigo'], 
-                            "saida", 
-                            item['quantidade'], 
-                            f"Venda - Pedido {codigo_pedido}", 
-                            sistema.usuario_atual
-                        )
+                    # Atualiza estoque (saída automática), gravando uma única vez
+                    sistema.estoque.registrar_movimentos_lote(
+                        produtos_pedido, "saida", f"Venda - Pedido {codigo_pedido}", sistema.usuario_atual
+                    )
             else:
                 print("❌ Pedido deve ter pelo menos um produto!")
         
@@ -996,35 +1476,29 @@ def menu_gerenciar_vendas(sistema):
             print("-" * 30)
             pedidos = sistema.vendas.listar_pedidos()
             if pedidos:
-                print(f"{'Código':<8} {'Cliente':<20} {'Total':<10} {'Status':<12} {'Data'}")
-                print("-" * 65)
-                for pedido in pedidos:
-                    print(f"{pedido['codigo']:<8} {pedido['cliente_nome'][:19]:<20} R${pedido['total']:<9.2f} {pedido['status']:<12} {pedido['data_criacao'][:10]}")
+                _imprimir_tabela(_CABECALHO_PEDIDO, 65, map(_LINHA_PEDIDO, pedidos))
             else:
                 print("❌ Nenhum pedido encontrado!")
         
         elif opcao == "6":
             print("\n🔍 BUSCAR PEDIDO")
             print("-" * 30)
-            termo = input("Digite código do pedido ou nome do cliente: ").strip()
+            termo = _ask("Digite código do pedido ou nome do cliente: ")
             if termo:
                 pedidos = sistema.vendas.buscar_pedido(termo)
                 if pedidos:
-                    print(f"{'Código':<8} {'Cliente':<20} {'Total':<10} {'Status':<12} {'Data'}")
-                    print("-" * 65)
-                    for pedido in pedidos:
-                        print(f"{pedido['codigo']:<8} {pedido['cliente_nome'][:19]:<20} R${pedido['total']:<9.2f} {pedido['status']:<12} {pedido['data_criacao'][:10]}")
+                    _imprimir_tabela(_CABECALHO_PEDIDO, 65, map(_LINHA_PEDIDO, pedidos))
                 else:
                     print("❌ Nenhum pedido encontrado!")
         
         elif opcao == "7":
             print("\n📝 ATUALIZAR STATUS DO PEDIDO")
             print("-" * 30)
-            codigo_pedido = input("Código do pedido: ").strip().upper()
+            codigo_pedido = _ask("Código do pedido: ", upper=True)
             print("Status disponíveis: pendente, aprovado, cancelado, finalizado")
-            novo_status = input("Novo status: ").strip().lower()
+            novo_status = _ask("Novo status: ", lower=True)
             
-            if novo_status in ["pendente", "aprovado", "cancelado", "finalizado"]:
+            if novo_status in _STATUS_PEDIDO:
                 sistema.vendas.atualizar_status_pedido(codigo_pedido, novo_status, sistema.usuario_atual)
             else:
                 print("❌ Status inválido!")
@@ -1032,7 +1506,7 @@ def menu_gerenciar_vendas(sistema):
         elif opcao == "8":
             print("\n📄 GERAR RECIBO PDF")
             print("-" * 30)
-            codigo_pedido = input("Código do pedido: ").strip().upper()
+            codigo_pedido = _ask("Código do pedido: ", upper=True)
             
             caminho_pdf = sistema.vendas.gerar_recibo_pdf(codigo_pedido)
             if caminho_pdf:
@@ -1044,83 +1518,88 @@ def menu_gerenciar_vendas(sistema):
         else:
             print("❌ Opção inválida!")
 
+
+_MENU_RELATORIOS_VENDAS = "\n".join([
+    "\n📋 RELATÓRIOS DE VENDAS",
+    "=" * 40,
+    "1. Relatório geral de vendas",
+    "2. Relatório por período",
+    "3. Top produtos vendidos",
+    "4. Pedidos por status",
+    "5. Voltar ao menu anterior",
+    "=" * 40,
+])
+
+
 def menu_relatorios_vendas(sistema):
     """Menu para relatórios de vendas"""
     while True:
-        print("\n📋 RELATÓRIOS DE VENDAS")
-        print("=" * 40)
-        print("1. Relatório geral de vendas")
-        print("2. Relatório por período")
-        print("3. Top produtos vendidos")
-        print("4. Pedidos por status")
-        print("5. Voltar ao menu anterior")
-        print("=" * 40)
+        if _INTERATIVO:
+            print(_MENU_RELATORIOS_VENDAS)
         
-        opcao = input("Escolha uma opção: ").strip()
+        opcao = _ask("Escolha uma opção: ")
         
         if opcao == "1":
-            print("\n📈 RELATÓRIO GERAL DE VENDAS")
-            print("=" * 50)
+            linhas = ["\n📈 RELATÓRIO GERAL DE VENDAS", "=" * 50]
             relatorio = sistema.vendas.relatorio_vendas()
             
-            print(f"📊 Total de pedidos: {relatorio['total_pedidos']}")
-            print(f"💰 Total de vendas: R$ {relatorio['total_vendas']:.2f}")
-            print(f"✅ Pedidos finalizados: {relatorio['pedidos_finalizados']}")
-            print(f"⏳ Pedidos pendentes: {relatorio['pedidos_pendentes']}")
+            linhas.append(f"📊 Total de pedidos: {relatorio['total_pedidos']}")
+            linhas.append(f"💰 Total de vendas: R$ {relatorio['total_vendas']:.2f}")
+            linhas.append(f"✅ Pedidos finalizados: {relatorio['pedidos_finalizados']}")
+            linhas.append(f"⏳ Pedidos pendentes: {relatorio['pedidos_pendentes']}")
             
             if relatorio['top_produtos']:
-                print("\n🏆 TOP 5 PRODUTOS MAIS VENDIDOS:")
+                linhas.append("\n🏆 TOP 5 PRODUTOS MAIS VENDIDOS:")
                 for i, (produto, dados) in enumerate(relatorio['top_produtos'], 1):
-                    print(f"  {i}. {produto}: {dados['quantidade']} unidades - R$ {dados['valor']:.2f}")
+                    linhas.append(f"  {i}. {produto}: {dados['quantidade']} unidades - R$ {dados['valor']:.2f}")
             
-            print(f"\n📅 Relatório gerado em: {relatorio['data_relatorio']}")
+            linhas.append(f"\n📅 Relatório gerado em: {relatorio['data_relatorio']}")
+            _escrever_linhas(linhas)
         
         elif opcao == "2":
             print("\n📅 RELATÓRIO POR PERÍODO")
             print("-" * 30)
-            data_inicio = input("Data de início (YYYY-MM-DD): ").strip()
-            data_fim = input("Data de fim (YYYY-MM-DD): ").strip()
+            data_inicio = _ask("Data de início (YYYY-MM-DD): ")
+            data_fim = _ask("Data de fim (YYYY-MM-DD): ")
+            linhas = []
             
-            if data_inicio and data_fim:
+            if _periodo_valido(data_inicio, data_fim):
                 relatorio = sistema.vendas.relatorio_vendas(data_inicio, data_fim)
                 
-                print(f"\n📊 Relatório de {data_inicio} a {data_fim}")
-                print(f"📊 Total de pedidos: {relatorio['total_pedidos']}")
-                print(f"💰 Total de vendas: R$ {relatorio['total_vendas']:.2f}")
-                print(f"✅ Pedidos finalizados: {relatorio['pedidos_finalizados']}")
-                print(f"⏳ Pedidos pendentes: {relatorio['pedidos_pendentes']}")
+                linhas.append(f"\n📊 Relatório de {data_inicio} a {data_fim}")
+                linhas.append(f"📊 Total de pedidos: {relatorio['total_pedidos']}")
+                linhas.append(f"💰 Total de vendas: R$ {relatorio['total_vendas']:.2f}")
+                linhas.append(f"✅ Pedidos finalizados: {relatorio['pedidos_finalizados']}")
+                linhas.append(f"⏳ Pedidos pendentes: {relatorio['pedidos_pendentes']}")
             else:
-                print("❌ Datas inválidas!")
+                linhas.append("❌ Datas inválidas!")
+            _escrever_linhas(linhas)
         
         elif opcao == "3":
-            print("\n🏆 TOP PRODUTOS VENDIDOS")
-            print("-" * 30)
+            linhas = ["\n🏆 TOP PRODUTOS VENDIDOS", "-" * 30]
             relatorio = sistema.vendas.relatorio_vendas()
             
             if relatorio['produtos_vendidos']:
-                print(f"{'Produto':<25} {'Quantidade':<12} {'Valor Total':<12}")
-                print("-" * 50)
-                for produto, dados in sorted(relatorio['produtos_vendidos'].items(), 
-                                           key=lambda x: x[1]['quantidade'], reverse=True):
-                    print(f"{produto[:24]:<25} {dados['quantidade']:<12} R$ {dados['valor']:<11.2f}")
+                linhas.append(f"{'Produto':<25} {'Quantidade':<12} {'Valor Total':<12}")
+                linhas.append("-" * 50)
+                # Só os 20 mais vendidos: heap limitado em vez de ordenar todos os produtos
+                for produto, dados in heapq.nlargest(20, relatorio['produtos_vendidos'].items(),
+                                                     key=lambda x: x[1]['quantidade']):
+                    linhas.append(f"{produto[:24]:<25} {dados['quantidade']:<12} R$ {dados['valor']:<11.2f}")
             else:
-                print("❌ Nenhuma venda registrada!")
+                linhas.append("❌ Nenhuma venda registrada!")
+            _escrever_linhas(linhas)
         
         elif opcao == "4":
-            print("\n📊 PEDIDOS POR STATUS")
-            print("-" * 30)
-            pedidos = sistema.vendas.listar_pedidos()
+            linhas = ["\n📊 PEDIDOS POR STATUS", "-" * 30]
+            status_count = Counter(pedido['status'] for pedido in sistema.vendas.iter_pedidos())
             
-            if pedidos:
-                status_count = {}
-                for pedido in pedidos:
-                    status = pedido['status']
-                    status_count[status] = status_count.get(status, 0) + 1
-                
+            if status_count:
                 for status, count in status_count.items():
-                    print(f"  {status.upper()}: {count} pedidos")
+                    linhas.append(f"  {status.upper()}: {count} pedidos")
             else:
-                print("❌ Nenhum pedido encontrado!")
+                linhas.append("❌ Nenhum pedido encontrado!")
+            _escrever_linhas(linhas)
         
         elif opcao == "5":
             break
@@ -1128,26 +1607,35 @@ def menu_relatorios_vendas(sistema):
         else:
             print("❌ Opção inválida!")
 
+
+_MENU_FINANCEIRO = "\n".join([
+    "\n💰 GERENCIAR FINANCEIRO",
+    "=" * 50,
+    "1. Cadastrar conta a pagar",
+    "2. Cadastrar conta a receber",
+    "3. Listar contas a pagar",
+    "4. Listar contas a receber",
+    "5. Buscar conta a pagar",
+    "6. Buscar conta a receber",
+    "7. Registrar pagamento",
+    "8. Registrar recebimento",
+    "9. Excluir conta a pagar",
+    "10. Excluir conta a receber",
+    "11. Alertas de vencimento",
+    "12. Voltar ao menu anterior",
+    "=" * 50,
+])
+
+
 def menu_gerenciar_financeiro(sistema):
     """Menu para gerenciar financeiro"""
+    # Método de formatação resolvido uma vez para todas as listagens do menu
+    formatar_valor = sistema.financeiro.formatar_valor
     while True:
-        print("\n💰 GERENCIAR FINANCEIRO")
-        print("=" * 50)
-        print("1. Cadastrar conta a pagar")
-        print("2. Cadastrar conta a receber")
-        print("3. Listar contas a pagar")
-        print("4. Listar contas a receber")
-        print("5. Buscar conta a pagar")
-        print("6. Buscar conta a receber")
-        print("7. Registrar pagamento")
-        print("8. Registrar recebimento")
-        print("9. Excluir conta a pagar")
-        print("10. Excluir conta a receber")
-        print("11. Alertas de vencimento")
-        print("12. Voltar ao menu anterior")
-        print("=" * 50)
-        
-        opcao = input("Escolha uma opção: ").strip()
+        if _INTERATIVO:
+            print(_MENU_FINANCEIRO)
+        
+        opcao = _ask("Escolha uma opção: ")
         
         if opcao == "1":
             print("\n📝 CADASTRAR CONTA A PAGAR")
@@ -1158,13 +1646,13 @@ def menu_gerenciar_financeiro(sistema):
             for codigo, info in sistema.financeiro.categorias["contas_pagar"].items():
                 print(f"  {codigo}: {info['nome']} ({info['tipo']}) {info['cor']}")
             
-            descricao = input("Descrição da conta: ").strip()
-            categoria = input("Categoria: ").strip().lower()
+            descricao = _ask("Descrição da conta: ")
+            categoria = _ask("Categoria: ", lower=True)
             try:
-                valor = float(input("Valor: R$ ").strip())
-                data_vencimento = input("Data de vencimento (YYYY-MM-DD): ").strip()
-                fornecedor = input("Fornecedor (opcional): ").strip()
-                observacoes = input("Observações (opcional): ").strip()
+                valor = float(_ask("Valor: R$ "))
+                data_vencimento = _ask("Data de vencimento (YYYY-MM-DD): ")
+                fornecedor = _ask("Fornecedor (opcional): ")
+                observacoes = _ask("Observações (opcional): ")
                 
                 sistema.financeiro.cadastrar_conta_pagar(
                     descricao, categoria, valor, data_vencimento, 
@@ -1182,13 +1670,13 @@ def menu_gerenciar_financeiro(sistema):
             for codigo, info in sistema.financeiro.categorias["contas_receber"].items():
                 print(f"  {codigo}: {info['nome']} ({info['tipo']}) {info['cor']}")
             
-            cliente = input("Nome do cliente: ").strip()
-            descricao = input("Descrição da conta: ").strip()
-            categoria = input("Categoria: ").strip().lower()
+            cliente = _ask("Nome do cliente: ")
+            descricao = _ask("Descrição da conta: ")
+            categoria = _ask("Categoria: ", lower=True)
             try:
-                valor = float(input("Valor: R$ ").strip())
-                data_vencimento = input("Data de vencimento (YYYY-MM-DD): ").strip()
-                observacoes = input("Observações (opcional): ").strip()
+                valor = float(_ask("Valor: R$ "))
+                data_vencimento = _ask("Data de vencimento (YYYY-MM-DD): ")
+                observacoes = _ask("Observações (opcional): ")
                 
                 sistema.financeiro.cadastrar_conta_receber(
                     cliente, descricao, categoria, valor, data_vencimento, 
@@ -1205,18 +1693,16 @@ def menu_gerenciar_financeiro(sistema):
             print("2. Pendentes")
             print("3. Pagas")
             print("4. Atrasadas")
-            filtro = input("Escolha o filtro (1-4): ").strip()
+            filtro = _ask("Escolha o filtro (1-4): ")
             
             status_map = {"1": None, "2": "pendente", "3": "pago", "4": "atrasado"}
             status = status_map.get(filtro)
             
             contas = sistema.financeiro.listar_contas_pagar(status)
             if contas:
-                print(f"{'ID':<8} {'Descrição':<25} {'Categoria':<15} {'Valor':<12} {'Vencimento':<12} {'Status'}")
-                print("-" * 85)
-                for conta in contas:
-                    status_emoji = "✅" if conta["status"] == "pago" else "⏳" if conta["status"] == "pendente" else "🔴"
-                    print(f"{conta['id']:<8} {conta['descricao'][:24]:<25} {conta['categoria'][:14]:<15} {sistema.financeiro.formatar_valor(conta['valor']):<12} {conta['data_vencimento']:<12} {status_emoji}")
+                _imprimir_tabela(_CABECALHO_CONTA_PAGAR, 85, (
+                    _LINHA_CONTA_PAGAR(conta, formatar_valor(conta['valor']), _EMOJI_PAGAR.get(conta["status"], "🔴"))
+                    for conta in contas))
             else:
                 print("❌ Nenhuma conta encontrada!")
         
@@ -1228,56 +1714,50 @@ def menu_gerenciar_financeiro(sistema):
             print("2. Pendentes")
             print("3. Recebidas")
             print("4. Atrasadas")
-            filtro = input("Escolha o filtro (1-4): ").strip()
+            filtro = _ask("Escolha o filtro (1-4): ")
             
             status_map = {"1": None, "2": "pendente", "3": "recebido", "4": "atrasado"}
             status = status_map.get(filtro)
             
             contas = sistema.financeiro.listar_contas_receber(status)
             if contas:
-                print(f"{'ID':<8} {'Cliente':<20} {'Descrição':<20} {'Valor':<12} {'Vencimento':<12} {'Status'}")
-                print("-" * 85)
-                for conta in contas:
-                    status_emoji = "✅" if conta["status"] == "recebido" else "⏳" if conta["status"] == "pendente" else "🔴"
-                    print(f"{conta['id']:<8} {conta['cliente'][:19]:<20} {conta['descricao'][:19]:<20} {sistema.financeiro.formatar_valor(conta['valor']):<12} {conta['data_vencimento']:<12} {status_emoji}")
+                _imprimir_tabela(_CABECALHO_CONTA_RECEBER, 85, (
+                    _LINHA_CONTA_RECEBER(conta, formatar_valor(conta['valor']), _EMOJI_RECEBER.get(conta["status"], "🔴"))
+                    for conta in contas))
             else:
                 print("❌ Nenhuma conta encontrada!")
         
         elif opcao == "5":
             print("\n🔍 BUSCAR CONTA A PAGAR")
             print("-" * 40)
-            termo = input("Digite ID, descrição ou fornecedor: ").strip()
+            termo = _ask("Digite ID, descrição ou fornecedor: ")
             if termo:
                 contas = sistema.financeiro.buscar_conta_pagar(termo)
                 if contas:
-                    print(f"{'ID':<8} {'Descrição':<25} {'Fornecedor':<15} {'Valor':<12} {'Vencimento':<12} {'Status'}")
-                    print("-" * 85)
-                    for conta in contas:
-                        status_emoji = "✅" if conta["status"] == "pago" else "⏳" if conta["status"] == "pendente" else "🔴"
-                        print(f"{conta['id']:<8} {conta['descricao'][:24]:<25} {conta['fornecedor'][:14]:<15} {sistema.financeiro.formatar_valor(conta['valor']):<12} {conta['data_vencimento']:<12} {status_emoji}")
+                    _imprimir_tabela(_CABECALHO_CONTA_PAGAR_BUSCA, 85, (
+                        _LINHA_CONTA_PAGAR_BUSCA(conta, formatar_valor(conta['valor']), _EMOJI_PAGAR.get(conta["status"], "🔴"))
+                        for conta in contas))
                 else:
                     print("❌ Nenhuma conta encontrada!")
         
         elif opcao == "6":
             print("\n🔍 BUSCAR CONTA A RECEBER")
             print("-" * 40)
-            termo = input("Digite ID, cliente ou descrição: ").strip()
+            termo = _ask("Digite ID, cliente ou descrição: ")
             if termo:
                 contas = sistema.financeiro.buscar_conta_receber(termo)
                 if contas:
-                    print(f"{'ID':<8} {'Cliente':<20} {'Descrição':<20} {'Valor':<12} {'Vencimento':<12} {'Status'}")
-                    print("-" * 85)
-                    for conta in contas:
-                        status_emoji = "✅" if conta["status"] == "recebido" else "⏳" if conta["status"] == "pendente" else "🔴"
-                        print(f"{conta['id']:<8} {conta['cliente'][:19]:<20} {conta['descricao'][:19]:<20} {sistema.financeiro.formatar_valor(conta['valor']):<12} {conta['data_vencimento']:<12} {status_emoji}")
+                    _imprimir_tabela(_CABECALHO_CONTA_RECEBER, 85, (
+                        _LINHA_CONTA_RECEBER(conta, formatar_valor(conta['valor']), _EMOJI_RECEBER.get(conta["status"], "🔴"))
+                        for conta in contas))
                 else:
                     print("❌ Nenhuma conta encontrada!")
         
         elif opcao == "7":
             print("\n💰 REGISTRAR PAGAMENTO")
             print("-" * 40)
-            conta_id = input("ID da conta: ").strip().upper()
-            data_pagamento = input("Data do pagamento (YYYY-MM-DD, Enter para hoje): ").strip()
+            conta_id = _ask("ID da conta: ", upper=True)
+            data_pagamento = _ask("Data do pagamento (YYYY-MM-DD, Enter para hoje): ")
             if not data_pagamento:
                 data_pagamento = None
             
@@ -1286,8 +1766,8 @@ def menu_gerenciar_financeiro(sistema):
         elif opcao == "8":
             print("\n💰 REGISTRAR RECEBIMENTO")
             print("-" * 40)
-            conta_id = input("ID da conta: ").strip().upper()
-            data_recebimento = input("Data do recebimento (YYYY-MM-DD, Enter para hoje): ").strip()
+            conta_id = _ask("ID da conta: ", upper=True)
+            data_recebimento = _ask("Data do recebimento (YYYY-MM-DD, Enter para hoje): ")
             if not data_recebimento:
                 data_recebimento = None
             
@@ -1296,16 +1776,16 @@ def menu_gerenciar_financeiro(sistema):
         elif opcao == "9" and sistema.tem_permissao("admin"):
             print("\n🗑️ EXCLUIR CONTA A PAGAR")
             print("-" * 40)
-            conta_id = input("ID da conta: ").strip().upper()
-            confirmacao = input("Tem certeza? (s/N): ").strip().lower()
+            conta_id = _ask("ID da conta: ", upper=True)
+            confirmacao = _ask("Tem certeza? (s/N): ", lower=True)
             if confirmacao == 's':
                 sistema.financeiro.excluir_conta_pagar(conta_id, sistema.usuario_atual)
         
         elif opcao == "10" and sistema.tem_permissao("admin"):
             print("\n🗑️ EXCLUIR CONTA A RECEBER")
             print("-" * 40)
-            conta_id = input("ID da conta: ").strip().upper()
-            confirmacao = input("Tem certeza? (s/N): ").strip().lower()
+            conta_id = _ask("ID da conta: ", upper=True)
+            confirmacao = _ask("Tem certeza? (s/N): ", lower=True)
             if confirmacao == 's':
                 sistema.financeiro.excluir_conta_receber(conta_id, sistema.usuario_atual)
         
@@ -1318,22 +1798,22 @@ def menu_gerenciar_financeiro(sistema):
                 print("🔴 VENCENDO HOJE:")
                 for item in alertas["vencendo_hoje"]:
                     conta = item["conta"]
-                    tipo = "PAGAR" if item["tipo"] == "pagar" else "RECEBER"
-                    print(f"  {tipo}: {conta['id']} - {conta.get('descricao', conta.get('cliente', ''))} - {sistema.financeiro.formatar_valor(conta['valor'])}")
+                    tipo = _ROTULO_TIPO_CONTA.get(item["tipo"], "RECEBER")
+                    print(f"  {tipo}: {conta['id']} - {conta.get('descricao', conta.get('cliente', ''))} - {formatar_valor(conta['valor'])}")
             
             if alertas["vencendo_em_7_dias"]:
                 print("\n🟡 VENCENDO EM 7 DIAS:")
                 for item in alertas["vencendo_em_7_dias"]:
                     conta = item["conta"]
-                    tipo = "PAGAR" if item["tipo"] == "pagar" else "RECEBER"
-                    print(f"  {tipo}: {conta['id']} - {conta.get('descricao', conta.get('cliente', ''))} - {sistema.financeiro.formatar_valor(conta['valor'])}")
+                    tipo = _ROTULO_TIPO_CONTA.get(item["tipo"], "RECEBER")
+                    print(f"  {tipo}: {conta['id']} - {conta.get('descricao', conta.get('cliente', ''))} - {formatar_valor(conta['valor'])}")
             
             if alertas["atrasadas"]:
                 print("\n🔴 ATRASADAS:")
                 for item in alertas["atrasadas"]:
                     conta = item["conta"]
-                    tipo = "PAGAR" if item["tipo"] == "pagar" else "RECEBER"
-                    print(f"  {tipo}: {conta['id']} - {conta.get('descricao', conta.get('cliente', ''))} - {sistema.financeiro.formatar_valor(conta['valor'])}")
+                    tipo = _ROTULO_TIPO_CONTA.get(item["tipo"], "RECEBER")
+                    print(f"  {tipo}: {conta['id']} - {conta.get('descricao', conta.get('cliente', ''))} - {formatar_valor(conta['valor'])}")
             
             if not any(alertas.values()):
                 print("✅ Nenhum alerta de vencimento!")
@@ -1344,121 +1824,132 @@ def menu_gerenciar_financeiro(sistema):
         else:
             print("❌ Opção inválida!")
 
+
+_MENU_RELATORIOS_FINANCEIROS = "\n".join([
+    "\n📊 RELATÓRIOS FINANCEIROS",
+    "=" * 50,
+    "1. Relatório financeiro geral",
+    "2. Relatório por período",
+    "3. Análise por categoria",
+    "4. Contas atrasadas",
+    "5. Fluxo de caixa básico",
+    "6. Fluxo de caixa diário",
+    "7. Fluxo de caixa mensal",
+    "8. Fluxo de caixa por período",
+    "9. Voltar ao menu anterior",
+    "=" * 50,
+])
+
+
 def menu_relatorios_financeiros(sistema):
     """Menu para relatórios financeiros"""
+    # Método de formatação resolvido uma vez para todos os relatórios do menu
+    formatar_valor = sistema.financeiro.formatar_valor
     while True:
-        print("\n📊 RELATÓRIOS FINANCEIROS")
-        print("=" * 50)
-        print("1. Relatório financeiro geral")
-        print("2. Relatório por período")
-        print("3. Análise por categoria")
-        print("4. Contas atrasadas")
-        print("5. Fluxo de caixa básico")
-        print("6. Fluxo de caixa diário")
-        print("7. Fluxo de caixa mensal")
-        print("8. Fluxo de caixa por período")
-        print("9. Voltar ao menu anterior")
-        print("=" * 50)
-        
-        opcao = input("Escolha uma opção: ").strip()
+        if _INTERATIVO:
+            print(_MENU_RELATORIOS_FINANCEIROS)
+        
+        opcao = _ask("Escolha uma opção: ")
         
         if opcao == "1":
-            print("\n📈 RELATÓRIO FINANCEIRO GERAL")
-            print("=" * 60)
+            linhas = ["\n📈 RELATÓRIO FINANCEIRO GERAL", "=" * 60]
             relatorio = sistema.financeiro.relatorio_financeiro()
             
             resumo = relatorio["resumo"]
-            print(f"💰 TOTAL A PAGAR: {sistema.financeiro.formatar_valor(resumo['total_pagar'])}")
-            print(f"💰 TOTAL A RECEBER: {sistema.financeiro.formatar_valor(resumo['total_receber'])}")
-            print(f"✅ TOTAL PAGO: {sistema.financeiro.formatar_valor(resumo['total_pago'])}")
-            print(f"✅ TOTAL RECEBIDO: {sistema.financeiro.formatar_valor(resumo['total_recebido'])}")
-            print(f"⏳ PENDENTE A PAGAR: {sistema.financeiro.formatar_valor(resumo['total_pagar_pendente'])}")
-            print(f"⏳ PENDENTE A RECEBER: {sistema.financeiro.formatar_valor(resumo['total_receber_pendente'])}")
-            print(f"🔴 ATRASADO A PAGAR: {sistema.financeiro.formatar_valor(resumo['total_pagar_atrasado'])}")
-            print(f"🔴 ATRASADO A RECEBER: {sistema.financeiro.formatar_valor(resumo['total_receber_atrasado'])}")
-            print(f"💵 SALDO ATUAL: {sistema.financeiro.formatar_valor(resumo['saldo'])}")
-            print(f"🔮 SALDO FUTURO: {sistema.financeiro.formatar_valor(resumo['saldo_futuro'])}")
-            
-            print(f"\n📊 RESUMO DE CONTAS:")
-            print(f"  Contas a pagar: {relatorio['contas_pagar']['total']} (pendentes: {relatorio['contas_pagar']['pendentes']}, pagas: {relatorio['contas_pagar']['pagas']}, atrasadas: {relatorio['contas_pagar']['atrasadas']})")
-            print(f"  Contas a receber: {relatorio['contas_receber']['total']} (pendentes: {relatorio['contas_receber']['pendentes']}, recebidas: {relatorio['contas_receber']['recebidas']}, atrasadas: {relatorio['contas_receber']['atrasadas']})")
+            linhas.append(f"💰 TOTAL A PAGAR: {formatar_valor(resumo['total_pagar'])}")
+            linhas.append(f"💰 TOTAL A RECEBER: {formatar_valor(resumo['total_receber'])}")
+            linhas.append(f"✅ TOTAL PAGO: {formatar_valor(resumo['total_pago'])}")
+            linhas.append(f"✅ TOTAL RECEBIDO: {formatar_valor(resumo['total_recebido'])}")
+            linhas.append(f"⏳ PENDENTE A PAGAR: {formatar_valor(resumo['total_pagar_pendente'])}")
+            linhas.append(f"⏳ PENDENTE A RECEBER: {formatar_valor(resumo['total_receber_pendente'])}")
+            linhas.append(f"🔴 ATRASADO A PAGAR: {formatar_valor(resumo['total_pagar_atrasado'])}")
+            linhas.append(f"🔴 ATRASADO A RECEBER: {formatar_valor(resumo['total_receber_atrasado'])}")
+            linhas.append(f"💵 SALDO ATUAL: {formatar_valor(resumo['saldo'])}")
+            linhas.append(f"🔮 SALDO FUTURO: {formatar_valor(resumo['saldo_futuro'])}")
+            
+            linhas.append(f"\n📊 RESUMO DE CONTAS:")
+            linhas.append(f"  Contas a pagar: {relatorio['contas_pagar']['total']} (pendentes: {relatorio['contas_pagar']['pendentes']}, pagas: {relatorio['contas_pagar']['pagas']}, atrasadas: {relatorio['contas_pagar']['atrasadas']})")
+            linhas.append(f"  Contas a receber: {relatorio['contas_receber']['total']} (pendentes: {relatorio['contas_receber']['pendentes']}, recebidas: {relatorio['contas_receber']['recebidas']}, atrasadas: {relatorio['contas_receber']['atrasadas']})")
+            _escrever_linhas(linhas)
         
         elif opcao == "2":
             print("\n📅 RELATÓRIO POR PERÍODO")
             print("-" * 40)
-            data_inicio = input("Data de início (YYYY-MM-DD): ").strip()
-            data_fim = input("Data de fim (YYYY-MM-DD): ").strip()
+            data_inicio = _ask("Data de início (YYYY-MM-DD): ")
+            data_fim = _ask("Data de fim (YYYY-MM-DD): ")
+            linhas = []
             
-            if data_inicio and data_fim:
+            if _periodo_valido(data_inicio, data_fim):
                 relatorio = sistema.financeiro.relatorio_financeiro(data_inicio, data_fim)
                 resumo = relatorio["resumo"]
                 
-                print(f"\n📊 RELATÓRIO DE {data_inicio} A {data_fim}")
-                print(f"💰 TOTAL A PAGAR: {sistema.financeiro.formatar_valor(resumo['total_pagar'])}")
-                print(f"💰 TOTAL A RECEBER: {sistema.financeiro.formatar_valor(resumo['total_receber'])}")
-                print(f"✅ TOTAL PAGO: {sistema.financeiro.formatar_valor(resumo['total_pago'])}")
-                print(f"✅ TOTAL RECEBIDO: {sistema.financeiro.formatar_valor(resumo['total_recebido'])}")
-                print(f"💵 SALDO: {sistema.financeiro.formatar_valor(resumo['saldo'])}")
+                linhas.append(f"\n📊 RELATÓRIO DE {data_inicio} A {data_fim}")
+                linhas.append(f"💰 TOTAL A PAGAR: {formatar_valor(resumo['total_pagar'])}")
+                linhas.append(f"💰 TOTAL A RECEBER: {formatar_valor(resumo['total_receber'])}")
+                linhas.append(f"✅ TOTAL PAGO: {formatar_valor(resumo['total_pago'])}")
+                linhas.append(f"✅ TOTAL RECEBIDO: {formatar_valor(resumo['total_recebido'])}")
+                linhas.append(f"💵 SALDO: {formatar_valor(resumo['saldo'])}")
             else:
-                print("❌ Datas inválidas!")
+                linhas.append("❌ Datas inválidas!")
+            _escrever_linhas(linhas)
         
         elif opcao == "3":
-            print("\n📋 ANÁLISE POR CATEGORIA")
-            print("-" * 40)
+            linhas = ["\n📋 ANÁLISE POR CATEGORIA", "-" * 40]
             relatorio = sistema.financeiro.relatorio_financeiro()
             
-            print("📤 CONTAS A PAGAR POR CATEGORIA:")
+            linhas.append("📤 CONTAS A PAGAR POR CATEGORIA:")
             for cat, dados in relatorio["categorias_pagar"].items():
                 cat_info = sistema.financeiro.categorias["contas_pagar"].get(cat, {"nome": cat})
-                print(f"  {cat_info['nome']}: {sistema.financeiro.formatar_valor(dados['total'])} (pago: {sistema.financeiro.formatar_valor(dados['pago'])}, pendente: {sistema.financeiro.formatar_valor(dados['pendente'])})")
+                linhas.append(f"  {cat_info['nome']}: {formatar_valor(dados['total'])} (pago: {formatar_valor(dados['pago'])}, pendente: {formatar_valor(dados['pendente'])})")
             
-            print("\n📥 CONTAS A RECEBER POR CATEGORIA:")
+            linhas.append("\n📥 CONTAS A RECEBER POR CATEGORIA:")
             for cat, dados in relatorio["categorias_receber"].items():
                 cat_info = sistema.financeiro.categorias["contas_receber"].get(cat, {"nome": cat})
-                print(f"  {cat_info['nome']}: {sistema.financeiro.formatar_valor(dados['total'])} (recebido: {sistema.financeiro.formatar_valor(dados['recebido'])}, pendente: {sistema.financeiro.formatar_valor(dados['pendente'])})")
+                linhas.append(f"  {cat_info['nome']}: {formatar_valor(dados['total'])} (recebido: {formatar_valor(dados['recebido'])}, pendente: {formatar_valor(dados['pendente'])})")
+            _escrever_linhas(linhas)
         
         elif opcao == "4":
-            print("\n🔴 CONTAS ATRASADAS")
-            print("-" * 40)
+            linhas = ["\n🔴 CONTAS ATRASADAS", "-" * 40]
             relatorio = sistema.financeiro.relatorio_financeiro()
             
             if relatorio["contas_atrasadas"]["pagar"]:
-                print("📤 CONTAS A PAGAR ATRASADAS:")
+                linhas.append("📤 CONTAS A PAGAR ATRASADAS:")
                 for conta in relatorio["contas_atrasadas"]["pagar"]:
-                    print(f"  {conta['id']}: {conta['descricao']} - {sistema.financeiro.formatar_valor(conta['valor'])} (vencimento: {conta['data_vencimento']})")
+                    linhas.append(f"  {conta['id']}: {conta['descricao']} - {formatar_valor(conta['valor'])} (vencimento: {conta['data_vencimento']})")
             
             if relatorio["contas_atrasadas"]["receber"]:
-                print("\n📥 CONTAS A RECEBER ATRASADAS:")
+                linhas.append("\n📥 CONTAS A RECEBER ATRASADAS:")
                 for conta in relatorio["contas_atrasadas"]["receber"]:
-                    print(f"  {conta['id']}: {conta['cliente']} - {conta['descricao']} - {sistema.financeiro.formatar_valor(conta['valor'])} (vencimento: {conta['data_vencimento']})")
+                    linhas.append(f"  {conta['id']}: {conta['cliente']} - {conta['descricao']} - {formatar_valor(conta['valor'])} (vencimento: {conta['data_vencimento']})")
             
             if not relatorio["contas_atrasadas"]["pagar"] and not relatorio["contas_atrasadas"]["receber"]:
-                print("✅ Nenhuma conta atrasada!")
+                linhas.append("✅ Nenhuma conta atrasada!")
+            _escrever_linhas(linhas)
         
         elif opcao == "5":
-            print("\n💵 FLUXO DE CAIXA BÁSICO")
-            print("-" * 40)
+            linhas = ["\n💵 FLUXO DE CAIXA BÁSICO", "-" * 40]
             relatorio = sistema.financeiro.relatorio_financeiro()
             resumo = relatorio["resumo"]
             
-            print(f"💰 ENTRADAS:")
-            print(f"  Recebido: {sistema.financeiro.formatar_valor(resumo['total_recebido'])}")
-            print(f"  A receber: {sistema.financeiro.formatar_valor(resumo['total_receber_pendente'])}")
-            print(f"  Total entradas: {sistema.financeiro.formatar_valor(resumo['total_recebido'] + resumo['total_receber_pendente'])}")
+            linhas.append(f"💰 ENTRADAS:")
+            linhas.append(f"  Recebido: {formatar_valor(resumo['total_recebido'])}")
+            linhas.append(f"  A receber: {formatar_valor(resumo['total_receber_pendente'])}")
+            linhas.append(f"  Total entradas: {formatar_valor(resumo['total_recebido'] + resumo['total_receber_pendente'])}")
             
-            print(f"\n💸 SAÍDAS:")
-            print(f"  Pago: {sistema.financeiro.formatar_valor(resumo['total_pago'])}")
-            print(f"  A pagar: {sistema.financeiro.formatar_valor(resumo['total_pagar_pendente'])}")
-            print(f"  Total saídas: {sistema.financeiro.formatar_valor(resumo['total_pago'] + resumo['total_pagar_pendente'])}")
+            linhas.append(f"\n💸 SAÍDAS:")
+            linhas.append(f"  Pago: {formatar_valor(resumo['total_pago'])}")
+            linhas.append(f"  A pagar: {formatar_valor(resumo['total_pagar_pendente'])}")
+            linhas.append(f"  Total saídas: {formatar_valor(resumo['total_pago'] + resumo['total_pagar_pendente'])}")
             
-            print(f"\n💵 SALDO:")
-            print(f"  Atual: {sistema.financeiro.formatar_valor(resumo['saldo'])}")
-            print(f"  Projetado: {sistema.financeiro.formatar_valor(resumo['saldo_futuro'])}")
+            linhas.append(f"\n💵 SALDO:")
+            linhas.append(f"  Atual: {formatar_valor(resumo['saldo'])}")
+            linhas.append(f"  Projetado: {formatar_valor(resumo['saldo_futuro'])}")
+            _escrever_linhas(linhas)
         
         elif opcao == "6":
             print("\n📊 FLUXO DE CAIXA DIÁRIO")
             print("-" * 40)
-            data = input("Data (YYYY-MM-DD) ou Enter para hoje: ").strip()
+            data = _ask("Data (YYYY-MM-DD) ou Enter para hoje: ")
             if not data:
                 data = None
             
@@ -1469,8 +1960,8 @@ def menu_relatorios_financeiros(sistema):
             print("\n📊 FLUXO DE CAIXA MENSAL")
             print("-" * 40)
             try:
-                ano = int(input("Ano (Enter para atual): ").strip() or datetime.now().year)
-                mes = int(input("Mês (1-12, Enter para atual): ").strip() or datetime.now().month)
+                ano = int(_ask("Ano (Enter para atual): ") or datetime.now().year)
+                mes = int(_ask("Mês (1-12, Enter para atual): ") or datetime.now().month)
                 
                 if 1 <= mes <= 12:
                     relatorio = sistema.financeiro.relatorio_fluxo_caixa_completo("mes", ano=ano, mes=mes)
@@ -1483,10 +1974,10 @@ def menu_relatorios_financeiros(sistema):
         elif opcao == "8":
             print("\n📊 FLUXO DE CAIXA POR PERÍODO")
             print("-" * 40)
-            data_inicio = input("Data inicial (YYYY-MM-DD): ").strip()
-            data_fim = input("Data final (YYYY-MM-DD): ").strip()
+            data_inicio = _ask("Data inicial (YYYY-MM-DD): ")
+            data_fim = _ask("Data final (YYYY-MM-DD): ")
             
-            if data_inicio and data_fim:
+            if _periodo_valido(data_inicio, data_fim):
                 relatorio = sistema.financeiro.relatorio_fluxo_caixa_completo("periodo", data_inicio=data_inicio, data_fim=data_fim)
                 print(relatorio)
             else:
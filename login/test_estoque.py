@@ -0,0 +1,67 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from estoque import SistemaEstoque
+from persistencia import ler_jsonl
+
+
+class TestMovimentosEmTransacao(unittest.TestCase):
+    """Histórico lido pela primeira vez dentro de transaction()"""
+
+    def setUp(self):
+        self._pasta = tempfile.TemporaryDirectory()
+        self.arquivo_movimentos = os.path.join(self._pasta.name, "movimentos.jsonl")
+        self.estoque = self._novo_estoque()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.codigo = self.estoque.cadastrar_produto("Caneta", "Papelaria", 2.5)
+            self.estoque.registrar_movimento(self.codigo, "entrada", 10)
+        self.estoque.fechar()
+        self.estoque = self._novo_estoque()
+
+    def tearDown(self):
+        self.estoque.fechar()
+        self._pasta.cleanup()
+
+    def _novo_estoque(self) -> SistemaEstoque:
+        return SistemaEstoque(os.path.join(self._pasta.name, "produtos.json"), self.arquivo_movimentos)
+
+    def _ids_no_arquivo(self) -> list:
+        return [movimento["id"] for movimento in ler_jsonl(self.arquivo_movimentos)]
+
+    def test_movimentos_inclui_pendentes(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self.estoque.transaction():
+                self.estoque.registrar_movimento(self.codigo, "saida", 1)
+                historico = self.estoque.movimentos
+                self.assertEqual([movimento["id"] for movimento in historico], [1, 2])
+                self.estoque.registrar_movimento(self.codigo, "saida", 1)
+
+        self.assertEqual(self._ids_no_arquivo(), [1, 2, 3])
+        self.assertEqual([movimento["id"] for movimento in self.estoque.movimentos], [1, 2, 3])
+
+    def test_relatorio_e_indice_incluem_pendentes(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self.estoque.transaction():
+                self.estoque.registrar_movimento(self.codigo, "saida", 1)
+                recentes = self.estoque.relatorio_movimentos(10)
+                por_codigo = self.estoque.movimentos_por_codigo[self.codigo]
+                self.estoque.registrar_movimento(self.codigo, "saida", 1)
+
+        self.assertEqual([movimento["id"] for movimento in recentes], [2, 1])
+        self.assertEqual([movimento["id"] for movimento in por_codigo], [1, 2, 3])
+        self.assertEqual(self._ids_no_arquivo(), [1, 2, 3])
+
+    def test_compactar_dentro_da_transacao(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self.estoque.transaction():
+                self.estoque.registrar_movimento(self.codigo, "saida", 1)
+                self.estoque.compactar_movimentos()
+
+        self.assertEqual(self._ids_no_arquivo(), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
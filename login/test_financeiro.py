@@ -0,0 +1,100 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from financeiro import SistemaFinanceiro
+from persistencia import gravar_jsonl, ler_jsonl
+
+
+class TestCadastroEmLote(unittest.TestCase):
+    """Importação de contas com dados de tipo errado"""
+
+    def setUp(self):
+        self._pasta = tempfile.TemporaryDirectory()
+        self.financeiro = SistemaFinanceiro(*(os.path.join(self._pasta.name, nome) for nome in
+                                              ("contas_pagar.jsonl", "contas_receber.jsonl", "categorias.json")))
+
+    def tearDown(self):
+        self.financeiro.fechar()
+        self._pasta.cleanup()
+
+    def test_itens_invalidos_sao_ignorados(self):
+        itens = [
+            {"descricao": "Água", "categoria": "agua", "valor": "10", "data_vencimento": "2025-05-01"},
+            {"descricao": "Água", "categoria": ["agua"], "valor": 10, "data_vencimento": "2025-05-01"},
+            {"descricao": "Água", "categoria": "agua", "valor": 10, "data_vencimento": 20250501},
+            None,
+            {"descricao": "Água", "categoria": "agua", "valor": 10, "data_vencimento": "2025-05-01"},
+        ]
+        saida = io.StringIO()
+        with contextlib.redirect_stdout(saida):
+            ids = self.financeiro.cadastrar_contas_pagar_batch(itens)
+
+        self.assertEqual(len(ids), 1)
+        self.assertIn("4 contas ignoradas", saida.getvalue())
+        self.assertEqual([conta["id"] for conta in self.financeiro.contas_pagar], ids)
+
+    def test_lote_e_individual_montam_a_mesma_conta(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            individual = self.financeiro.cadastrar_conta_receber("Ana", "Venda", "venda", 300, "2025-03-01")
+            lote, = self.financeiro.cadastrar_contas_receber_batch(
+                [{"cliente": "Ana", "descricao": "Venda", "categoria": "venda", "valor": 300,
+                  "data_vencimento": "2025-03-01"}])
+
+        conta_individual = dict(self.financeiro._idx_receber[individual])
+        conta_lote = dict(self.financeiro._idx_receber[lote])
+        for campo in ("id", "data_cadastro"):
+            conta_individual.pop(campo)
+            conta_lote.pop(campo)
+        self.assertEqual(conta_individual, conta_lote)
+
+    def test_contas_devolvidas_sem_campos_internos(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.financeiro.cadastrar_conta_pagar("Luz", "energia", 80, "2020-01-10", "Companhia")
+            self.financeiro.cadastrar_conta_receber("Ana", "Venda", "venda", 300, "2020-02-01")
+
+        contas = (self.financeiro.listar_contas_pagar() + self.financeiro.listar_contas_receber()
+                  + self.financeiro.buscar_conta_pagar("luz")
+                  + self.financeiro.relatorio_financeiro()["contas_atrasadas"]["pagar"]
+                  + [alerta["conta"] for alerta in self.financeiro.obter_alertas_vencimento()["atrasadas"]])
+        self.assertEqual(len(contas), 6)
+        for conta in contas:
+            self.assertEqual([campo for campo in conta if campo.startswith("_")], [])
+
+
+class TestStatusVencimentoCarregado(unittest.TestCase):
+    """Conta gravada com status_vencimento desatualizado (vencida desde então)"""
+
+    def setUp(self):
+        self._pasta = tempfile.TemporaryDirectory()
+        self.arquivos = [os.path.join(self._pasta.name, nome) for nome in
+                         ("contas_pagar.jsonl", "contas_receber.jsonl", "categorias.json")]
+        financeiro = SistemaFinanceiro(*self.arquivos)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.conta_id = financeiro.cadastrar_conta_pagar("Luz", "energia", 80, "2020-01-10")
+        financeiro.fechar()
+        contas = ler_jsonl(self.arquivos[0])
+        contas[0]["status_vencimento"] = "no_prazo"
+        gravar_jsonl(self.arquivos[0], contas)
+        self.financeiro = SistemaFinanceiro(*self.arquivos)
+
+    def tearDown(self):
+        self.financeiro.fechar()
+        self._pasta.cleanup()
+
+    def test_consultas_devolvem_status_do_dia(self):
+        atrasadas = self.financeiro.relatorio_financeiro()["contas_atrasadas"]["pagar"]
+        self.assertEqual([conta["status_vencimento"] for conta in atrasadas], ["atrasado"])
+        conta, = self.financeiro.listar_contas_pagar()
+        self.assertEqual(conta["status_vencimento"], "atrasado")
+
+    def test_consultas_nao_reescrevem_o_arquivo(self):
+        self.financeiro.listar_contas_pagar()
+        self.financeiro.flush()
+        self.assertEqual(ler_jsonl(self.arquivos[0])[0]["status_vencimento"], "no_prazo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from persistencia import gravar_json
+from vendas import SistemaVendas
+
+
+class TestIdsDeClienteComLacunas(unittest.TestCase):
+    """Cadastro de cliente quando os IDs existentes têm lacunas ("1" e "3")"""
+
+    def setUp(self):
+        self._pasta = tempfile.TemporaryDirectory()
+        arquivo_clientes = os.path.join(self._pasta.name, "clientes.json")
+        gravar_json(arquivo_clientes, {
+            "1": {"nome": "Ana", "email": "ana@x.com", "telefone": "1", "ativo": True},
+            "3": {"nome": "Zeca", "email": "zeca@x.com", "telefone": "1", "ativo": True},
+        })
+        self.vendas = SistemaVendas(os.path.join(self._pasta.name, "pedidos.jsonl"), arquivo_clientes)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.cliente_id = self.vendas.cadastrar_cliente("Bia", "bia@x.com", "1")
+
+    def tearDown(self):
+        self.vendas.flush()
+        self._pasta.cleanup()
+
+    def test_novo_cliente_recebe_id_apos_o_maior(self):
+        self.assertEqual(self.cliente_id, "4")
+        self.assertEqual(self.vendas.clientes["3"]["nome"], "Zeca")
+        self.assertEqual([cliente["nome"] for cliente in self.vendas.listar_clientes()], ["Ana", "Bia", "Zeca"])
+
+    def test_cliente_existente_continua_encontrado(self):
+        self.assertEqual([cliente["id"] for cliente in self.vendas.buscar_cliente("zeca")], ["3"])
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertIsNone(self.vendas.cadastrar_cliente("Outro", "zeca@x.com", "2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,72 +1,363 @@
-import json
+import atexit
+import bisect
+import heapq
 import os
+import sys
 import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+from persistencia import ler_json, gravar_json, dumps_linha, iterar_jsonl, gravar_jsonl
+
+
+@lru_cache(maxsize=None)
+def _estilos_recibo() -> Dict:
+    """Estilos do recibo em PDF, montados uma única vez (no primeiro recibo gerado)"""
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+    
+    styles = getSampleStyleSheet()
+    return {
+        "styles": styles,
+        "titulo": ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=18,
+            spaceAfter=30,
+            alignment=TA_CENTER
+        ),
+        # Tabelas de dados do pedido e do cliente (rótulo em negrito à esquerda)
+        "info": TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]),
+        "produtos": TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('GRID', (0, 0), (-1, -2), 1, colors.black),
+            ('LINEBELOW', (0, -1), (-1, -1), 2, colors.black),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]),
+    }
+
+
+# Campos obrigatórios de um pedido; registros sem algum deles são ignorados na carga
+_CAMPOS_PEDIDO_OBRIGATORIOS = frozenset(("codigo", "cliente_id", "cliente_nome", "produtos", "total", "status", "data_criacao"))
+_CAMPOS_PEDIDO_REPETIDOS = ("cliente_id", "cliente_nome", "status", "usuario_criacao", "usuario_atualizacao")
+_CAMPOS_ITEM_REPETIDOS = ("codigo", "nome")
+
+
+def _internar_pedido(pedido) -> Optional[Dict]:
+    """
+    Valida um pedido carregado e compartilha chaves e textos repetidos
+    
+    Com sys.intern os status, nomes de clientes e de produtos de todos os
+    pedidos passam a ser a mesma string, reduzindo a memória de históricos
+    grandes. O pedido é alterado no próprio dicionário.
+    
+    Returns:
+        O pedido pronto para uso, ou None se o registro estiver incompleto
+    """
+    if not isinstance(pedido, dict) or not _CAMPOS_PEDIDO_OBRIGATORIOS <= pedido.keys():
+        return None
+    if not isinstance(pedido["produtos"], list):
+        return None
+    for campo in _CAMPOS_PEDIDO_REPETIDOS:
+        valor = pedido.get(campo)
+        if isinstance(valor, str):
+            pedido[campo] = sys.intern(valor)
+    for item in pedido["produtos"]:
+        for campo in _CAMPOS_ITEM_REPETIDOS:
+            valor = item.get(campo)
+            if isinstance(valor, str):
+                item[campo] = sys.intern(valor)
+    return pedido
+
+
+def _centavos(valor: float) -> int:
+    """Converte um valor em reais para centavos inteiros (arredondado uma única vez)"""
+    return int(round(valor * 100))
+
+
+def _formatar_centavos(centavos: int) -> str:
+    """Formata um valor em centavos como no recibo (R$ 1234.56), sem passar por float"""
+    reais, resto = divmod(abs(centavos), 100)
+    return f"R$ {'-' if centavos < 0 else ''}{reais}.{resto:02d}"
+
+
+def _quantidade_vendida(item: tuple) -> int:
+    """Chave de ordenação de um par (nome, {"quantidade", "valor"}) de produtos vendidos"""
+    return item[1]["quantidade"]
+
+
+def _trigramas(texto: str) -> set:
+    """Conjunto dos trechos de 3 caracteres consecutivos de um texto"""
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
 
 class SistemaVendas:
-    def __init__(self, arquivo_pedidos: str = "pedidos.json", arquivo_clientes: str = "clientes.json"):
+    def __init__(self, arquivo_pedidos: str = "pedidos.jsonl", arquivo_clientes: str = "clientes.json"):
         """
         Inicializa o sistema de vendas
         
         Args:
-            arquivo_pedidos: Arquivo para armazenar pedidos
+            arquivo_pedidos: Arquivo JSON Lines para armazenar pedidos
             arquivo_clientes: Arquivo para armazenar clientes
         """
         self.arquivo_pedidos = arquivo_pedidos
         self.arquivo_clientes = arquivo_clientes
+        self._now_t = None
+        self._now_s = ""
+        
+        # Gravação adiada (ver batch): arquivos marcados para reescrita
+        self._em_lote = False
+        self._dirty_pedidos = False
+        self._dirty_clientes = False
+        # Linhas de pedidos ainda não gravadas e arquivo de pedidos aberto para acréscimo
+        self._pedidos_pendentes: List[bytes] = []
+        self._arquivo_log_pedidos = None
+        atexit.register(self.flush)
+        
+        # Versão dos pedidos (incrementada a cada alteração) e relatórios já calculados nela
+        self._versao_pedidos = 0
+        self._cache_relatorio: Dict[tuple, Dict] = {}
+        self._versao_cache_relatorio = 0
+        
         self.pedidos = self.carregar_pedidos()
         self.clientes = self.carregar_clientes()
+        
+        # Textos de busca já em minúsculas, junto do próprio registro: cliente ID -> (texto, dados)
+        # e (texto, pedido) na ordem dos pedidos
+        self._busca_clientes: Dict[str, tuple] = {cliente_id: (self._texto_busca_cliente(cliente_id, dados), dados)
+                                                  for cliente_id, dados in self.clientes.items()}
+        self._busca_pedidos: List[tuple] = [(self._texto_busca_pedido(pedido), pedido) for pedido in self.pedidos]
+        
+        # Índice invertido trigrama -> IDs de clientes, para a busca não varrer todos os
+        # textos, e a posição de cada cliente (os resultados saem na ordem do cadastro)
+        self._trigramas_clientes: Dict[str, set] = {}
+        self._posicao_cliente: Dict[str, int] = {}
+        for cliente_id, (texto, _) in self._busca_clientes.items():
+            self._indexar_cliente(cliente_id, texto)
+        
+        # Clientes já na ordem de listagem: (nome, posição no cadastro, ID), mantida com
+        # inserção ordenada em vez de ordenar a cada chamada de listar_clientes
+        self._clientes_ordenados: List[tuple] = sorted(
+            (dados["nome"], self._posicao_cliente[cliente_id], cliente_id)
+            for cliente_id, dados in self.clientes.items())
+        
+        # Índice email (minúsculas) -> ID do cliente, para checar duplicidade sem varrer os clientes
+        self._email_index: Dict[str, str] = {dados["email"].lower(): cliente_id for cliente_id, dados in self.clientes.items()}
+        
+        # Índice código -> pedido (percorrido de trás para frente: em código repetido vale o primeiro)
+        self._codigo_index: Dict[str, Dict] = {pedido["codigo"]: pedido for pedido in reversed(self.pedidos)}
+        
+        # Data (YYYY-MM-DD) de criação de cada pedido, na mesma ordem de self.pedidos
+        self._datas_pedidos: List[str] = [pedido["data_criacao"][:10] for pedido in self.pedidos]
+        
+        # Itens de todos os pedidos em colunas (ver _montar_colunas_itens)
+        self._montar_colunas_itens()
+        
+        # Próximo número de pedido, calculado uma vez a partir do maior código existente
+        self._next_pedido_num = 1 + max((int(pedido["codigo"][3:]) for pedido in self.pedidos
+                                         if pedido["codigo"].startswith("PED")), default=0)
+        
+        # Próximo ID de cliente, a partir do maior ID existente (IDs com lacunas não
+        # fazem o novo cadastro reaproveitar o ID de um cliente que ainda existe)
+        self._next_cliente_num = 1 + max((int(cliente_id) for cliente_id in self.clientes
+                                          if cliente_id.isdigit()), default=0)
+    
+    def _now_str(self) -> str:
+        """Data e hora atuais formatadas, recalculadas no máximo uma vez por segundo"""
+        agora = int(time.time())
+        if agora != self._now_t:
+            self._now_t = agora
+            self._now_s = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(agora))
+        return self._now_s
+    
+    @staticmethod
+    def _texto_busca_cliente(cliente_id: str, dados: Dict) -> str:
+        """Monta o texto em minúsculas usado pela busca de clientes"""
+        return f"{cliente_id}\x1f{dados['nome']}\x1f{dados['email']}".lower()
+    
+    @staticmethod
+    def _texto_busca_pedido(pedido: Dict) -> str:
+        """Monta o texto em minúsculas usado pela busca de pedidos"""
+        return f"{pedido['codigo']}\x1f{pedido['cliente_nome']}".lower()
+    
+    def _indexar_cliente(self, cliente_id: str, texto: str):
+        """Inclui os trigramas do texto de busca de um cliente no índice invertido"""
+        self._posicao_cliente.setdefault(cliente_id, len(self._posicao_cliente))
+        indice = self._trigramas_clientes
+        for trigrama in _trigramas(texto):
+            ids = indice.get(trigrama)
+            if ids is None:
+                indice[trigrama] = {cliente_id}
+            else:
+                ids.add(cliente_id)
+    
+    def _montar_colunas_itens(self):
+        """
+        Monta a visão em colunas dos itens de todos os pedidos
+        
+        Em vez de percorrer pedido a pedido os dicionários de cada item, os
+        relatórios somam listas paralelas: ID do produto (posição em
+        _nomes_produtos, na ordem da primeira venda), quantidade e valor em
+        centavos. Os itens do pedido i ocupam as posições
+        _itens_inicio[i]:_itens_inicio[i + 1]. Os itens não mudam depois de
+        criado o pedido, então basta acrescentar os de cada pedido novo.
+        """
+        self._id_produto: Dict[str, int] = {}
+        self._nomes_produtos: List[str] = []
+        self._itens_produto: List[int] = []
+        self._itens_quantidade: List[int] = []
+        self._itens_valor: List[int] = []
+        self._itens_inicio: List[int] = [0]
+        for pedido in self.pedidos:
+            self._indexar_itens(pedido)
+    
+    def _indexar_itens(self, pedido: Dict):
+        """Acrescenta os itens de um pedido ao final da visão em colunas"""
+        id_produto = self._id_produto
+        for item in pedido["produtos"]:
+            nome = item["nome"]
+            produto = id_produto.get(nome)
+            if produto is None:
+                produto = id_produto[nome] = len(self._nomes_produtos)
+                self._nomes_produtos.append(nome)
+            quantidade = item["quantidade"]
+            self._itens_produto.append(produto)
+            self._itens_quantidade.append(quantidade)
+            self._itens_valor.append(quantidade * _centavos(item["preco_unitario"]))
+        self._itens_inicio.append(len(self._itens_produto))
     
     def carregar_pedidos(self) -> List:
-        """Carrega pedidos do arquivo JSON"""
-        if os.path.exists(self.arquivo_pedidos):
-            try:
-                with open(self.arquivo_pedidos, 'r', encoding='utf-8') as arquivo:
-                    return json.load(arquivo)
-            except (json.JSONDecodeError, FileNotFoundError):
-                return []
-        return []
+        """
+        Carrega pedidos do arquivo JSON Lines
+        
+        Cada linha guarda a versão completa de um pedido; quando o mesmo código
+        aparece mais de uma vez (mudança de status), vale a última linha.
+        Registros sem os campos obrigatórios são ignorados.
+        Se o arquivo ainda não existir mas houver o pedidos.json no formato
+        antigo (lista JSON), ele é convertido automaticamente.
+        """
+        # Arquivo ausente é tratado pela própria abertura (sem consultar os.path.exists antes)
+        try:
+            pedidos = {}
+            for registro in iterar_jsonl(self.arquivo_pedidos):
+                pedido = _internar_pedido(registro)
+                if pedido is not None:
+                    pedidos[pedido["codigo"]] = pedido
+            return list(pedidos.values())
+        except FileNotFoundError:
+            pass
+        
+        arquivo_legado = os.path.splitext(self.arquivo_pedidos)[0] + ".json"
+        if arquivo_legado == self.arquivo_pedidos:
+            return []
+        try:
+            pedidos = ler_json(arquivo_legado)
+        except (ValueError, FileNotFoundError):
+            return []
+        gravar_jsonl(self.arquivo_pedidos, pedidos)
+        return [pedido for pedido in map(_internar_pedido, pedidos) if pedido is not None]
     
     def carregar_clientes(self) -> Dict:
         """Carrega clientes do arquivo JSON"""
-        if os.path.exists(self.arquivo_clientes):
-            try:
-                with open(self.arquivo_clientes, 'r', encoding='utf-8') as arquivo:
-                    return json.load(arquivo)
-            except (json.JSONDecodeError, FileNotFoundError):
-                return {}
-        return {}
+        # Arquivo ausente é tratado pela própria abertura (sem consultar os.path.exists antes)
+        try:
+            return ler_json(self.arquivo_clientes)
+        except (ValueError, FileNotFoundError):
+            return {}
     
     def salvar_pedidos(self):
-        """Salva pedidos no arquivo JSON"""
-        with open(self.arquivo_pedidos, 'w', encoding='utf-8') as arquivo:
-            json.dump(self.pedidos, arquivo, indent=4, ensure_ascii=False)
+        """Reescreve (compacta) o arquivo de pedidos (dentro de batch(), só ao final do bloco)"""
+        # Toda alteração de pedido passa por aqui ou por _anexar_pedido: invalida os relatórios em cache
+        self._versao_pedidos += 1
+        self._dirty_pedidos = True
+        if not self._em_lote:
+            self.flush()
+    
+    def _anexar_pedido(self, pedido: Dict):
+        """Acrescenta a versão atual de um pedido ao final do arquivo, sem reescrevê-lo"""
+        self._versao_pedidos += 1
+        self._pedidos_pendentes.append(dumps_linha(pedido))
+        if not self._em_lote:
+            self._gravar_pedidos_pendentes()
+    
+    def _gravar_pedidos_pendentes(self):
+        """Grava de uma vez as linhas de pedidos acumuladas"""
+        if not self._pedidos_pendentes:
+            return
+        if self._arquivo_log_pedidos is None:
+            self._arquivo_log_pedidos = open(self.arquivo_pedidos, 'ab')
+        self._arquivo_log_pedidos.write(b"".join(self._pedidos_pendentes))
+        self._arquivo_log_pedidos.flush()
+        self._pedidos_pendentes.clear()
     
     def salvar_clientes(self):
-        """Salva clientes no arquivo JSON"""
-        with open(self.arquivo_clientes, 'w', encoding='utf-8') as arquivo:
-            json.dump(self.clientes, arquivo, indent=4, ensure_ascii=False)
+        """Salva clientes no arquivo JSON (dentro de batch(), só ao final do bloco)"""
+        self._dirty_clientes = True
+        if not self._em_lote:
+            self.flush()
     
-    def gerar_codigo_pedido(self) -> str:
-        """Gera um código único para o pedido"""
-        if not self.pedidos:
-            return "PED001"
-        
-        # Encontra o maior número de pedido existente
-        codigos = [int(pedido["codigo"][3:]) for pedido in self.pedidos if pedido["codigo"].startswith("PED")]
-        if codigos:
-            proximo_numero = max(codigos) + 1
+    def flush(self):
+        """Grava o que estiver pendente: reescritas marcadas e linhas de pedidos acumuladas em lote"""
+        if self._dirty_pedidos:
+            # A reescrita já contém a versão atual de todos os pedidos
+            self._pedidos_pendentes.clear()
+            if self._arquivo_log_pedidos is not None:
+                self._arquivo_log_pedidos.close()
+                self._arquivo_log_pedidos = None
+            gravar_jsonl(self.arquivo_pedidos, self.pedidos)
+            self._dirty_pedidos = False
         else:
-            proximo_numero = 1
+            self._gravar_pedidos_pendentes()
+        if self._dirty_clientes:
+            gravar_json(self.arquivo_clientes, self.clientes, compacto=True)
+            self._dirty_clientes = False
+    
+    @contextmanager
+    def batch(self):
+        """
+        Agrupa várias operações e grava cada arquivo uma única vez ao final do bloco
         
-        return f"PED{proximo_numero:03d}"
+        Exemplo:
+            with vendas.batch():
+                for dados in clientes_importados:
+                    vendas.cadastrar_cliente(**dados)
+        """
+        anterior = self._em_lote
+        self._em_lote = True
+        try:
+            yield self
+        finally:
+            self._em_lote = anterior
+            if not anterior:
+                self.flush()
+    
+    def compactar_pedidos(self):
+        """Reescreve o arquivo de pedidos mantendo apenas a versão atual de cada pedido"""
+        self._dirty_pedidos = True
+        self.flush()
+    
+    def gerar_codigo_pedido(self) -> str:
+        """Gera um código único para o pedido"""
+        codigo = f"PED{self._next_pedido_num:03d}"
+        self._next_pedido_num += 1
+        return codigo
+    
+    def gerar_id_cliente(self) -> str:
+        """Gera um ID único para o cliente"""
+        cliente_id = str(self._next_cliente_num)
+        self._next_cliente_num += 1
+        return cliente_id
     
     def cadastrar_cliente(self, nome: str, email: str, telefone: str, endereco: str = "", usuario: str = "sistema") -> str:
         """
@@ -87,22 +378,29 @@ class SistemaVendas:
             return None
         
         # Verifica se já existe cliente com mesmo email
-        for cliente_id, dados in self.clientes.items():
-            if dados["email"].lower() == email.lower():
-                print("❌ Erro: Já existe um cliente com este email!")
-                return None
+        email_lower = email.lower()
+        if email_lower in self._email_index:
+            print("❌ Erro: Já existe um cliente com este email!")
+            return None
         
-        cliente_id = str(len(self.clientes) + 1)
+        cliente_id = self.gerar_id_cliente()
         
         self.clientes[cliente_id] = {
             "nome": nome,
             "email": email,
             "telefone": telefone,
             "endereco": endereco,
-            "data_cadastro": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "data_cadastro": self._now_str(),
             "usuario_cadastro": usuario,
             "ativo": True
         }
+        dados = self.clientes[cliente_id]
+        texto = self._texto_busca_cliente(cliente_id, dados)
+        self._busca_clientes[cliente_id] = (texto, dados)
+        self._indexar_cliente(cliente_id, texto)
+        self._email_index[email_lower] = cliente_id
+        posicao = self._posicao_cliente[cliente_id]
+        bisect.insort(self._clientes_ordenados, (nome, posicao, cliente_id))
         
         self.salvar_clientes()
         print(f"✅ Cliente {nome} cadastrado com ID {cliente_id}!")
@@ -118,18 +416,24 @@ class SistemaVendas:
         Returns:
             Lista de clientes
         """
-        clientes_lista = []
-        for cliente_id, dados in self.clientes.items():
+        return list(self.iter_clientes(apenas_ativos))
+    
+    def iter_clientes(self, apenas_ativos: bool = True) -> Iterator[Dict]:
+        """
+        Percorre os clientes em ordem de nome, sob demanda
+        
+        Args:
+            apenas_ativos: Se deve listar apenas clientes ativos
+            
+        Returns:
+            Iterador de clientes
+        """
+        # _clientes_ordenados já está ordenado por nome (empates na ordem de cadastro)
+        for _, _, cliente_id in self._clientes_ordenados:
+            dados = self.clientes[cliente_id]
             if apenas_ativos and not dados.get("ativo", True):
                 continue
-            
-            cliente = {
-                "id": cliente_id,
-                **dados
-            }
-            clientes_lista.append(cliente)
-        
-        return sorted(clientes_lista, key=lambda x: x["nome"])
+            yield {"id": cliente_id, **dados}
     
     def buscar_cliente(self, termo: str) -> List[Dict]:
         """
@@ -141,21 +445,31 @@ class SistemaVendas:
         Returns:
             Lista de clientes encontrados
         """
-        resultados = []
         termo_lower = termo.lower()
         
-        for cliente_id, dados in self.clientes.items():
-            if (termo_lower in cliente_id.lower() or 
-                termo_lower in dados["nome"].lower() or 
-                termo_lower in dados["email"].lower()):
-                
-                cliente = {
-                    "id": cliente_id,
-                    **dados
-                }
-                resultados.append(cliente)
-        
-        return resultados
+        # O separador \x1f não aparece em termos digitados, então um termo
+        # nunca casa atravessando dois campos
+        if len(termo_lower) < 3:
+            return [{"id": cliente_id, **dados}
+                    for cliente_id, (texto, dados) in self._busca_clientes.items() if termo_lower in texto]
+        
+        # Candidatos: clientes que têm todos os trigramas do termo (interseção começando
+        # pelo menor conjunto); a confirmação com "in" elimina os falsos positivos
+        conjuntos = []
+        for trigrama in _trigramas(termo_lower):
+            ids = self._trigramas_clientes.get(trigrama)
+            if not ids:
+                return []
+            conjuntos.append(ids)
+        conjuntos.sort(key=len)
+        candidatos = conjuntos[0].intersection(*conjuntos[1:])
+        
+        encontrados = []
+        for cliente_id in sorted(candidatos, key=self._posicao_cliente.__getitem__):
+            texto, dados = self._busca_clientes[cliente_id]
+            if termo_lower in texto:
+                encontrados.append({"id": cliente_id, **dados})
+        return encontrados
     
     def criar_pedido(self, cliente_id: str, produtos: List[Dict], observacoes: str = "", usuario: str = "sistema") -> str:
         """
@@ -170,7 +484,8 @@ class SistemaVendas:
         Returns:
             Código do pedido criado ou None se erro
         """
-        if cliente_id not in self.clientes:
+        cliente = self.clientes.get(cliente_id)
+        if cliente is None:
             print("❌ Erro: Cliente não encontrado!")
             return None
         
@@ -179,29 +494,35 @@ class SistemaVendas:
             return None
         
         # Calcula totais
-        subtotal = sum(item["quantidade"] * item["preco_unitario"] for item in produtos)
+        # Soma em centavos inteiros (exata); o valor em reais é obtido uma única vez no final
+        subtotal = sum(item["quantidade"] * _centavos(item["preco_unitario"]) for item in produtos) / 100
         total = subtotal
         
         codigo_pedido = self.gerar_codigo_pedido()
+        agora = self._now_str()
         
         pedido = {
             "codigo": codigo_pedido,
             "cliente_id": cliente_id,
-            "cliente_nome": self.clientes[cliente_id]["nome"],
+            "cliente_nome": cliente["nome"],
             "produtos": produtos,
             "subtotal": subtotal,
             "total": total,
             "observacoes": observacoes,
             "status": "pendente",
             "usuario_criacao": usuario,
-            "data_criacao": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "data_atualizacao": time.strftime("%Y-%m-%d %H:%M:%S")
+            "data_criacao": agora,
+            "data_atualizacao": agora
         }
         
         self.pedidos.append(pedido)
-        self.salvar_pedidos()
+        self._busca_pedidos.append((self._texto_busca_pedido(pedido), pedido))
+        self._codigo_index.setdefault(codigo_pedido, pedido)
+        self._datas_pedidos.append(agora[:10])
+        self._indexar_itens(pedido)
+        self._anexar_pedido(pedido)
         
-        print(f"✅ Pedido {codigo_pedido} criado para {self.clientes[cliente_id]['nome']}!")
+        print(f"✅ Pedido {codigo_pedido} criado para {cliente['nome']}!")
         print(f"💰 Total: R$ {total:.2f}")
         
         return codigo_pedido
@@ -217,9 +538,25 @@ class SistemaVendas:
             Lista de pedidos
         """
         if status:
-            return [pedido for pedido in self.pedidos if pedido["status"] == status]
+            return list(self.iter_pedidos(status))
         return self.pedidos
     
+    def iter_pedidos(self, status: str = None) -> Iterator[Dict]:
+        """
+        Percorre os pedidos sob demanda, sem montar a lista filtrada
+        
+        Útil quando só interessam os primeiros pedidos ou um total.
+        
+        Args:
+            status: Filtro por status (pendente, aprovado, cancelado, finalizado)
+            
+        Returns:
+            Iterador de pedidos
+        """
+        if status:
+            return (pedido for pedido in self.pedidos if pedido["status"] == status)
+        return iter(self.pedidos)
+    
     def buscar_pedido(self, termo: str) -> List[Dict]:
         """
         Busca pedido por código ou nome do cliente
@@ -230,15 +567,8 @@ class SistemaVendas:
         Returns:
             Lista de pedidos encontrados
         """
-        resultados = []
         termo_lower = termo.lower()
-        
-        for pedido in self.pedidos:
-            if (termo_lower in pedido["codigo"].lower() or 
-                termo_lower in pedido["cliente_nome"].lower()):
-                resultados.append(pedido)
-        
-        return resultados
+        return [pedido for texto, pedido in self._busca_pedidos if termo_lower in texto]
     
     def atualizar_status_pedido(self, codigo_pedido: str, novo_status: str, usuario: str = "sistema") -> bool:
         """
@@ -252,18 +582,18 @@ class SistemaVendas:
         Returns:
             True se sucesso, False se erro
         """
-        for pedido in self.pedidos:
-            if pedido["codigo"] == codigo_pedido:
-                pedido["status"] = novo_status
-                pedido["data_atualizacao"] = time.strftime("%Y-%m-%d %H:%M:%S")
-                pedido["usuario_atualizacao"] = usuario
-                
-                self.salvar_pedidos()
-                print(f"✅ Status do pedido {codigo_pedido} atualizado para '{novo_status}'!")
-                return True
-        
-        print("❌ Erro: Pedido não encontrado!")
-        return False
+        pedido = self._codigo_index.get(codigo_pedido)
+        if pedido is None:
+            print("❌ Erro: Pedido não encontrado!")
+            return False
+        
+        pedido["status"] = novo_status
+        pedido["data_atualizacao"] = self._now_str()
+        pedido["usuario_atualizacao"] = usuario
+        
+        self._anexar_pedido(pedido)
+        print(f"✅ Status do pedido {codigo_pedido} atualizado para '{novo_status}'!")
+        return True
     
     def gerar_recibo_pdf(self, codigo_pedido: str, caminho_saida: str = "recibos") -> str:
         """
@@ -276,20 +606,20 @@ class SistemaVendas:
         Returns:
             Caminho do arquivo PDF gerado
         """
-        # Encontra o pedido
-        pedido = None
-        for p in self.pedidos:
-            if p["codigo"] == codigo_pedido:
-                pedido = p
-                break
+        # O reportlab só é importado quando um recibo é gerado: quem usa apenas
+        # pedidos e relatórios não paga o custo de carregá-lo na inicialização
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
         
+        # Encontra o pedido
+        pedido = self._codigo_index.get(codigo_pedido)
         if not pedido:
             print("❌ Erro: Pedido não encontrado!")
             return None
         
         # Cria pasta se não existir
-        if not os.path.exists(caminho_saida):
-            os.makedirs(caminho_saida)
+        os.makedirs(caminho_saida, exist_ok=True)
         
         # Nome do arquivo
         nome_arquivo = f"recibo_{codigo_pedido}_{time.strftime('%Y%m%d_%H%M%S')}.pdf"
@@ -300,14 +630,9 @@ class SistemaVendas:
         story = []
         
         # Estilos
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
+        estilos = _estilos_recibo()
+        styles = estilos["styles"]
+        title_style = estilos["titulo"]
         
         # Título
         story.append(Paragraph("RECIBO DE VENDA", title_style))
@@ -322,12 +647,7 @@ class SistemaVendas:
         ]
         
         t_info = Table(info_pedido, colWidths=[2*inch, 4*inch])
-        t_info.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        t_info.setStyle(estilos["info"])
         story.append(t_info)
         story.append(Spacer(1, 20))
         
@@ -345,12 +665,7 @@ class SistemaVendas:
         ]
         
         t_cliente = Table(info_cliente, colWidths=[1.5*inch, 4.5*inch])
-        t_cliente.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        t_cliente.setStyle(estilos["info"])
         story.append(t_cliente)
         story.append(Spacer(1, 20))
         
@@ -358,31 +673,20 @@ class SistemaVendas:
         story.append(Paragraph("ITENS DO PEDIDO", styles['Heading2']))
         story.append(Spacer(1, 10))
         
-        # Cabeçalho da tabela
+        # Cabeçalho e dados dos produtos
         dados_produtos = [["Produto", "Quantidade", "Preço Unit.", "Subtotal"]]
-        
-        # Dados dos produtos
-        for item in pedido["produtos"]:
-            dados_produtos.append([
-                item["nome"],
-                str(item["quantidade"]),
-                f"R$ {item['preco_unitario']:.2f}",
-                f"R$ {item['quantidade'] * item['preco_unitario']:.2f}"
-            ])
+        dados_produtos.extend(
+            [item["nome"], str(item["quantidade"]), _formatar_centavos(preco),
+             _formatar_centavos(item["quantidade"] * preco)]
+            for item in pedido["produtos"]
+            for preco in (_centavos(item["preco_unitario"]),)
+        )
         
         # Linha de total
-        dados_produtos.append(["", "", "TOTAL:", f"R$ {pedido['total']:.2f}"])
+        dados_produtos.append(["", "", "TOTAL:", _formatar_centavos(_centavos(pedido["total"]))])
         
         t_produtos = Table(dados_produtos, colWidths=[3*inch, 1*inch, 1.5*inch, 1.5*inch])
-        t_produtos.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -2), 1, colors.black),
-            ('LINEBELOW', (0, -1), (-1, -1), 2, colors.black),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        t_produtos.setStyle(estilos["produtos"])
         story.append(t_produtos)
         story.append(Spacer(1, 20))
         
@@ -405,10 +709,73 @@ class SistemaVendas:
         print(f"✅ Recibo gerado: {caminho_completo}")
         return caminho_completo
     
+    def _totalizar_pedidos(self, indices: Optional[List[int]]) -> tuple:
+        """
+        Soma os totais dos pedidos e agrupa os produtos vendidos
+        
+        Args:
+            indices: Posições (em self.pedidos) dos pedidos a considerar, ou None para todos
+            
+        Returns:
+            Tupla (total_vendas, pedidos_finalizados, pedidos_pendentes, produtos_vendidos),
+            onde produtos_vendidos é o dicionário nome -> {"quantidade", "valor"}, na
+            ordem da primeira venda
+        """
+        if len(self._itens_inicio) != len(self.pedidos) + 1:
+            self._montar_colunas_itens()
+        pedidos = self.pedidos if indices is None else [self.pedidos[i] for i in indices]
+        
+        # Valores somados em centavos inteiros (soma exata, sem acúmulo de erro de
+        # ponto flutuante) e convertidos para reais só no resultado
+        total_vendas = 0
+        finalizados = pendentes = 0
+        for pedido in pedidos:
+            total_vendas += _centavos(pedido["total"])
+            status = pedido["status"]
+            if status == "finalizado":
+                finalizados += 1
+            elif status == "pendente":
+                pendentes += 1
+        
+        # Produtos: acumuladores indexados pelo ID do produto sobre as colunas de itens
+        quantidades = [0] * len(self._nomes_produtos)
+        valores = [0] * len(self._nomes_produtos)
+        itens_produto = self._itens_produto
+        itens_quantidade = self._itens_quantidade
+        itens_valor = self._itens_valor
+        if indices is None:
+            for produto, quantidade, valor in zip(itens_produto, itens_quantidade, itens_valor):
+                quantidades[produto] += quantidade
+                valores[produto] += valor
+            # Sem filtro a ordem da primeira venda é a própria ordem dos IDs
+            ordem = range(len(self._nomes_produtos))
+        else:
+            # Com filtro a ordem da primeira venda é a dos pedidos selecionados
+            visto = [False] * len(self._nomes_produtos)
+            ordem = []
+            inicio_itens = self._itens_inicio
+            for i in indices:
+                for k in range(inicio_itens[i], inicio_itens[i + 1]):
+                    produto = itens_produto[k]
+                    if not visto[produto]:
+                        visto[produto] = True
+                        ordem.append(produto)
+                    quantidades[produto] += itens_quantidade[k]
+                    valores[produto] += itens_valor[k]
+        
+        nomes = self._nomes_produtos
+        produtos_vendidos = {nomes[produto]: {"quantidade": quantidades[produto], "valor": valores[produto] / 100}
+                             for produto in ordem}
+        return total_vendas / 100, finalizados, pendentes, produtos_vendidos
+    
     def relatorio_vendas(self, data_inicio: str = None, data_fim: str = None) -> Dict:
         """
         Gera relatório de vendas
         
+        O cálculo fica em cache até a próxima alteração de pedido; os
+        dicionários e listas internos do resultado são compartilhados e não
+        devem ser alterados.
+        
         Args:
             data_inicio: Data de início (YYYY-MM-DD)
             data_fim: Data de fim (YYYY-MM-DD)
@@ -416,41 +783,51 @@ class SistemaVendas:
         Returns:
             Dicionário com dados do relatório
         """
-        pedidos_filtrados = self.pedidos
+        if self._versao_cache_relatorio != self._versao_pedidos:
+            self._cache_relatorio.clear()
+            self._versao_cache_relatorio = self._versao_pedidos
+        chave_cache = (data_inicio or None, data_fim or None)
+        relatorio = self._cache_relatorio.get(chave_cache)
+        if relatorio is None:
+            relatorio = self._cache_relatorio[chave_cache] = self._calcular_relatorio(data_inicio, data_fim)
+        
+        return {
+            **relatorio,
+            "data_inicio": data_inicio,
+            "data_fim": data_fim,
+            "data_relatorio": self._now_str()
+        }
+    
+    def _calcular_relatorio(self, data_inicio: Optional[str], data_fim: Optional[str]) -> Dict:
+        """
+        Calcula os totais do relatório de vendas
         
-        # Filtra por data se especificado
+        Args:
+            data_inicio: Data de início (YYYY-MM-DD) ou None
+            data_fim: Data de fim (YYYY-MM-DD) ou None
+            
+        Returns:
+            Dicionário com totais, contadores e produtos vendidos
+        """
+        indices = None
+        total_pedidos = len(self.pedidos)
+        
+        # Filtra por data se especificado, comparando as datas já recortadas
+        # (o texto YYYY-MM-DD ordena como a data); limite ausente não restringe
         if data_inicio or data_fim:
-            pedidos_filtrados = []
-            for pedido in self.pedidos:
-                data_pedido = pedido["data_criacao"][:10]  # Pega apenas a data
-                
-                if data_inicio and data_pedido < data_inicio:
-                    continue
-                if data_fim and data_pedido > data_fim:
-                    continue
-                
-                pedidos_filtrados.append(pedido)
-        
-        # Calcula estatísticas
-        total_pedidos = len(pedidos_filtrados)
-        total_vendas = sum(pedido["total"] for pedido in pedidos_filtrados)
-        pedidos_finalizados = len([p for p in pedidos_filtrados if p["status"] == "finalizado"])
-        pedidos_pendentes = len([p for p in pedidos_filtrados if p["status"] == "pendente"])
-        
-        # Produtos mais vendidos
-        produtos_vendidos = {}
-        for pedido in pedidos_filtrados:
-            for item in pedido["produtos"]:
-                nome_produto = item["nome"]
-                if nome_produto not in produtos_vendidos:
-                    produtos_vendidos[nome_produto] = {"quantidade": 0, "valor": 0}
-                produtos_vendidos[nome_produto]["quantidade"] += item["quantidade"]
-                produtos_vendidos[nome_produto]["valor"] += item["quantidade"] * item["preco_unitario"]
+            if len(self._datas_pedidos) != len(self.pedidos):
+                self._datas_pedidos = [pedido["data_criacao"][:10] for pedido in self.pedidos]
+            inicio = data_inicio or ""
+            fim = data_fim or "\uffff"
+            indices = [i for i, data_pedido in enumerate(self._datas_pedidos) if inicio <= data_pedido <= fim]
+            total_pedidos = len(indices)
+        
+        # Calcula estatísticas e produtos mais vendidos
+        total_vendas, pedidos_finalizados, pedidos_pendentes, produtos_vendidos = \
+            self._totalizar_pedidos(indices)
         
         # Top 5 produtos
-        top_produtos = sorted(produtos_vendidos.items(), 
-                            key=lambda x: x[1]["quantidade"], 
-                            reverse=True)[:5]
+        top_produtos = heapq.nlargest(5, produtos_vendidos.items(), key=_quantidade_vendida)
         
         return {
             "total_pedidos": total_pedidos,
@@ -458,8 +835,5 @@ class SistemaVendas:
             "pedidos_finalizados": pedidos_finalizados,
             "pedidos_pendentes": pedidos_pendentes,
             "produtos_vendidos": produtos_vendidos,
-            "top_produtos": top_produtos,
-            "data_inicio": data_inicio,
-            "data_fim": data_fim,
-            "data_relatorio": time.strftime("%Y-%m-%d %H:%M:%S")
+            "top_produtos": top_produtos
         }